@@ -1,12 +1,18 @@
 import streamlit as st
-from transformers import pipeline
 
-# Load pipeline model generatif QA
-qa_pipeline = pipeline(
-    "text2text-generation",
-    model="cahya/bert-base-indonesian-tydiqa",
-    tokenizer="cahya/bert-base-indonesian-tydiqa"
-)
+from qna.snapshots import pretrained_source
+
+# Load pipeline model generatif QA (sekali per proses, bukan di setiap rerun Streamlit; transformers baru diimpor di sini)
+@st.cache_resource
+def load_pipeline():
+    from transformers import pipeline
+
+    source, _ = pretrained_source("cahya/bert-base-indonesian-tydiqa")
+    return pipeline(
+        "text2text-generation",
+        model=source,
+        tokenizer=source
+    )
 
 st.title("📘 QA Bahasa Indonesia dengan Jawaban Panjang (BERT)")
 st.markdown("Masukkan teks konteks dan pertanyaan, model akan memberikan jawaban naratif.")
@@ -21,6 +27,6 @@ if st.button("Jawab"):
     else:
         # Format input untuk T5
         input_text = f"question: {question} context: {context}"
-        result = qa_pipeline(input_text, max_length=150, do_sample=False)[0]["generated_text"]
+        result = load_pipeline()(input_text, max_length=150, do_sample=False)[0]["generated_text"]
         st.subheader("Jawaban:")
         st.write(result)
\ No newline at end of file
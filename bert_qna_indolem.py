@@ -1,12 +1,18 @@
 import streamlit as st
-from transformers import pipeline
 
-# Load pipeline QA ekstraktif
-qa_pipeline = pipeline(
-    "text2text-generation",
-    model="indolem/indobert-base-uncased",
-    tokenizer="indolem/indobert-base-uncased"
-)
+from qna.snapshots import pretrained_source
+
+# Load pipeline QA ekstraktif (sekali per proses, bukan di setiap rerun Streamlit; transformers baru diimpor di sini)
+@st.cache_resource
+def load_pipeline():
+    from transformers import pipeline
+
+    source, _ = pretrained_source("indolem/indobert-base-uncased")
+    return pipeline(
+        "text2text-generation",
+        model=source,
+        tokenizer=source
+    )
 
 # UI Streamlit
 st.title("🤖 Tanya Jawab Bahasa Indonesia (IndoBERT)")
@@ -22,7 +28,7 @@ if st.button("Jawab"):
         st.warning("Mohon masukkan konteks dan pertanyaan.")
     else:
         input_text = f"question: {question} context: {context}"
-        output = qa_pipeline(input_text, max_length=200, do_sample=False)[0]["generated_text"]
+        output = load_pipeline()(input_text, max_length=200, do_sample=False)[0]["generated_text"]
 
         st.subheader("📝 Jawaban Naratif:")
         st.write(output)
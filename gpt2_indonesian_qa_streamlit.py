@@ -1,11 +1,17 @@
 import streamlit as st
-import torch
-from transformers import GPT2LMHeadModel, GPT2Tokenizer, pipeline
 import pandas as pd
 from datetime import datetime
+import os
 import re
 import random
 
+from qna.client import InferenceClient, ServerBusyError
+from qna.executor import InferenceExecutor
+from qna.prompt_budget import fit_prompt, max_positions
+from qna.snapshots import pretrained_source
+from qna.startup import StartupReport
+from qna.stopping import StopRules
+
 # Konfigurasi halaman
 st.set_page_config(
     page_title="Sistem Tanya Jawab GPT2 Indonesia",
@@ -13,16 +19,26 @@ st.set_page_config(
     layout="wide"
 )
 
+MODEL_NAME = "cahya/gpt2-large-indonesian-522M"
+
 # Cache untuk model
 @st.cache_resource
 def load_model():
-    """Load model GPT2 Indonesia dan tokenizer"""
+    """Load model GPT2 Indonesia dan tokenizer (dari snapshot lokal jika ada: python -m qna.snapshots pull gpt2-indo).
+    torch/transformers baru diimpor di sini, jadi halaman sudah tampil sebelum model dimuat."""
     try:
-        model_name = "cahya/gpt2-large-indonesian-522M"
+        report = StartupReport()
+        with report.stage("impor torch"):
+            import torch
+        with report.stage("impor transformers"):
+            from transformers import GPT2LMHeadModel, GPT2Tokenizer, pipeline
+        model_name, source_kwargs = pretrained_source(MODEL_NAME)
         
         with st.spinner("Mengunduh model GPT2 Indonesia (522M)... Ini mungkin memakan waktu beberapa menit untuk pertama kali."):
-            tokenizer = GPT2Tokenizer.from_pretrained(model_name)
-            model = GPT2LMHeadModel.from_pretrained(model_name)
+            with report.stage("tokenizer"):
+                tokenizer = GPT2Tokenizer.from_pretrained(model_name, **source_kwargs)
+            with report.stage("bobot"):
+                model = GPT2LMHeadModel.from_pretrained(model_name, **source_kwargs)
             
             # Set pad token
             if tokenizer.pad_token is None:
@@ -37,11 +53,39 @@ def load_model():
                 torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32
             )
         
+        print(f"⏱️ Rincian start-up: {report}")
         return generator, tokenizer
     except Exception as e:
         st.error(f"Error loading model: {str(e)}")
         return None, None
 
+@st.cache_resource
+def load_tokenizer():
+    """Tokenizer saja (untuk mengukur prompt dalam mode thin client, tanpa memuat model)"""
+    from transformers import GPT2Tokenizer
+
+    source, source_kwargs = pretrained_source(MODEL_NAME)
+    return GPT2Tokenizer.from_pretrained(source, **source_kwargs)
+
+# Jawaban selesai setelah 3 kalimat, baris kosong, atau saat model memulai blok tanya jawab baru;
+# generate langsung berhenti di titik itu sehingga token yang akan dibuang tidak perlu dihasilkan
+ANSWER_STOP = StopRules(stop=("Pertanyaan:", "Konteks:", "Jawaban:"), max_sentences=3, stop_at_blank_line=True)
+
+# Satu executor untuk semua sesi: request bersamaan diantrikan FIFO dan digabung menjadi batch generate
+@st.cache_resource
+def load_executor():
+    """Executor inferensi bersama (jumlah worker dari QNA_EXECUTOR_WORKERS, ukuran batch dari QNA_EXECUTOR_BATCH)"""
+    return InferenceExecutor(
+        workers=int(os.environ.get("QNA_EXECUTOR_WORKERS", "1")),
+        max_batch_size=int(os.environ.get("QNA_EXECUTOR_BATCH", "8"))
+    )
+
+def wait_for_turn(job, placeholder):
+    """Tampilkan posisi antrian sampai request mulai diproses"""
+    while not job.started.wait(0.25):
+        placeholder.info(f"⏳ Menunggu giliran... posisi antrian: {job.position()}")
+    placeholder.empty()
+
 def create_qa_prompt(question, context=""):
     """Membuat prompt untuk tanya jawab"""
     
@@ -69,6 +113,20 @@ def create_qa_prompt(question, context=""):
     
     return prompt
 
+def build_prompt(tokenizer, question, context="", max_new_tokens=150, prompt_tokens=512, model=None):
+    """Prompt yang diukur dalam token: kalimat konteks yang paling relevan dengan pertanyaan dimasukkan
+    sampai budget prompt_tokens penuh, lalu max_new_tokens dihitung tepat terhadap n_positions model.
+    Mengembalikan (prompt, info) dari qna.prompt_budget.fit_prompt."""
+    return fit_prompt(
+        tokenizer,
+        question,
+        context,
+        lambda selected: create_qa_prompt(question, selected),
+        max_prompt_tokens=prompt_tokens,
+        max_new_tokens=max_new_tokens,
+        positions=max_positions(tokenizer, model)
+    )
+
 def clean_generated_text(text, original_prompt):
     """Membersihkan teks yang dihasilkan"""
     
@@ -76,6 +134,9 @@ def clean_generated_text(text, original_prompt):
     if original_prompt in text:
         text = text.replace(original_prompt, "").strip()
     
+    # Potong di titik berhenti yang sama dengan saat generate (maksimal 3 kalimat, tanpa blok baru)
+    text = ANSWER_STOP.trim(text)
+    
     # Cari jawaban setelah "Jawaban:"
     if "Jawaban:" in text:
         text = text.split("Jawaban:")[-1].strip()
@@ -85,62 +146,116 @@ def clean_generated_text(text, original_prompt):
     text = re.sub(r'\s+', ' ', text)  # Ganti multiple spaces dengan single space
     text = text.strip()
     
-    # Potong di titik yang wajar jika terlalu panjang
-    sentences = text.split('.')
-    if len(sentences) > 3:  # Batasi maksimal 3 kalimat
-        text = '. '.join(sentences[:3]) + '.'
-    elif not text.endswith('.') and not text.endswith('!') and not text.endswith('?'):
+    if not text.endswith('.') and not text.endswith('!') and not text.endswith('?'):
         text += '.'
     
     return text
 
-def generate_answer(generator, question, context="", max_length=150, temperature=0.7, top_p=0.9):
-    """Generate jawaban menggunakan GPT2"""
+def generate_answer(generator, question, context="", max_length=150, temperature=0.7, top_p=0.9, stream_container=None, client=None, executor=None, prompt_tokens=512):
+    """Generate jawaban menggunakan GPT2 (ditampilkan bertahap di stream_container jika diberikan).
+    Jika client diberikan, generate dijalankan di server inferensi (python -m qna.server); jika tidak,
+    request masuk ke executor bersama agar sesi yang bersamaan dibatch, bukan berebut thread.
+    max_length adalah jumlah token baru; prompt dibatasi prompt_tokens token."""
     
     try:
-        # Buat prompt
-        prompt = create_qa_prompt(question, context)
-        
-        # Generate jawaban
-        result = generator(
-            prompt,
-            max_length=len(prompt.split()) + max_length,
-            min_length=len(prompt.split()) + 20,
-            temperature=temperature,
-            top_p=top_p,
-            do_sample=True,
-            num_return_sequences=1,
-            pad_token_id=generator.tokenizer.eos_token_id,
-            repetition_penalty=1.2,
-            length_penalty=1.0
+        # Buat prompt dengan budget token (konteks panjang dipangkas ke kalimat yang paling relevan)
+        tokenizer = load_tokenizer() if generator is None else generator.tokenizer
+        prompt, prompt_info = build_prompt(
+            tokenizer, question, context, max_length, prompt_tokens, getattr(generator, "model", None)
         )
+        max_new_tokens = prompt_info["max_new_tokens"]
+        min_new_tokens = min(20, max_new_tokens)
+        
+        # Generate jawaban token demi token
+        if client is not None:
+            stream = client.stream(
+                prompt=prompt,
+                model="gpt2-indo",
+                max_new_tokens=max_new_tokens,
+                min_new_tokens=min_new_tokens,
+                temperature=temperature,
+                top_p=top_p,
+                do_sample=True,
+                repetition_penalty=1.2,
+                stop=list(ANSWER_STOP.stop),
+                max_sentences=ANSWER_STOP.max_sentences,
+                stop_at_blank_line=ANSWER_STOP.stop_at_blank_line
+            )
+        else:
+            stream = executor.stream_generate(
+                generator.model,
+                generator.tokenizer,
+                prompt,
+                max_new_tokens=max_new_tokens,
+                min_new_tokens=min_new_tokens,
+                temperature=temperature,
+                top_p=top_p,
+                do_sample=True,
+                pad_token_id=generator.tokenizer.eos_token_id,
+                repetition_penalty=1.2,
+                stop_rules=ANSWER_STOP
+            )
+        
+        if stream_container is not None:
+            if client is None:
+                wait_for_turn(stream, stream_container.empty())
+            stream_container.write_stream(stream)
+        else:
+            for _ in stream:
+                pass
         
-        generated_text = result[0]['generated_text']
-        answer = clean_generated_text(generated_text, prompt)
+        answer = clean_generated_text(stream.text, prompt)
+        timing = {
+            'ttft': stream.time_to_first_token or stream.duration,
+            'duration': stream.duration,
+            'tokens': stream.new_tokens,
+            'prompt': prompt,
+            'prompt_tokens': prompt_info['prompt_tokens'],
+            'context_sentences': prompt_info['context_sentences'],
+            'total_sentences': prompt_info['total_sentences']
+        }
         
-        return answer, True
+        return answer, True, timing
     
+    except ServerBusyError as e:
+        return f"Server sedang penuh, coba lagi dalam {e.retry_after:g} detik ({str(e)})", False, None
     except Exception as e:
-        return f"Error generating answer: {str(e)}", False
+        return f"Error generating answer: {str(e)}", False, None
 
 def main():
     st.title("🤖 Sistem Tanya Jawab dengan GPT2 Indonesia")
     st.markdown("### Model: cahya/gpt2-large-indonesian-522M")
     st.markdown("---")
     
-    # Load model
-    with st.spinner("Memuat model GPT2 Indonesia..."):
-        generator, tokenizer = load_model()
-    
-    if generator is None:
-        st.error("Gagal memuat model. Pastikan koneksi internet stabil dan coba lagi.")
-        return
-    
-    st.success("✅ Model GPT2 Indonesia berhasil dimuat!")
+    # Thin client: jika URL server diisi, model tidak dimuat di proses Streamlit
+    server_url = st.sidebar.text_input("URL server inferensi (opsional)", os.environ.get("QNA_SERVER_URL", ""))
+    client = None
+    generator = None
+    if server_url:
+        client = InferenceClient(server_url)
+        try:
+            health = client.health()
+            st.success(f"✅ Terhubung ke server inferensi ({health['queued']} request di antrian)")
+        except Exception as e:
+            st.error(f"Server inferensi tidak bisa dihubungi: {str(e)}")
+            return
+    else:
+        # Load model
+        with st.spinner("Memuat model GPT2 Indonesia..."):
+            generator, tokenizer = load_model()
+        
+        if generator is None:
+            st.error("Gagal memuat model. Pastikan koneksi internet stabil dan coba lagi.")
+            return
+        
+        st.success("✅ Model GPT2 Indonesia berhasil dimuat!")
+    executor = None if client is not None else load_executor()
     
     # Sidebar untuk pengaturan
     st.sidebar.header("⚙️ Pengaturan Generation")
-    max_length = st.sidebar.slider("Panjang maksimal jawaban", 50, 300, 150)
+    max_length = st.sidebar.slider("Panjang maksimal jawaban (token)", 50, 300, 150)
+    prompt_tokens = st.sidebar.slider("Budget prompt (token)", 128, 896, 512, 32,
+                                      help="Konteks panjang dipangkas ke kalimat yang paling relevan sampai budget ini")
     temperature = st.sidebar.slider("Temperature (kreativitas)", 0.1, 1.0, 0.7, 0.1)
     top_p = st.sidebar.slider("Top-p (keragaman)", 0.1, 1.0, 0.9, 0.1)
     
@@ -237,70 +352,84 @@ def main():
             st.error("Harap masukkan konteks untuk mode ini!")
             return
         
-        with st.spinner("Menghasilkan jawaban naratif..."):
-            # Generate jawaban
-            answer, success = generate_answer(
+        # Tampilkan jawaban selagi token dihasilkan
+        stream_placeholder = st.empty()
+        with stream_placeholder.container():
+            st.caption("Menghasilkan jawaban naratif...")
+            answer, success, timing = generate_answer(
                 generator, 
                 question, 
                 context if mode == "Dengan Konteks" else "",
                 max_length, 
                 temperature, 
-                top_p
+                top_p,
+                stream_container=st,
+                client=client,
+                executor=executor,
+                prompt_tokens=prompt_tokens
             )
+        stream_placeholder.empty()
+        
+        if success:
+            # Tampilkan hasil
+            st.header("💬 Jawaban yang Dihasilkan")
             
-            if success:
-                # Tampilkan hasil
-                st.header("💬 Jawaban yang Dihasilkan")
-                
-                # Jawaban dalam box yang menarik
-                st.markdown(
-                    f"""
-                    <div style="
-                        background-color: #f0f8ff;
-                        padding: 20px;
-                        border-radius: 10px;
-                        border-left: 5px solid #4CAF50;
-                        margin: 10px 0;
-                    ">
-                        <h4 style="color: #2E7D32; margin-top: 0;">📝 Jawaban Naratif:</h4>
-                        <p style="font-size: 16px; line-height: 1.6; margin-bottom: 0;">{answer}</p>
-                    </div>
-                    """,
-                    unsafe_allow_html=True
-                )
-                
-                # Detail informasi
-                with st.expander("🔍 Detail Generation"):
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        st.metric("Panjang Jawaban", f"{len(answer.split())} kata")
-                        st.metric("Temperature", temperature)
-                        st.metric("Top-p", top_p)
-                    
-                    with col2:
-                        st.text("Mode:")
-                        st.code(mode)
-                        st.text("Prompt yang digunakan:")
-                        prompt_preview = create_qa_prompt(question, context if mode == "Dengan Konteks" else "")
-                        st.code(prompt_preview[:200] + "..." if len(prompt_preview) > 200 else prompt_preview)
-                
-                # Simpan ke riwayat
-                if 'history' not in st.session_state:
-                    st.session_state.history = []
+            # Jawaban dalam box yang menarik
+            st.markdown(
+                f"""
+                <div style="
+                    background-color: #f0f8ff;
+                    padding: 20px;
+                    border-radius: 10px;
+                    border-left: 5px solid #4CAF50;
+                    margin: 10px 0;
+                ">
+                    <h4 style="color: #2E7D32; margin-top: 0;">📝 Jawaban Naratif:</h4>
+                    <p style="font-size: 16px; line-height: 1.6; margin-bottom: 0;">{answer}</p>
+                </div>
+                """,
+                unsafe_allow_html=True
+            )
+            
+            # Detail informasi
+            with st.expander("🔍 Detail Generation"):
+                col1, col2 = st.columns(2)
                 
-                st.session_state.history.append({
-                    'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    'question': question,
-                    'answer': answer,
-                    'mode': mode,
-                    'context': context if mode == "Dengan Konteks" else "Tidak ada",
-                    'temperature': temperature,
-                    'top_p': top_p
-                })
+                with col1:
+                    st.metric("Panjang Jawaban", f"{len(answer.split())} kata")
+                    st.metric("Token pertama", f"{timing['ttft']:.2f} detik")
+                    st.metric("Total waktu", f"{timing['duration']:.2f} detik ({timing['tokens']} token)")
+                    st.metric("Temperature", temperature)
+                    st.metric("Top-p", top_p)
                 
-            else:
-                st.error(f"Gagal menghasilkan jawaban: {answer}")
+                with col2:
+                    st.text("Mode:")
+                    st.code(mode)
+                    st.text("Prompt yang digunakan:")
+                    if timing['total_sentences']:
+                        st.caption(f"{timing['prompt_tokens']} token prompt, "
+                                   f"{timing['context_sentences']}/{timing['total_sentences']} kalimat konteks dipakai")
+                    else:
+                        st.caption(f"{timing['prompt_tokens']} token prompt")
+                    prompt_preview = timing['prompt']
+                    st.code(prompt_preview[:200] + "..." if len(prompt_preview) > 200 else prompt_preview)
+            
+            # Simpan ke riwayat
+            if 'history' not in st.session_state:
+                st.session_state.history = []
+            
+            st.session_state.history.append({
+                'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                'question': question,
+                'answer': answer,
+                'mode': mode,
+                'context': context if mode == "Dengan Konteks" else "Tidak ada",
+                'temperature': temperature,
+                'top_p': top_p
+            })
+            
+        else:
+            st.error(f"Gagal menghasilkan jawaban: {answer}")
     
     # Riwayat tanya jawab
     if 'history' in st.session_state and st.session_state.history:
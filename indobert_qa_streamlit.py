@@ -1,10 +1,17 @@
 import streamlit as st
-import torch
-from transformers import AutoTokenizer, AutoModelForQuestionAnswering, pipeline
 import pandas as pd
 from datetime import datetime
+import os
 import re
 
+from qna.answer_cache import AnswerCache, MemoryBackend
+from qna.client import InferenceClient, ServerBusyError
+from qna.executor import InferenceExecutor
+from qna.registry import get_spec
+from qna.retrieval import Retriever
+from qna.snapshots import pretrained_source
+from qna.startup import StartupReport
+
 # Konfigurasi halaman
 st.set_page_config(
     page_title="Sistem Tanya Jawab IndoBERT",
@@ -15,25 +22,67 @@ st.set_page_config(
 # Cache untuk model
 @st.cache_resource
 def load_model():
-    """Load model IndoBERT dan tokenizer"""
+    """Load model IndoBERT dan tokenizer (dari snapshot lokal jika ada: python -m qna.snapshots pull indobert).
+    torch/transformers baru diimpor di sini, jadi halaman sudah tampil sebelum model dimuat."""
     try:
-        model_name = "indolem/indobert-base-uncased"
-        tokenizer = AutoTokenizer.from_pretrained(model_name)
-        model = AutoModelForQuestionAnswering.from_pretrained(model_name)
-        
-        # Buat pipeline untuk question answering
-        qa_pipeline = pipeline(
-            "question-answering",
-            model=model,
-            tokenizer=tokenizer,
-            device=0 if torch.cuda.is_available() else -1
-        )
-        
-        return qa_pipeline, tokenizer
+        report = StartupReport()
+        with report.stage("impor torch"):
+            import torch
+        with report.stage("impor transformers"):
+            from transformers import AutoTokenizer, AutoModelForQuestionAnswering
+        model_name, source_kwargs = pretrained_source("indolem/indobert-base-uncased")
+        with report.stage("tokenizer"):
+            tokenizer = AutoTokenizer.from_pretrained(model_name, **source_kwargs)
+        with report.stage("bobot"):
+            model = AutoModelForQuestionAnswering.from_pretrained(model_name, **source_kwargs)
+            model.to("cuda" if torch.cuda.is_available() else "cpu").eval()
+
+        print(f"⏱️ Rincian start-up: {report}")
+        return model, tokenizer
     except Exception as e:
         st.error(f"Error loading model: {str(e)}")
         return None, None
 
+# Backend onnxruntime: graf ONNX diekspor sekali ke QNA_ONNX_DIR lalu dipakai ulang
+@st.cache_resource
+def load_onnx_model(threads):
+    """Load IndoBERT versi ONNX (onnxruntime CPU, optimasi graf penuh)"""
+    try:
+        from qna.onnx_backend import load_onnx
+
+        lm = load_onnx(get_spec("indolem/indobert-base-uncased"), threads=threads or None)
+        return lm.model, lm.tokenizer
+    except Exception as e:
+        st.error(f"Error loading model ONNX: {str(e)}")
+        return None, None
+
+# Cache jawaban bersama untuk semua sesi (QA ekstraktif selalu deterministik)
+@st.cache_resource
+def load_answer_cache():
+    """Cache jawaban dengan eviksi LRU + TTL"""
+    return AnswerCache(MemoryBackend(max_entries=5000, ttl=3600))
+
+# Satu executor untuk semua sesi: pertanyaan bersamaan diantrikan FIFO dan window-nya digabung dalam satu batch
+@st.cache_resource
+def load_executor():
+    """Executor inferensi bersama (jumlah worker dari QNA_EXECUTOR_WORKERS, ukuran batch dari QNA_EXECUTOR_BATCH)"""
+    return InferenceExecutor(
+        workers=int(os.environ.get("QNA_EXECUTOR_WORKERS", "1")),
+        max_batch_size=int(os.environ.get("QNA_EXECUTOR_BATCH", "8"))
+    )
+
+def wait_for_turn(job, placeholder):
+    """Tampilkan posisi antrian sampai request mulai diproses"""
+    while not job.started.wait(0.25):
+        placeholder.info(f"⏳ Menunggu giliran... posisi antrian: {job.position()}")
+    placeholder.empty()
+
+# Index korpus dibuka sekali; passage dibaca dari memmap sehingga korpus tidak disimpan di session_state
+@st.cache_resource
+def load_retriever(path):
+    """Buka index retrieval (dibangun dengan: python -m qna.retrieval build --index <dir> <file...>)"""
+    return Retriever(path)
+
 def format_narrative_answer(question, answer, context, confidence):
     """Format jawaban menjadi naratif yang lebih natural"""
     
@@ -96,21 +145,60 @@ def main():
     st.title("🤖 Sistem Tanya Jawab dengan IndoBERT")
     st.markdown("---")
     
-    # Load model
-    with st.spinner("Memuat model IndoBERT..."):
-        qa_pipeline, tokenizer = load_model()
-    
-    if qa_pipeline is None:
-        st.error("Gagal memuat model. Pastikan koneksi internet stabil.")
-        return
-    
-    st.success("Model IndoBERT berhasil dimuat!")
+    # Thin client: jika URL server diisi, model tidak dimuat di proses Streamlit
+    server_url = st.sidebar.text_input("URL server inferensi (opsional)", os.environ.get("QNA_SERVER_URL", ""))
+    client = None
+    model, tokenizer, executor = None, None, None
+    answer_cache = load_answer_cache()
+    if server_url:
+        client = InferenceClient(server_url)
+        try:
+            health = client.health()
+            st.success(f"Terhubung ke server inferensi ({health['queued']} request di antrian)")
+        except Exception as e:
+            st.error(f"Server inferensi tidak bisa dihubungi: {str(e)}")
+            return
+    else:
+        backend = st.sidebar.selectbox("Backend inferensi", ["PyTorch", "ONNX Runtime (CPU)"])
+        ort_threads = 0
+        if backend != "PyTorch":
+            ort_threads = st.sidebar.number_input("Thread onnxruntime (0 = otomatis)", 0, 64, 0)
+        
+        # Load model
+        with st.spinner("Memuat model IndoBERT..."):
+            if backend == "PyTorch":
+                model, tokenizer = load_model()
+            else:
+                model, tokenizer = load_onnx_model(int(ort_threads))
+        
+        if model is None:
+            st.error("Gagal memuat model. Pastikan koneksi internet stabil.")
+            return
+        
+        st.success("Model IndoBERT berhasil dimuat!")
+        executor = load_executor()
     
     # Sidebar untuk pengaturan
     st.sidebar.header("⚙️ Pengaturan")
     max_length = st.sidebar.slider("Panjang maksimal jawaban", 50, 500, 200)
     min_confidence = st.sidebar.slider("Ambang batas confidence", 0.0, 1.0, 0.1)
     
+    st.sidebar.subheader("📚 Dokumen Panjang")
+    stride = st.sidebar.slider("Overlap antar window (token)", 32, 256, 128, 32)
+    batch_size = st.sidebar.slider("Jumlah window per batch", 1, 64, 16)
+    top_k = st.sidebar.slider("Jumlah kandidat jawaban", 1, 10, 3)
+    
+    st.sidebar.subheader("🗂️ Korpus")
+    index_path = st.sidebar.text_input("Direktori index korpus (opsional)", "")
+    n_passages = st.sidebar.slider("Jumlah passage dari korpus", 1, 10, 3)
+    retriever = None
+    if index_path:
+        try:
+            retriever = load_retriever(index_path)
+            st.sidebar.caption(f"📚 {len(retriever):,} passage di index")
+        except Exception as e:
+            st.sidebar.error(f"Index tidak bisa dibuka: {str(e)}")
+    
     # Area input
     st.header("📝 Input Pertanyaan dan Konteks")
     
@@ -129,6 +217,10 @@ def main():
             placeholder="Contoh: Joko Widodo adalah presiden Indonesia ke-7 yang menjabat sejak 2014...",
             height=100
         )
+        uploaded_file = st.file_uploader("Atau unggah dokumen (.txt / .md):", type=["txt", "md"])
+        if uploaded_file is not None:
+            context = uploaded_file.read().decode("utf-8", errors="ignore")
+            st.caption(f"📄 {uploaded_file.name}: {len(context):,} karakter")
     
     # Contoh data untuk testing
     if st.button("📋 Gunakan Contoh Data"):
@@ -158,19 +250,41 @@ def main():
     
     # Proses tanya jawab
     if process_button:
+        if question and retriever is not None and not context:
+            # Konteks diambil dari passage korpus yang paling relevan
+            context = retriever.context_for(question, n_passages)
+        
         if not question or not context:
             st.error("Harap masukkan pertanyaan dan konteks!")
             return
         
         with st.spinner("Memproses pertanyaan..."):
             try:
-                # Proses dengan model
-                result = qa_pipeline(
-                    question=question,
-                    context=context,
-                    max_answer_len=max_length
-                )
+                # Proses dengan model (atau ambil dari cache jika pertanyaan yang sama sudah pernah dijawab)
+                params = {"max_answer_len": max_length, "stride": stride, "top_k": top_k}
+                results = answer_cache.get("indolem/indobert-base-uncased", question, context, params)
+                if results is None:
+                    if client is not None:
+                        info = client.extractive(
+                            question, context, top_k=top_k, max_answer_len=max_length, stride=stride, batch_size=batch_size
+                        )
+                        results = info["answers"]
+                    else:
+                        job = executor.submit_extractive(
+                            model, tokenizer, question, context,
+                            top_k=top_k, max_answer_len=max_length, stride=stride, batch_size=batch_size
+                        )
+                        wait_for_turn(job, st.empty())
+                        results, info = job.result()
+                        st.caption(f"👥 Diproses bersama {info['batch_size']} request, antri {info['queue_time']:.2f} detik")
+                    st.caption(f"⏱️ {info['windows']} window diproses dalam {info['duration']:.2f} detik")
+                    answer_cache.put("indolem/indobert-base-uncased", question, results, context, params)
                 
+                if not results:
+                    st.error("Tidak ditemukan jawaban dalam konteks.")
+                    return
+                
+                result = results[0]
                 answer = result['answer']
                 confidence = result['score']
                 start_pos = result['start']
@@ -199,11 +313,22 @@ def main():
                         st.text("Jawaban Mentah:")
                         st.code(answer)
                         
-                        # Highlight jawaban dalam konteks
-                        highlighted_context = context[:start_pos] + "**" + context[start_pos:end_pos] + "**" + context[end_pos:]
+                        # Highlight jawaban dalam konteks (potongan sekitar jawaban untuk dokumen panjang)
+                        snippet_start = max(0, start_pos - 300)
+                        snippet_end = min(len(context), end_pos + 300)
+                        highlighted_context = (
+                            ("..." if snippet_start > 0 else "") + context[snippet_start:start_pos]
+                            + "**" + context[start_pos:end_pos] + "**"
+                            + context[end_pos:snippet_end] + ("..." if snippet_end < len(context) else "")
+                        )
                         st.markdown("**Konteks dengan highlight:**")
                         st.markdown(highlighted_context)
                 
+                if len(results) > 1:
+                    with st.expander("🏅 Kandidat Jawaban Lain"):
+                        for rank, candidate in enumerate(results[1:], start=2):
+                            st.write(f"**{rank}.** {candidate['answer']} (skor {candidate['score']:.3f}, karakter {candidate['start']}-{candidate['end']})")
+                
                 # Evaluasi kualitas jawaban
                 st.subheader("📈 Evaluasi Kualitas")
                 if confidence >= 0.8:
@@ -225,6 +350,8 @@ def main():
                     'confidence': confidence
                 })
                 
+            except ServerBusyError as e:
+                st.warning(f"Server sedang penuh, coba lagi dalam {e.retry_after:g} detik.")
             except Exception as e:
                 st.error(f"Error saat memproses: {str(e)}")
     
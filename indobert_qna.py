@@ -1,29 +1,8 @@
-from transformers import pipeline
+from qna.answer_cache import open_cache
+from qna.cli import chat
 
-# Muat model QA IndoBERT
-qa_pipeline = pipeline(
-    "question-answering",
-    model="indolem/indobert-base-uncased",
-    tokenizer="indolem/indobert-base-uncased"
-)
-
-def tanya_jawab(model, konteks):
-    print("🤖 Halo! Saya adalah asisten AI berbasis model indolem/indobert-base-uncased.")
-    print("Silakan ajukan pertanyaan berdasarkan konteks di bawah ini:")
-    print("\n📜 Konteks:\n", konteks)
-    print("\nKetik 'keluar' untuk berhenti.\n")
-
-    while True:
-        pertanyaan = input("🧑 Anda: ")
-        if pertanyaan.lower() in ["keluar", "exit", "quit"]:
-            print("👋 Sampai jumpa!")
-            break
-        
-        hasil = model(question=pertanyaan, context=konteks)
-        jawaban = hasil["answer"]
-        skor = hasil["score"]
-
-        print(f"🧠 Qwen: Jawaban: '{jawaban}' (Skor keyakinan: {skor:.4f})")
+# Konfigurasi model ada di qna/registry.py
+model_name = "indolem/indobert-base-uncased"
 
 # Contoh konteks
 konteks_default = """
@@ -33,4 +12,5 @@ Negara ini memiliki lebih dari 17.000 pulau dan lebih dari 300 kelompok etnis.
 """
 
 # Jalankan chatbot
-tanya_jawab(qa_pipeline, konteks_default)
\ No newline at end of file
+if __name__ == "__main__":
+    chat(model_name, context=konteks_default, cache=open_cache("memory"))
@@ -0,0 +1,75 @@
+"""Paket bersama untuk skrip tanya jawab: registry model dengan lazy loading dan pool model LRU"""
+
+import importlib
+
+# Submodul baru diimpor saat namanya pertama kali diakses, sehingga `python -m qna.<modul>` tidak
+# mengimpor modul itu dua kali (RuntimeWarning dari runpy) dan `import qna` tetap ringan
+_EXPORTS = {
+    "AnswerCache": "answer_cache",
+    "MemoryBackend": "answer_cache",
+    "SqliteBackend": "answer_cache",
+    "normalize_question": "answer_cache",
+    "open_cache": "answer_cache",
+    "BatchRunner": "batch_runner",
+    "run_batch": "batch_runner",
+    "MicroBatcher": "batching",
+    "generate_batch": "batching",
+    "InferenceClient": "client",
+    "ServerBusyError": "client",
+    "ModelComparer": "compare",
+    "InferenceExecutor": "executor",
+    "ExtractiveQA": "extractive",
+    "answer_question": "generation",
+    "answer_with_retrieval": "generation",
+    "generate_response": "generation",
+    "PassageStore": "passage_store",
+    "PassageStoreWriter": "passage_store",
+    "ModelPool": "pool",
+    "PrefixCache": "prefix_cache",
+    "fit_prompt": "prompt_budget",
+    "ModelSpec": "registry",
+    "get_spec": "registry",
+    "list_models": "registry",
+    "load_model": "registry",
+    "pool": "registry",
+    "register": "registry",
+    "set_backend": "registry",
+    "set_memory_budget": "registry",
+    "set_precision": "registry",
+    "unload_model": "registry",
+    "IndexWriter": "retrieval",
+    "Retriever": "retrieval",
+    "ContinuousBatcher": "scheduler",
+    "SemanticCache": "semantic_cache",
+    "load_embedder": "semantic_cache",
+    "InferenceServer": "server",
+    "ChatSession": "sessions",
+    "SessionStore": "sessions",
+    "SpeculativeDecoder": "speculative",
+    "generate_speculative": "speculative",
+    "StartupReport": "startup",
+    "worker_context": "startup",
+    "StopRules": "stopping",
+    "ResponseStream": "streaming",
+    "stream_generate": "streaming",
+    "stream_response": "streaming",
+}
+
+__all__ = list(_EXPORTS)
+
+# Modul pool (hanya stdlib) dimuat sekarang lalu namanya dilepas: kalau baru dimuat nanti lewat registry,
+# atribut submodul `qna.pool` akan menutupi `registry.pool` (pool model bersama) yang diekspor di sini
+from .pool import ModelPool  # noqa: E402
+del globals()["pool"]
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module("." + _EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,179 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+
+def normalize_question(question):
+    """Normalisasi pertanyaan: huruf kecil, tanpa tanda baca, spasi tunggal"""
+    text = unicodedata.normalize("NFKC", question).lower()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def context_hash(context):
+    return hashlib.sha256((context or "").encode("utf-8")).hexdigest()
+
+
+def make_key(model_id, question, context="", params=None):
+    """Kunci cache dari (model, pertanyaan ternormalisasi, hash konteks, parameter generate)"""
+    payload = json.dumps(
+        [model_id, normalize_question(question), context_hash(context), sorted((params or {}).items())],
+        default=str,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryBackend:
+    """Cache di memori proses dengan eviksi LRU dan TTL"""
+
+    def __init__(self, max_entries=10000, ttl=24 * 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()   # key -> (value, expires_at)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            expires_at = time.time() + self.ttl if self.ttl else None
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SqliteBackend:
+    """Cache di disk (SQLite) dengan eviksi LRU dan TTL; bisa dipakai bersama antar proses"""
+
+    def __init__(self, path, max_entries=100000, ttl=7 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS answers_last_access ON answers (last_access)")
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM answers WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at < now:
+                self._conn.execute("DELETE FROM answers WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE answers SET last_access = ? WHERE key = ?", (now, key))
+        return json.loads(value)
+
+    def set(self, key, value):
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), expires_at, now),
+            )
+            self._conn.execute(
+                "DELETE FROM answers WHERE key IN ("
+                "SELECT key FROM answers ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM answers")
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+
+
+class AnswerCache:
+    """Cache jawaban dengan backend yang bisa diganti (MemoryBackend / SqliteBackend).
+
+    Hasil generate dengan sampling (do_sample=True) hanya disimpan jika cache_sampled=True,
+    karena jawabannya memang diharapkan berbeda di setiap panggilan. Jika `semantic`
+    (SemanticCache) diberikan, pertanyaan yang tidak cocok persis dicari lagi berdasarkan makna."""
+
+    def __init__(self, backend=None, cache_sampled=False, semantic=None):
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.cache_sampled = cache_sampled
+        self.semantic = semantic
+        self.hits = 0
+        self.misses = 0
+
+    def cacheable(self, params):
+        return self.cache_sampled or not (params or {}).get("do_sample")
+
+    def get(self, model_id, question, context="", params=None):
+        if not self.cacheable(params):
+            return None
+        value = self.backend.get(make_key(model_id, question, context, params))
+        if value is None and self.semantic is not None:
+            value = self.semantic.get(model_id, question, context, params)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def put(self, model_id, question, value, context="", params=None):
+        if self.cacheable(params):
+            self.backend.set(make_key(model_id, question, context, params), value)
+            if self.semantic is not None:
+                self.semantic.put(model_id, question, value, context, params)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.backend),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+def open_cache(location, cache_sampled=False, semantic_threshold=None):
+    """Buat AnswerCache dari string konfigurasi: "memory" atau path file SQLite.
+    Dengan semantic_threshold, tingkat cache semantik (embedding) ikut diaktifkan."""
+    semantic = None
+    if semantic_threshold is not None:
+        from .semantic_cache import SemanticCache
+
+        semantic = SemanticCache(threshold=semantic_threshold)
+
+    if location in (None, "", "memory"):
+        backend = MemoryBackend()
+    else:
+        backend = SqliteBackend(location)
+    return AnswerCache(backend, cache_sampled=cache_sampled, semantic=semantic)
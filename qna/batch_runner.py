@@ -0,0 +1,306 @@
+"""Mode batch/offline: jawab pertanyaan dari file JSONL tanpa terminal interaktif.
+
+Setiap baris input adalah {"id": ..., "question": ..., "context": ...} (id dan context opsional).
+Pertanyaan mengalir lewat pipeline bertingkat dengan antrian terbatas: baca + tokenisasi (thread),
+generate batch (thread utama), decode + tulis (thread). Hasil ditulis bertahap ke JSONL output,
+sehingga run yang terhenti bisa dilanjutkan dan item yang sudah selesai dilewati."""
+
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+
+from .batching import decode_batch, encode_batch
+from .registry import get_spec, load_model
+
+_DONE = object()
+_EXTRACTIVE_OPTIONS = ("max_length", "stride", "max_answer_len")
+
+
+def read_items(path):
+    """Baca item JSONL satu per satu; item tanpa id diberi id dari nomor barisnya"""
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            item.setdefault("id", f"line-{line_number}")
+            item["id"] = str(item["id"])
+            yield item
+
+
+def completed_ids(path):
+    """Id item yang sudah berhasil ditulis di output. Output dipadatkan dulu: record error (item yang akan
+    dicoba lagi) dan baris terakhir yang terpotong (crash saat menulis) dibuang, sehingga setiap id muncul
+    sekali dan output tetap JSONL yang valid."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    compact = False
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                compact = True
+                break
+            if not line.endswith(b"\n"):
+                compact = True
+                break
+            if "error" in record or str(record["id"]) in done:
+                compact = True
+            else:
+                done.add(str(record["id"]))
+    if not compact:
+        return done
+
+    kept = set()
+    temporary = path + ".tmp"
+    with open(path, "rb") as source, open(temporary, "wb") as target:
+        for line in source:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            if not line.endswith(b"\n"):
+                break
+            if "error" not in record and str(record["id"]) not in kept:
+                kept.add(str(record["id"]))
+                target.write(line)
+    os.replace(temporary, path)
+    return done
+
+
+def _batches(items, batch_size, skip):
+    batch = []
+    for item in items:
+        if item["id"] in skip:
+            continue
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _run_stage(target, errors):
+    def run():
+        try:
+            target()
+        except BaseException as e:   # diteruskan ke thread utama
+            errors.append(e)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+class BatchRunner:
+    """Jalankan satu model terhadap file JSONL pertanyaan dan tulis jawaban + latensi + jumlah token.
+
+    Untuk model generatif, batch di-tokenisasi di thread pembaca selagi batch sebelumnya di-generate,
+    dan di-decode/ditulis di thread penulis. Model QA ekstraktif memakai ExtractiveQA dengan pertanyaan
+    yang berbagi konteks dijawab dalam satu panggilan."""
+
+    def __init__(self, name, batch_size=16, queue_size=4, **overrides):
+        self.spec = get_spec(name)
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.overrides = overrides
+        self.items = 0
+        self.errors = 0
+        self.new_tokens = 0
+        self.generate_time = 0.0
+
+    def run(self, input_path, output_path, resume=True, progress_every=100):
+        """Proses seluruh input, mengembalikan ringkasan (jumlah item, item/detik, token/detik, ...)"""
+        skip = completed_ids(output_path) if resume else set()
+        if skip:
+            print(f"⏭️ Melanjutkan: {len(skip)} item sudah selesai di {output_path}")
+
+        lm = load_model(self.spec.model_id)
+        encoded = queue.Queue(maxsize=self.queue_size)
+        generated = queue.Queue(maxsize=self.queue_size)
+        errors = []
+        finished = threading.Event()
+        start_time = time.time()
+
+        def put(q, item):
+            # Jangan menunggu selamanya jika tahap lain sudah gagal
+            while not errors:
+                try:
+                    q.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def read_and_encode():
+            for batch in _batches(read_items(input_path), self.batch_size, skip):
+                # encode_batch tidak mengubah state tokenizer (padding manual), jadi aman berjalan
+                # bersamaan dengan decode di thread penulis
+                inputs = None
+                if self.spec.task != "question-answering":
+                    inputs = encode_batch(lm, [i["question"] for i in batch], [i.get("context") for i in batch])
+                if not put(encoded, (batch, inputs)):
+                    return
+            put(encoded, _DONE)
+
+        def decode_and_write():
+            next_report = progress_every
+            with open(output_path, "a" if resume else "w", encoding="utf-8") as f:
+                while True:
+                    try:
+                        job = generated.get(timeout=0.5)
+                    except queue.Empty:
+                        if finished.is_set():
+                            return
+                        continue
+                    if job is _DONE:
+                        return
+                    for record in self._records(lm, *job):
+                        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    f.flush()
+                    if progress_every and self.items >= next_report:
+                        self._print_progress(time.time() - start_time)
+                        next_report += progress_every
+
+        reader = _run_stage(read_and_encode, errors)
+        writer = _run_stage(decode_and_write, errors)
+        try:
+            while not errors:
+                try:
+                    job = encoded.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                if job is _DONE:
+                    break
+                put(generated, self._generate(lm, *job))
+        finally:
+            # Penulis menghabiskan antrian hasil dulu sebelum berhenti
+            finished.set()
+            put(generated, _DONE)
+            writer.join()
+            reader.join(timeout=1)
+        if errors:
+            raise errors[0]
+
+        summary = self.summary(time.time() - start_time)
+        summary["skipped"] = len(skip)
+        return summary
+
+    def _generate(self, lm, batch, inputs):
+        """Jalankan model untuk satu batch; error dicatat per item agar run tetap berlanjut"""
+        import torch
+
+        start_time = time.time()
+        try:
+            if inputs is None:
+                outputs = self._answer_extractive(lm, batch)
+                kwargs = None
+            else:
+                inputs = inputs.to(lm.device)
+                kwargs = lm.generation_kwargs(**self.overrides)
+                with torch.no_grad():
+                    outputs = lm.model.generate(**inputs, **kwargs)
+        except Exception as e:
+            return batch, inputs, None, None, time.time() - start_time, f"{type(e).__name__}: {e}"
+        return batch, inputs, outputs, kwargs, time.time() - start_time, None
+
+    def _answer_extractive(self, lm, batch):
+        from .extractive import ExtractiveQA
+
+        # Override generate (mis. max_new_tokens) tidak berlaku untuk model ekstraktif
+        options = {key: value for key, value in self.overrides.items() if key in _EXTRACTIVE_OPTIONS}
+        engine = ExtractiveQA(lm.model, lm.tokenizer, batch_size=self.batch_size, **options)
+        by_context = {}
+        for position, item in enumerate(batch):
+            by_context.setdefault(item.get("context") or "", []).append(position)
+        answers = [None] * len(batch)
+        for context, positions in by_context.items():
+            results, _ = engine.answer_many([batch[p]["question"] for p in positions], context)
+            for position, result in zip(positions, results):
+                answers[position] = result[0] if result else {"answer": "", "score": 0.0, "start": 0, "end": 0}
+        return answers
+
+    def _records(self, lm, batch, inputs, outputs, kwargs, duration, error):
+        """Decode hasil satu batch menjadi record output (jawaban, latensi, jumlah token)"""
+        self.items += len(batch)
+        self.generate_time += duration
+        if error is not None:
+            self.errors += len(batch)
+            return [{"id": item["id"], "question": item["question"], "error": error} for item in batch]
+
+        if kwargs is None:
+            # Ekstraktif tidak menghasilkan token baru; prompt_tokens = pertanyaan + konteks sebelum dipotong window
+            return [
+                dict(answer, id=item["id"], question=item["question"], batch_latency=duration,
+                     prompt_tokens=len(lm.tokenizer(item["question"], item.get("context") or "")["input_ids"]),
+                     batch_size=len(batch))
+                for item, answer in zip(batch, outputs)
+            ]
+
+        prompt_tokens = inputs["attention_mask"].sum(-1).tolist()
+        decoded = decode_batch(lm, outputs, inputs["input_ids"].shape[-1], kwargs, lm.stop_rules(self.overrides))
+        records = []
+        for item, (answer, new_tokens), n_prompt in zip(batch, decoded, prompt_tokens):
+            self.new_tokens += new_tokens
+            records.append({
+                "id": item["id"],
+                "question": item["question"],
+                "answer": answer,
+                "batch_latency": duration,
+                "prompt_tokens": n_prompt,
+                "new_tokens": new_tokens,
+                "batch_size": len(batch),
+            })
+        return records
+
+    def summary(self, elapsed):
+        return {
+            "model": self.spec.model_id,
+            "items": self.items,
+            "errors": self.errors,
+            "elapsed": elapsed,
+            "items_per_second": self.items / elapsed if elapsed else 0.0,
+            "new_tokens": self.new_tokens,
+            "tokens_per_second": self.new_tokens / self.generate_time if self.generate_time else 0.0,
+        }
+
+    def _print_progress(self, elapsed):
+        print(f"📦 {self.items} item, {self.items / elapsed:.2f} item/detik, "
+              f"{self.new_tokens / max(self.generate_time, 1e-9):.1f} token/detik")
+
+
+def run_batch(name, input_path, output_path, batch_size=16, resume=True, **overrides):
+    """Jawab semua pertanyaan di input JSONL dengan model `name`, mengembalikan ringkasan throughput"""
+    return BatchRunner(name, batch_size=batch_size, **overrides).run(input_path, output_path, resume=resume)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Jawab pertanyaan dari file JSONL secara batch (offline)")
+    parser.add_argument("--model", default="qwen2.5-0.5b", help="id Hugging Face atau alias model")
+    parser.add_argument("--input", required=True, help='JSONL berisi {"id", "question", "context"}')
+    parser.add_argument("--output", required=True, help="JSONL hasil (ditulis bertahap)")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--queue-size", type=int, default=4, help="jumlah batch maksimal di antara tahap pipeline")
+    parser.add_argument("--max-new-tokens", type=int, help="override max_new_tokens model generatif")
+    parser.add_argument("--no-resume", action="store_true", help="tulis ulang output dari awal")
+    args = parser.parse_args(argv)
+
+    overrides = {}
+    if args.max_new_tokens is not None:
+        overrides["max_new_tokens"] = args.max_new_tokens
+
+    runner = BatchRunner(args.model, batch_size=args.batch_size, queue_size=args.queue_size, **overrides)
+    summary = runner.run(args.input, args.output, resume=not args.no_resume)
+    print(f"✅ {summary['items']} item ({summary['errors']} error, {summary['skipped']} dilewati) "
+          f"dalam {summary['elapsed']:.2f} detik")
+    print(f"⏱️ {summary['items_per_second']:.2f} item/detik, {summary['tokens_per_second']:.1f} token/detik")
+
+
+if __name__ == "__main__":
+    main()
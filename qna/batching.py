@@ -0,0 +1,176 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from .registry import load_model
+
+
+class _Request:
+    def __init__(self, question, overrides):
+        self.question = question
+        self.overrides = overrides
+        self.future = Future()
+        self.enqueued_at = time.time()
+
+    @property
+    def group_key(self):
+        # Hanya request dengan parameter generate yang sama yang bisa digabung dalam satu batch
+        return tuple(sorted(self.overrides.items()))
+
+
+def count_new_tokens(row, pad_token_id, eos_token_id):
+    """Jumlah token baru sampai (dan termasuk) EOS pertama"""
+    count = 0
+    for token_id in row.tolist():
+        if token_id == eos_token_id:
+            return count + 1
+        if token_id == pad_token_id:
+            return count
+        count += 1
+    return count
+
+
+def pad_left(sequences, pad_token_id):
+    """Left-pad list token id menjadi tensor (input_ids, attention_mask) tanpa mengubah tokenizer bersama"""
+    import torch
+
+    length = max(len(ids) for ids in sequences)
+    input_ids = torch.full((len(sequences), length), pad_token_id, dtype=torch.long)
+    attention_mask = torch.zeros((len(sequences), length), dtype=torch.long)
+    for row, ids in enumerate(sequences):
+        input_ids[row, length - len(ids):] = torch.tensor(ids, dtype=torch.long)
+        attention_mask[row, length - len(ids):] = 1
+    return input_ids, attention_mask
+
+
+def encode_batch(lm, questions, contexts=None):
+    """Susun prompt dan tokenisasi beberapa pertanyaan sebagai satu batch (left-padding manual, jadi
+    padding_side/pad_token tokenizer yang dipakai bersama thread lain tidak disentuh)"""
+    from transformers import BatchEncoding
+
+    tokenizer = lm.tokenizer
+    pad_token_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id
+
+    contexts = contexts or [None] * len(questions)
+    prompts = [lm.spec.build_prompt(tokenizer, q, c) for q, c in zip(questions, contexts)]
+    input_ids, attention_mask = pad_left(tokenizer(prompts)["input_ids"], pad_token_id)
+    return BatchEncoding({"input_ids": input_ids, "attention_mask": attention_mask})
+
+
+def decode_batch(lm, outputs, prompt_length, kwargs, stop_rules=None):
+    """Ambil jawaban dari output generate batch, mengembalikan list (jawaban, jumlah_token_baru)"""
+    results = []
+    for row in outputs:
+        answer = lm.spec.extract_answer(lm.tokenizer, row, prompt_length, stop_rules)
+        new_tokens = count_new_tokens(row[prompt_length:], kwargs["pad_token_id"], kwargs["eos_token_id"])
+        results.append((answer, new_tokens))
+    return results
+
+
+def generate_batch(lm, questions, contexts=None, **overrides):
+    """Generate jawaban untuk beberapa pertanyaan sekaligus dalam satu panggilan generate
+    (prompt di-left-pad), mengembalikan list (jawaban, jumlah_token_baru)"""
+    import torch
+
+    inputs = encode_batch(lm, questions, contexts).to(lm.device)
+    kwargs = lm.generation_kwargs(**overrides)
+    with torch.no_grad():
+        outputs = lm.model.generate(**inputs, **kwargs)
+    return decode_batch(lm, outputs, inputs["input_ids"].shape[-1], kwargs, lm.stop_rules(overrides))
+
+
+class MicroBatcher:
+    """Antrian request yang mengumpulkan pertanyaan bersamaan dalam jendela waktu singkat
+    lalu menjalankannya sebagai satu batch generate"""
+
+    def __init__(self, name, max_batch_size=8, max_wait_ms=20):
+        self.name = name
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.total_tokens = 0
+        self.total_time = 0.0
+        self.batches = 0
+        self._queue = queue.Queue()
+        self._pending = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"batcher-{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, question, **overrides):
+        """Masukkan pertanyaan ke antrian, mengembalikan Future berisi dict hasil"""
+        if self._stop.is_set():
+            raise RuntimeError("MicroBatcher sudah dihentikan")
+        request = _Request(question, overrides)
+        self._queue.put(request)
+        return request.future
+
+    def generate_response(self, question, **overrides):
+        """Sama seperti qna.generate_response, tetapi lewat antrian batch"""
+        result = self.submit(question, **overrides).result()
+        return result["answer"], result["duration"]
+
+    def tokens_per_second(self):
+        return self.total_tokens / self.total_time if self.total_time else 0.0
+
+    def close(self):
+        self._stop.set()
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self):
+        """Ambil satu batch: request pertama ditunggu, sisanya dikumpulkan selama max_wait_ms"""
+        if not self._pending:
+            first = self._queue.get()
+            if first is None:
+                return None
+            self._pending.append(first)
+
+        deadline = time.time() + self.max_wait_ms / 1000
+        while len(self._pending) < self.max_batch_size * 2:
+            timeout = deadline - time.time()
+            if timeout <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if request is None:
+                self._stop.set()
+                break
+            self._pending.append(request)
+
+        # Ambil request tertua beserta request lain dengan parameter yang sama
+        key = self._pending[0].group_key
+        batch = [r for r in self._pending if r.group_key == key][:self.max_batch_size]
+        self._pending = [r for r in self._pending if r not in batch]
+        return batch
+
+    def _run(self):
+        while not (self._stop.is_set() and not self._pending):
+            batch = self._collect()
+            if batch is None:
+                break
+
+            start_time = time.time()
+            try:
+                lm = load_model(self.name)
+                results = generate_batch(lm, [r.question for r in batch], **batch[0].overrides)
+            except Exception as e:
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+
+            end_time = time.time()
+            self.batches += 1
+            self.total_time += end_time - start_time
+            for request, (answer, new_tokens) in zip(batch, results):
+                self.total_tokens += new_tokens
+                request.future.set_result({
+                    "answer": answer,
+                    "duration": end_time - request.enqueued_at,
+                    "queue_time": start_time - request.enqueued_at,
+                    "generate_time": end_time - start_time,
+                    "new_tokens": new_tokens,
+                    "batch_size": len(batch),
+                })
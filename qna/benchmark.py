@@ -0,0 +1,309 @@
+"""Benchmark latensi/throughput untuk semua model di registry dengan set pertanyaan tetap.
+
+Setiap model diukur di proses terpisah (RSS puncak dan waktu muat tidak tercampur antar model),
+dengan beberapa putaran pemanasan lebih dulu. Waktu tokenisasi, generate, dan decode dicatat
+terpisah; time-to-first-token diambil dari streamer saat token pertama keluar. Dengan --tiny,
+model diganti versi mini berbobot acak (lihat tiny_models) sehingga benchmark jalan offline di CPU.
+
+    python -m qna.benchmark --tiny --output hasil.json
+    python -m qna.benchmark --models qwen2.5-0.5b llama3.2-1b --baseline hasil_lama.json"""
+
+import argparse
+import json
+import platform
+import resource
+import sys
+import time
+
+from .pool import model_memory_bytes, process_rss_bytes
+from .registry import get_spec, list_models
+
+PROMPTS = [
+    "Apa ibu kota Indonesia?",
+    "Siapa presiden pertama Indonesia?",
+    "Kapan proklamasi kemerdekaan Indonesia dibacakan?",
+    "Sebutkan tiga pulau terbesar di Indonesia.",
+    "Mengapa Indonesia disebut negara kepulauan?",
+    "Bagaimana cara membuat nasi goreng?",
+    "Jelaskan perbedaan cuaca dan iklim.",
+    "Apa bahasa resmi negara Indonesia?",
+]
+
+CONTEXT = (
+    "Indonesia adalah negara kepulauan terbesar di dunia dengan lebih dari tujuh belas ribu pulau. "
+    "Ibu kota Indonesia adalah Jakarta. Soekarno adalah presiden pertama Indonesia dan bersama Mohammad Hatta "
+    "membacakan proklamasi kemerdekaan pada 17 Agustus 1945. Bahasa resmi negara Indonesia adalah bahasa Indonesia. "
+    "Pulau-pulau terbesarnya antara lain Kalimantan, Sumatra, dan Papua."
+)
+
+
+def percentile(values, q):
+    """Persentil (interpolasi linear) dari list angka"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def peak_rss_bytes():
+    """RSS puncak proses ini (ru_maxrss dalam KB di Linux, byte di macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _first_token_timer():
+    from transformers.generation.streamers import BaseStreamer
+
+    class _FirstTokenTimer(BaseStreamer):
+        """Streamer yang hanya mencatat kapan token baru pertama dihasilkan"""
+
+        def __init__(self):
+            self.first_token_at = None
+            self._prompt_seen = False
+
+        def put(self, value):
+            if not self._prompt_seen:
+                self._prompt_seen = True
+            elif self.first_token_at is None:
+                self.first_token_at = time.perf_counter()
+
+        def end(self):
+            pass
+
+    return _FirstTokenTimer()
+
+
+def measure_generation(lm, question, max_new_tokens):
+    """Satu pertanyaan generatif: waktu tokenisasi, TTFT, generate, decode, dan jumlah token baru"""
+    import torch
+
+    begin = time.perf_counter()
+    prompt = lm.spec.build_prompt(lm.tokenizer, question)
+    inputs = lm.tokenizer(prompt, return_tensors="pt").to(lm.device)
+    tokenized = time.perf_counter()
+
+    timer = _first_token_timer()
+    # Panjang jawaban dibuat tetap (tanpa aturan berhenti) agar token/detik antar run dan antar model bisa dibandingkan
+    kwargs = lm.generation_kwargs(
+        do_sample=False, max_new_tokens=max_new_tokens, min_new_tokens=max_new_tokens, stop_rules=None
+    )
+    for key in ("temperature", "top_p", "top_k"):
+        kwargs.pop(key, None)
+    with torch.no_grad():
+        outputs = lm.model.generate(**inputs, **kwargs, streamer=timer)
+    generated = time.perf_counter()
+
+    prompt_length = inputs["input_ids"].shape[-1]
+    lm.spec.extract_answer(lm.tokenizer, outputs[0], prompt_length)
+    decoded = time.perf_counter()
+
+    return {
+        "latency": decoded - begin,
+        "tokenize": tokenized - begin,
+        "ttft": (timer.first_token_at or generated) - tokenized,
+        "generate": generated - tokenized,
+        "decode": decoded - generated,
+        "prompt_tokens": prompt_length,
+        "new_tokens": outputs.shape[-1] - prompt_length,
+    }
+
+
+def measure_extractive(engine, question, context):
+    """Satu pertanyaan QA ekstraktif (tokenisasi + forward + pencarian span)"""
+    begin = time.perf_counter()
+    engine.answer(question, context)
+    return {"latency": time.perf_counter() - begin}
+
+
+def _summarize(runs):
+    summary = {"runs": len(runs)}
+    latencies = [r["latency"] for r in runs]
+    for q in (50, 95, 99):
+        summary[f"latency_p{q}_ms"] = percentile(latencies, q) * 1000
+    summary["latency_mean_ms"] = sum(latencies) / len(latencies) * 1000
+
+    if "ttft" in runs[0]:
+        ttfts = [r["ttft"] for r in runs]
+        summary["ttft_p50_ms"] = percentile(ttfts, 50) * 1000
+        summary["ttft_p95_ms"] = percentile(ttfts, 95) * 1000
+        for stage in ("tokenize", "generate", "decode"):
+            summary[f"{stage}_mean_ms"] = sum(r[stage] for r in runs) / len(runs) * 1000
+        new_tokens = sum(r["new_tokens"] for r in runs)
+        summary["new_tokens"] = new_tokens
+        summary["tokens_per_second"] = new_tokens / sum(r["generate"] for r in runs)
+    return summary
+
+
+def benchmark_model(name, tiny=False, warmup=2, repeats=3, max_new_tokens=32, threads=None, precision=None,
+                    backend=None):
+    """Benchmark satu model di proses ini, mengembalikan dict hasil"""
+    import torch
+
+    from .registry import set_backend, set_precision
+
+    if threads:
+        torch.set_num_threads(threads)
+    if precision:
+        set_precision(precision)
+    if backend:
+        set_backend(backend, threads=threads)
+
+    spec = get_spec(name)
+    rss_before = process_rss_bytes()
+    if tiny:
+        from .tiny_models import load_tiny
+
+        lm = load_tiny(spec.model_id, extra_text=" ".join(PROMPTS) + " " + CONTEXT)
+        if precision:
+            from .quantization import apply_precision
+
+            lm.model = apply_precision(lm.model, precision)
+        if backend == "onnx":
+            import tempfile
+
+            from .onnx_backend import to_onnx
+
+            lm = to_onnx(lm, tempfile.mkdtemp(prefix="qna-onnx-"), threads=threads)
+    else:
+        from .registry import _load
+
+        lm = _load(spec)
+    rss_loaded = process_rss_bytes()
+
+    if spec.task == "question-answering":
+        from .extractive import ExtractiveQA
+
+        engine = ExtractiveQA(lm.model, lm.tokenizer)
+
+        def run(question):
+            return measure_extractive(engine, question, CONTEXT)
+    else:
+        def run(question):
+            return measure_generation(lm, question, max_new_tokens)
+
+    for question in PROMPTS[:warmup]:
+        run(question)
+    runs = [run(question) for _ in range(repeats) for question in PROMPTS]
+
+    result = {
+        "model": spec.model_id,
+        "alias": spec.alias,
+        "task": spec.task,
+        "tiny": tiny,
+        "precision": precision,
+        "backend": backend or "torch",
+        "load_time_s": lm.load_time,
+        "model_mb": model_memory_bytes(lm.model) / 1024 ** 2,
+        "load_rss_mb": (rss_loaded - rss_before) / 1024 ** 2,
+        "peak_rss_mb": peak_rss_bytes() / 1024 ** 2,
+    }
+    result.update(_summarize(runs))
+    return result
+
+
+def _run_isolated(name, **kwargs):
+    """Jalankan benchmark_model di proses baru (spawn) agar RSS puncak per model tidak tercampur"""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+        return executor.submit(benchmark_model, name, **kwargs).result()
+
+
+def environment():
+    import torch
+    import transformers
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "torch": torch.__version__,
+        "transformers": transformers.__version__,
+        "threads": torch.get_num_threads(),
+        "cuda": torch.cuda.get_device_name(0) if torch.cuda.is_available() else None,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def run_benchmark(names=None, isolate=True, **kwargs):
+    """Benchmark beberapa model (default: semua di registry), mengembalikan dict hasil siap ditulis ke JSON"""
+    names = names or list_models()
+    results = []
+    for name in names:
+        print(f"⏱️ Benchmark {name}...", flush=True)
+        try:
+            result = _run_isolated(name, **kwargs) if isolate else benchmark_model(name, **kwargs)
+        except Exception as e:
+            result = {"model": get_spec(name).model_id, "error": f"{type(e).__name__}: {e}"}
+        results.append(result)
+    return {"environment": environment(), "settings": kwargs, "results": results}
+
+
+def print_report(report, baseline=None):
+    """Tabel ringkas; dengan baseline, perubahan p50 dan token/detik ditampilkan dalam persen"""
+    previous = {r["model"]: r for r in (baseline or {}).get("results", [])}
+    print(f"\n{'model':<48} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ttft ms':>9} {'tok/s':>9} "
+          f"{'load s':>7} {'rss MB':>8}")
+    for r in report["results"]:
+        if "error" in r:
+            print(f"{r['model']:<48} ⚠️ {r['error']}")
+            continue
+        ttft = r.get("ttft_p50_ms")
+        tps = r.get("tokens_per_second")
+        print(f"{r['model']:<48} {r['latency_p50_ms']:>9.1f} {r['latency_p95_ms']:>9.1f} {r['latency_p99_ms']:>9.1f} "
+              f"{ttft if ttft is not None else float('nan'):>9.1f} {tps if tps is not None else float('nan'):>9.1f} "
+              f"{r['load_time_s']:>7.2f} {r['peak_rss_mb']:>8.0f}")
+        old = previous.get(r["model"])
+        if old and "error" not in old:
+            changes = [f"p50 {_change(old['latency_p50_ms'], r['latency_p50_ms'])}"]
+            if tps is not None and old.get("tokens_per_second"):
+                changes.append(f"tok/s {_change(old['tokens_per_second'], tps)}")
+            print(f"{'':<48} vs baseline: {', '.join(changes)}")
+
+
+def _change(old, new):
+    return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark latensi/throughput model QnA")
+    parser.add_argument("--models", nargs="+", help="alias/id model (default: semua model di registry)")
+    parser.add_argument("--tiny", action="store_true", help="pakai model mini berbobot acak (offline, CPU)")
+    parser.add_argument("--warmup", type=int, default=2, help="jumlah pertanyaan pemanasan")
+    parser.add_argument("--repeats", type=int, default=3, help="berapa kali set pertanyaan diulang")
+    parser.add_argument("--max-new-tokens", type=int, default=32)
+    parser.add_argument("--threads", type=int, help="torch.set_num_threads untuk setiap model")
+    parser.add_argument("--precision", choices=["fp32", "bf16", "int8"], help="presisi CPU (int8 = kuantisasi dinamis)")
+    parser.add_argument("--backend", choices=["torch", "onnx"], help="backend inferensi (onnx = onnxruntime di CPU)")
+    parser.add_argument("--no-isolate", action="store_true", help="jalankan semua model di proses ini")
+    parser.add_argument("--output", default="benchmark_results.json", help="file JSON hasil")
+    parser.add_argument("--baseline", help="file JSON hasil run sebelumnya untuk dibandingkan")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(
+        args.models,
+        isolate=not args.no_isolate,
+        tiny=args.tiny,
+        warmup=args.warmup,
+        repeats=args.repeats,
+        max_new_tokens=args.max_new_tokens,
+        threads=args.threads,
+        precision=args.precision,
+        backend=args.backend,
+    )
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    print(f"\n💾 Hasil disimpan di {args.output}")
+
+
+if __name__ == "__main__":
+    main()
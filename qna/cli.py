@@ -0,0 +1,219 @@
+import argparse
+
+from .answer_cache import open_cache
+from .extractive import ExtractiveQA
+from .generation import answer_question, answer_with_retrieval, generate_response
+from .registry import REGISTRY, get_spec, list_models, pool, set_backend, set_memory_budget, set_precision
+from .sessions import ChatSession
+from .speculative import generate_speculative
+from .streaming import stream_response
+
+EXIT_COMMANDS = ["keluar", "exit", "quit"]
+
+
+def _print_models():
+    for model_id in list_models():
+        spec = REGISTRY[model_id]
+        print(f"  {spec.alias or '-':<22} {model_id}")
+
+
+def _print_stream(stream):
+    """Cetak jawaban token demi token, lalu waktu token pertama dan total"""
+    print("🧠 Bot: ", end="", flush=True)
+    for chunk in stream:
+        print(chunk, end="", flush=True)
+    print()
+    ttft = stream.time_to_first_token or stream.duration
+    print(f"⚡ Token pertama: {ttft:.4f} detik ({ttft * 1000:.2f} ms)")
+    print(f"⏱️ Durasi inferensi: {stream.duration:.4f} detik ({stream.new_tokens} token, "
+          f"{stream.new_tokens / stream.duration:.2f} token/detik)\n")
+
+
+def _print_passages(passages):
+    for passage in passages:
+        print(f"   📄 [{passage['score']:.3f}] {passage['id']}")
+
+
+def chat(name, context=None, stream=True, multi_turn=False, cache=None, retriever=None, top_k=3, retrieval_mode="bm25",
+         speculative=False, draft=None, generation=None):
+    """Loop tanya jawab interaktif; ketik '/model <nama>' untuk ganti model tanpa restart.
+    Dengan multi_turn=True riwayat percakapan dan KV-cache-nya dipakai ulang antar giliran,
+    dengan cache (AnswerCache) pertanyaan yang sama dijawab dari cache, dengan retriever
+    (Retriever) setiap pertanyaan dijawab dari top-k passage korpus, dan dengan speculative=True
+    model draft (`draft` atau draft_model di registry) mengusulkan token yang diverifikasi model utama.
+    `generation` menimpa parameter generate bawaan registry, mis. untuk skrip lama dengan decoding berbeda."""
+    generation = generation or {}
+    spec = get_spec(name)
+    # Jawaban dari cache ditampilkan utuh, jadi streaming hanya dipakai tanpa cache
+    stream = stream and cache is None
+    session = ChatSession(spec.model_id) if multi_turn else None
+
+    print(f"\n🤖 Halo! Saya adalah asisten AI berbasis {spec.model_id}.")
+    if retriever is not None:
+        print(f"Jawaban dicari dari {len(retriever)} passage di index.")
+    elif spec.task == "question-answering":
+        print("Silakan ajukan pertanyaan berdasarkan konteks di bawah ini:")
+        print("\n📜 Konteks:\n", context)
+    print("Silakan ajukan pertanyaan (ketik 'keluar' untuk berhenti, '/model' untuk daftar model, '/pool' untuk memori).\n")
+
+    while True:
+        user_input = input("🧑 Anda: ")
+        if user_input.lower() in EXIT_COMMANDS:
+            print("👋 Sampai jumpa!")
+            break
+
+        if user_input.strip() == "/pool":
+            pool.print_stats()
+            continue
+
+        if user_input.startswith("/model"):
+            parts = user_input.split(maxsplit=1)
+            if len(parts) == 1:
+                _print_models()
+                continue
+            try:
+                spec = get_spec(parts[1].strip())
+            except KeyError as e:
+                print(f"⚠️ {e.args[0]}")
+                continue
+            print(f"🔁 Beralih ke {spec.model_id}\n")
+            if multi_turn:
+                session = ChatSession(spec.model_id)
+            continue
+
+        if user_input.strip() == "/reset" and session is not None:
+            session.reset()
+            print("🧹 Riwayat percakapan dihapus\n")
+            continue
+
+        if retriever is not None:
+            jawaban, waktu, passages = answer_with_retrieval(
+                spec.model_id, user_input, retriever, top_k=top_k, mode=retrieval_mode, cache=cache, **generation
+            )
+            if isinstance(jawaban, dict):
+                print(f"🧠 Bot: Jawaban: '{jawaban['answer']}' (Skor keyakinan: {jawaban['score']:.4f})")
+            else:
+                print(f"🧠 Bot: {jawaban or 'Jawaban tidak ditemukan'}")
+            _print_passages(passages)
+        elif spec.task == "question-answering":
+            if not context:
+                print("⚠️ Model ekstraktif membutuhkan konteks (gunakan --context).")
+                continue
+            hasil, waktu = answer_question(spec.model_id, user_input, context, cache=cache)
+            print(f"🧠 Bot: Jawaban: '{hasil['answer']}' (Skor keyakinan: {hasil['score']:.4f})")
+        elif speculative and (draft or spec.draft_model):
+            jawaban, waktu, info = generate_speculative(spec.model_id, user_input, draft=draft, **generation)
+            print(f"🧠 Bot: {jawaban}")
+            print(f"🎯 Token draft diterima {info['accepted']}/{info['drafted']} ({info['acceptance_rate']:.0%}), "
+                  f"{info['tokens_per_forward']:.2f} token per forward")
+        elif session is not None:
+            jawaban, waktu, info = session.ask(user_input, **generation)
+            print(f"🧠 Bot: {jawaban}")
+            print(f"♻️ Prefill {info['prefill_tokens']} token baru ({info['reused_tokens']} token dari cache)")
+        elif stream:
+            _print_stream(stream_response(spec.model_id, user_input, **generation))
+            continue
+        else:
+            jawaban, waktu = generate_response(spec.model_id, user_input, cache=cache, **generation)
+            print(f"🧠 Bot: {jawaban}")
+        print(f"⏱️ Durasi inferensi: {waktu:.4f} detik ({waktu * 1000:.2f} ms)\n")
+
+
+def answer_questions(name, context, questions):
+    """Jawab banyak pertanyaan terhadap satu konteks dalam forward pass batch (model ekstraktif)"""
+    engine = ExtractiveQA.from_registry(name)
+    results, info = engine.answer_many(questions, context)
+    for pertanyaan, jawaban in zip(questions, results):
+        if jawaban:
+            print(f"❓ {pertanyaan}\n🧠 Jawaban: '{jawaban[0]['answer']}' (Skor keyakinan: {jawaban[0]['score']:.4f})\n")
+        else:
+            print(f"❓ {pertanyaan}\n🧠 Jawaban tidak ditemukan\n")
+    print(f"⏱️ {len(questions)} pertanyaan, {info['windows']} window dalam {info['duration']:.2f} detik")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tanya jawab interaktif dengan model dari registry")
+    parser.add_argument("--model", default="qwen2.5-0.5b", help="id Hugging Face atau alias model")
+    parser.add_argument("--context", help="file teks konteks untuk model QA ekstraktif")
+    parser.add_argument("--questions", help="file berisi satu pertanyaan per baris (model ekstraktif, dijawab sekaligus)")
+    parser.add_argument("--memory-budget", type=float, help="budget memori pool model dalam MB")
+    parser.add_argument("--precision", choices=["fp32", "bf16", "int8"],
+                        help="presisi inferensi di CPU (int8 = kuantisasi dinamis, di-cache ke disk)")
+    parser.add_argument("--backend", choices=["torch", "onnx"], default="torch",
+                        help="onnx = ekspor ke ONNX lalu jalankan dengan onnxruntime di CPU")
+    parser.add_argument("--threads", type=int, help="jumlah intra-op thread onnxruntime (backend onnx)")
+    parser.add_argument("--speculative", action="store_true",
+                        help="speculative decoding dengan model draft kecil (mis. qwen2.5-0.5b untuk qwen2.5-3b)")
+    parser.add_argument("--draft", help="model draft untuk --speculative (default: draft_model di registry)")
+    parser.add_argument("--compare", nargs="+", metavar="MODEL",
+                        help="bandingkan jawaban beberapa model paralel (satu proses per model)")
+    parser.add_argument("--multi-turn", action="store_true", help="percakapan multi-turn dengan KV-cache yang dipakai ulang")
+    parser.add_argument("--cache", help="cache jawaban: 'memory' atau path file SQLite")
+    parser.add_argument("--semantic-threshold", type=float,
+                        help="aktifkan cache semantik dengan ambang cosine similarity ini (mis. 0.9)")
+    parser.add_argument("--cache-sampled", action="store_true", help="cache juga jawaban hasil sampling (do_sample=True)")
+    parser.add_argument("--index", help="direktori index retrieval (lihat python -m qna.retrieval build)")
+    parser.add_argument("--top-k", type=int, default=3, help="jumlah passage yang dipakai sebagai konteks")
+    parser.add_argument("--retrieval-mode", choices=["bm25", "dense", "hybrid"], default="bm25")
+    parser.add_argument("--no-stream", action="store_true", help="tampilkan jawaban setelah generate selesai")
+    parser.add_argument("--list", action="store_true", help="tampilkan daftar model")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        _print_models()
+        return
+
+    if args.memory_budget is not None:
+        set_memory_budget(args.memory_budget)
+    if args.precision:
+        set_precision(args.precision)
+    if args.backend != "torch":
+        set_backend(args.backend, threads=args.threads)
+
+    context = None
+    if args.context:
+        with open(args.context, encoding="utf-8") as f:
+            context = f.read()
+
+    if args.questions:
+        with open(args.questions, encoding="utf-8") as f:
+            questions = [line.strip() for line in f if line.strip()]
+        answer_questions(args.model, context or "", questions)
+        return
+
+    if args.compare:
+        from .compare import ModelComparer, interactive
+
+        with ModelComparer(args.compare) as comparer:
+            print(f"🔄 Memuat {len(args.compare)} model paralel...")
+            comparer.start()
+            interactive(comparer, context)
+        return
+
+    cache = None
+    if args.cache:
+        cache = open_cache(args.cache, cache_sampled=args.cache_sampled, semantic_threshold=args.semantic_threshold)
+
+    retriever = None
+    if args.index:
+        from .retrieval import Retriever
+
+        embed = None
+        if args.retrieval_mode != "bm25":
+            from .semantic_cache import load_embedder
+
+            embed = load_embedder()
+        retriever = Retriever(args.index, embed=embed)
+
+    chat(
+        args.model,
+        context=context,
+        stream=not args.no_stream,
+        multi_turn=args.multi_turn,
+        cache=cache,
+        retriever=retriever,
+        top_k=args.top_k,
+        retrieval_mode=args.retrieval_mode,
+        speculative=args.speculative or bool(args.draft),
+        draft=args.draft,
+    )
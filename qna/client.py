@@ -0,0 +1,108 @@
+"""Klien HTTP ringan (hanya library standar) untuk server inferensi qna.server.
+
+Dipakai aplikasi Streamlit sebagai thin client: model tidak dimuat di proses UI, cukup URL server."""
+
+import json
+import time
+import urllib.error
+import urllib.request
+
+
+class ServerBusyError(RuntimeError):
+    """Server menjawab 429 (antrian penuh); retry_after dalam detik"""
+
+    def __init__(self, message, retry_after=1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _error_message(error):
+    try:
+        return json.loads(error.read()).get("error") or str(error)
+    except ValueError:
+        return str(error)
+
+
+class ClientStream:
+    """Iterator potongan teks dari /v1/generate dengan stream=true. Atributnya sama seperti ResponseStream
+    (text, time_to_first_token, duration, new_tokens) sehingga bisa langsung dipakai di `st.write_stream`."""
+
+    def __init__(self, response, start_time):
+        self._response = response
+        self.start_time = start_time
+        self.text = ""
+        self.time_to_first_token = None
+        self.duration = None
+        self.new_tokens = 0
+        self.result = None
+
+    def __iter__(self):
+        with self._response:
+            for line in self._response:
+                if not line.strip():
+                    continue
+                event = json.loads(line)
+                if "error" in event:
+                    raise RuntimeError(event["error"])
+                if event.get("done"):
+                    self.result = event
+                    self.new_tokens = event.get("new_tokens", 0)
+                    break
+                if self.time_to_first_token is None:
+                    self.time_to_first_token = time.time() - self.start_time
+                self.text += event["text"]
+                yield event["text"]
+        self.duration = time.time() - self.start_time
+
+
+class InferenceClient:
+    """Panggil endpoint server inferensi; error HTTP diubah menjadi ServerBusyError / RuntimeError"""
+
+    def __init__(self, base_url="http://127.0.0.1:8000", timeout=120.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def _open(self, path, payload=None):
+        data = None if payload is None else json.dumps(payload).encode("utf-8")
+        request = urllib.request.Request(
+            self.base_url + path,
+            data=data,
+            headers={"Content-Type": "application/json"},
+            method="GET" if payload is None else "POST",
+        )
+        try:
+            # Timeout socket sedikit di atas timeout request agar server yang menjawab 504 lebih dulu
+            return urllib.request.urlopen(request, timeout=self.timeout + 5)
+        except urllib.error.HTTPError as e:
+            if e.code == 429:
+                raise ServerBusyError(_error_message(e), float(e.headers.get("Retry-After") or 1))
+            raise RuntimeError(f"Server error {e.code}: {_error_message(e)}")
+
+    def _request(self, path, payload=None):
+        with self._open(path, payload) as response:
+            return json.loads(response.read())
+
+    def health(self):
+        return self._request("/health")
+
+    def extractive(self, question, context, model=None, **params):
+        """Jawab dari konteks dengan model ekstraktif; hasil berisi "answers" (top-k) dan waktu proses"""
+        payload = dict(params, question=question, context=context, timeout=self.timeout)
+        if model:
+            payload["model"] = model
+        return self._request("/v1/extractive", payload)
+
+    def generate(self, question=None, context=None, model=None, prompt=None, **params):
+        """Generate jawaban (atau lanjutan `prompt` mentah), mengembalikan dict dengan "answer" """
+        payload = dict(params, question=question, context=context, prompt=prompt, timeout=self.timeout)
+        if model:
+            payload["model"] = model
+        return self._request("/v1/generate", payload)
+
+    def stream(self, question=None, context=None, model=None, prompt=None, **params):
+        """Seperti generate tetapi mengembalikan ClientStream yang menghasilkan teks bertahap"""
+        start_time = time.time()
+        payload = dict(params, question=question, context=context, prompt=prompt, stream=True, timeout=self.timeout)
+        if model:
+            payload["model"] = model
+        return ClientStream(self._open("/v1/generate", payload), start_time)
@@ -0,0 +1,227 @@
+"""Mode bandingkan jawaban: satu pertanyaan (atau file JSONL) dikirim ke beberapa model sekaligus.
+
+Setiap model berjalan di proses worker sendiri yang tetap hidup (model dimuat sekali), dengan jumlah thread
+torch dibatasi dan, di Linux, dipasang ke core yang berbeda agar worker tidak berebut CPU. Pertanyaan dikirim
+ke semua worker bersamaan, jadi waktu satu perbandingan = latensi model paling lambat, bukan jumlahnya.
+
+    python -m qna.compare --models qwen2.5-0.5b qwen2.5-1.5b qwen2.5-3b llama3.2-1b llama3.2-3b
+    python -m qna.compare --models qwen2.5-0.5b llama3.2-1b --input pertanyaan.jsonl --output banding.jsonl"""
+
+import argparse
+import json
+import os
+import time
+
+from .registry import get_spec
+
+# State proses worker: satu model per proses
+_worker = {}
+
+
+def _init_worker(name, threads, cores, tiny):
+    import torch
+
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+
+    start_time = time.time()
+    if tiny:
+        from .benchmark import CONTEXT, PROMPTS
+        from .tiny_models import load_tiny
+
+        lm = load_tiny(get_spec(name).model_id, extra_text=" ".join(PROMPTS) + " " + CONTEXT)
+    else:
+        from .registry import load_model
+
+        lm = load_model(name)
+    _worker["lm"] = lm
+    _worker["load_time"] = time.time() - start_time
+
+
+def _ready():
+    return _worker["load_time"]
+
+
+def _answer(question, context, overrides):
+    """Jawab satu pertanyaan dengan model di worker ini"""
+    import torch
+
+    lm = _worker["lm"]
+    start_time = time.perf_counter()
+    if lm.spec.task == "question-answering":
+        from .extractive import ExtractiveQA
+
+        answers, _ = ExtractiveQA(lm.model, lm.tokenizer).answer(question, context or "")
+        result = {"answer": answers[0]["answer"] if answers else "", "score": answers[0]["score"] if answers else 0.0}
+    else:
+        prompt = lm.spec.build_prompt(lm.tokenizer, question, context)
+        inputs = lm.tokenizer(prompt, return_tensors="pt").to(lm.device)
+        kwargs = lm.generation_kwargs(**overrides)
+        if not kwargs.get("do_sample"):
+            for key in ("temperature", "top_p", "top_k"):
+                kwargs.pop(key, None)
+        with torch.no_grad():
+            outputs = lm.model.generate(**inputs, **lm.prefill_kwargs(inputs["input_ids"]), **kwargs)
+        prompt_length = inputs["input_ids"].shape[-1]
+        result = {
+            "answer": lm.spec.extract_answer(lm.tokenizer, outputs[0], prompt_length, lm.stop_rules(overrides)),
+            "new_tokens": outputs.shape[-1] - prompt_length,
+        }
+    result["latency"] = time.perf_counter() - start_time
+    return result
+
+
+def core_plan(workers, threads=None):
+    """Jumlah thread per worker dan core yang dipakai setiap worker (None jika affinity tidak tersedia/cukup)"""
+    if hasattr(os, "sched_getaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+    else:
+        cores = list(range(os.cpu_count() or 1))
+    threads = threads or max(1, len(cores) // workers)
+    if threads * workers > len(cores):
+        return threads, [None] * workers
+    return threads, [set(cores[i * threads:(i + 1) * threads]) for i in range(workers)]
+
+
+class ModelComparer:
+    """Kirim pertanyaan yang sama ke beberapa model paralel, satu proses worker per model"""
+
+    def __init__(self, names, threads=None, tiny=False, **overrides):
+        from concurrent.futures import ProcessPoolExecutor
+
+        from .startup import worker_context
+
+        self.model_ids = [get_spec(name).model_id for name in names]
+        self.overrides = overrides
+        self.threads, cores = core_plan(len(self.model_ids), threads)
+        # Worker di-fork dari proses yang sudah mengimpor torch/transformers: start hanya memuat bobot
+        context = worker_context()
+        self._executors = [
+            ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(model_id, self.threads, worker_cores, tiny),
+            )
+            for model_id, worker_cores in zip(self.model_ids, cores)
+        ]
+
+    def start(self):
+        """Muat semua model paralel, mengembalikan {model_id: waktu muat atau pesan error}"""
+        futures = [executor.submit(_ready) for executor in self._executors]
+        return dict(zip(self.model_ids, (self._result(future) for future in futures)))
+
+    @staticmethod
+    def _result(future):
+        try:
+            return future.result()
+        except Exception as e:
+            return {"error": f"{type(e).__name__}: {e}"}
+
+    def ask(self, question, context=None, **overrides):
+        """Tanya semua model sekaligus, mengembalikan ({model_id: hasil}, waktu wall-clock)"""
+        overrides = dict(self.overrides, **overrides)
+        start_time = time.perf_counter()
+        futures = [executor.submit(_answer, question, context, overrides) for executor in self._executors]
+        results = dict(zip(self.model_ids, (self._result(future) for future in futures)))
+        return results, time.perf_counter() - start_time
+
+    def close(self):
+        for executor in self._executors:
+            executor.shutdown(cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def print_comparison(results, wall_time):
+    for model_id, result in results.items():
+        if "error" in result:
+            print(f"🤖 {model_id}\n   ⚠️ {result['error']}")
+            continue
+        print(f"🤖 {model_id} ({result['latency']:.2f} detik)\n   {result['answer'] or '(jawaban kosong)'}")
+    total = sum(r["latency"] for r in results.values() if "error" not in r)
+    print(f"⏱️ Wall-clock {wall_time:.2f} detik (jika berurutan: {total:.2f} detik)\n")
+
+
+def interactive(comparer, context=None):
+    """Loop terminal: setiap pertanyaan dijawab semua model lalu ditampilkan berdampingan"""
+    from .cli import EXIT_COMMANDS
+
+    print(f"\n⚖️ Membandingkan {len(comparer.model_ids)} model ({comparer.threads} thread per model).")
+    print("Silakan ajukan pertanyaan (ketik 'keluar' untuk berhenti).\n")
+    while True:
+        question = input("🧑 Anda: ")
+        if question.lower() in EXIT_COMMANDS:
+            print("👋 Sampai jumpa!")
+            break
+        if question.strip():
+            print_comparison(*comparer.ask(question, context))
+
+
+def compare_file(comparer, input_path, output_path):
+    """Bandingkan semua pertanyaan di JSONL; setiap baris output berisi jawaban semua model untuk satu item"""
+    from .batch_runner import read_items
+
+    count, wall_total, sequential_total = 0, 0.0, 0.0
+    with open(output_path, "w", encoding="utf-8") as f:
+        for item in read_items(input_path):
+            results, wall_time = comparer.ask(item["question"], item.get("context"))
+            f.write(json.dumps(
+                {"id": item["id"], "question": item["question"], "answers": results, "wall_time": wall_time},
+                ensure_ascii=False,
+            ) + "\n")
+            f.flush()
+            count += 1
+            wall_total += wall_time
+            sequential_total += sum(r["latency"] for r in results.values() if "error" not in r)
+    return {"items": count, "wall_time": wall_total, "sequential_time": sequential_total}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bandingkan jawaban beberapa model secara paralel")
+    parser.add_argument("--models", nargs="+", required=True, help="alias/id model yang dibandingkan")
+    parser.add_argument("--context", help="file teks konteks (wajib untuk model QA ekstraktif)")
+    parser.add_argument("--input", help='JSONL {"id", "question", "context"}; tanpa ini mode interaktif')
+    parser.add_argument("--output", default="compare_results.jsonl", help="JSONL hasil untuk --input")
+    parser.add_argument("--threads", type=int, help="thread torch per model (default: core dibagi rata)")
+    parser.add_argument("--max-new-tokens", type=int)
+    parser.add_argument("--greedy", action="store_true", help="decoding greedy agar jawaban bisa diulang")
+    parser.add_argument("--tiny", action="store_true", help="pakai model mini berbobot acak (offline, CPU)")
+    args = parser.parse_args(argv)
+
+    overrides = {}
+    if args.max_new_tokens is not None:
+        overrides["max_new_tokens"] = args.max_new_tokens
+    if args.greedy:
+        overrides["do_sample"] = False
+
+    context = None
+    if args.context:
+        with open(args.context, encoding="utf-8") as f:
+            context = f.read()
+
+    with ModelComparer(args.models, threads=args.threads, tiny=args.tiny, **overrides) as comparer:
+        print(f"🔄 Memuat {len(args.models)} model paralel...")
+        for model_id, load_time in comparer.start().items():
+            if isinstance(load_time, dict):
+                print(f"⚠️ {model_id}: {load_time['error']}")
+            else:
+                print(f"✅ {model_id} dimuat dalam {load_time:.2f} detik")
+
+        if not args.input:
+            interactive(comparer, context)
+            return
+        summary = compare_file(comparer, args.input, args.output)
+        print(f"✅ {summary['items']} pertanyaan dalam {summary['wall_time']:.2f} detik "
+              f"(jika berurutan: {summary['sequential_time']:.2f} detik)")
+        print(f"💾 Hasil disimpan di {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""Evaluasi kualitas vs kecepatan untuk QA Bahasa Indonesia.
+
+Jawaban (ekstraktif maupun generatif) dinilai terhadap referensi dengan exact match dan F1 token gaya
+SQuAD, setelah normalisasi Bahasa Indonesia. Setiap kombinasi (model, dtype, kuantisasi) dijalankan di
+proses worker terpisah sehingga latensi dan memori tercatat per konfigurasi, lalu konfigurasi yang
+tidak kalah di semua sumbu (F1, latensi, memori) ditandai sebagai Pareto frontier.
+
+    python -m qna.evaluation --data dev.jsonl --models indobert qwen2.5-0.5b --dtypes float32 bfloat16
+    python -m qna.evaluation --tiny --quantization none int8"""
+
+import argparse
+import dataclasses
+import json
+import os
+import string
+import time
+import unicodedata
+from collections import Counter
+
+from .benchmark import peak_rss_bytes, percentile
+from .pool import model_memory_bytes
+from .registry import get_spec
+
+# Kata yang tidak mengubah isi jawaban (padanan "a/an/the" di normalisasi SQuAD)
+_FILLER_WORDS = {"si", "sang", "sri", "para", "kaum", "yang", "adalah", "ialah", "merupakan", "yaitu", "yakni"}
+_PARTICLES = ("lah", "kah", "pun")
+
+# Set contoh kecil untuk uji cepat (dipakai jika --data tidak diberikan)
+SAMPLE_SET = [
+    {"id": "s1", "question": "Apa ibu kota Indonesia?", "answers": ["Jakarta"]},
+    {"id": "s2", "question": "Siapa presiden pertama Indonesia?", "answers": ["Soekarno", "Ir. Soekarno"]},
+    {"id": "s3", "question": "Kapan proklamasi kemerdekaan Indonesia dibacakan?", "answers": ["17 Agustus 1945"]},
+    {"id": "s4", "question": "Apa bahasa resmi negara Indonesia?", "answers": ["bahasa Indonesia"]},
+    {"id": "s5", "question": "Siapa yang membacakan proklamasi bersama Soekarno?", "answers": ["Mohammad Hatta", "Hatta"]},
+]
+
+
+def normalize_answer(text):
+    """Normalisasi jawaban: huruf kecil, tanpa tanda baca, tanpa kata pengisi dan partikel (-lah/-kah/-pun)"""
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = "".join(" " if ch in string.punctuation else ch for ch in text)
+    words = []
+    for word in text.split():
+        for particle in _PARTICLES:
+            if word.endswith(particle) and len(word) - len(particle) >= 4:
+                word = word[:-len(particle)]
+                break
+        if word not in _FILLER_WORDS and word not in _PARTICLES:
+            words.append(word)
+    return " ".join(words)
+
+
+def exact_match(prediction, reference):
+    return float(normalize_answer(prediction) == normalize_answer(reference))
+
+
+def f1_score(prediction, reference):
+    """F1 token antara jawaban dan referensi (keduanya dinormalisasi)"""
+    prediction_tokens = normalize_answer(prediction).split()
+    reference_tokens = normalize_answer(reference).split()
+    if not prediction_tokens or not reference_tokens:
+        return float(prediction_tokens == reference_tokens)
+    common = Counter(prediction_tokens) & Counter(reference_tokens)
+    overlap = sum(common.values())
+    if overlap == 0:
+        return 0.0
+    precision = overlap / len(prediction_tokens)
+    recall = overlap / len(reference_tokens)
+    return 2 * precision * recall / (precision + recall)
+
+
+def score(prediction, references):
+    """EM dan F1 terbaik terhadap semua referensi"""
+    return (
+        max(exact_match(prediction, r) for r in references),
+        max(f1_score(prediction, r) for r in references),
+    )
+
+
+def read_dataset(path):
+    """Baca JSONL {"id", "question", "context", "answers" | "answer"}"""
+    items = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            answers = item.get("answers") or [item["answer"]]
+            # Format SQuAD: {"answers": {"text": [...], "answer_start": [...]}}
+            if isinstance(answers, dict):
+                answers = answers["text"]
+            items.append({
+                "id": str(item.get("id", f"line-{line_number}")),
+                "question": item["question"],
+                "context": item.get("context") or "",
+                "answers": [str(a) for a in answers],
+            })
+    return items
+
+
+def _load_for_config(config):
+    from .quantization import load_with_precision, quantize_dynamic_int8
+    from .registry import resolve_dtype
+
+    spec = get_spec(config["model"])
+    quantization = config.get("quantization") or "none"
+    if quantization not in ("none", "int8"):
+        raise ValueError(f"Kuantisasi tidak dikenal: '{quantization}'")
+
+    if config.get("tiny"):
+        from .benchmark import CONTEXT
+        from .tiny_models import load_tiny
+
+        lm = load_tiny(spec.model_id, extra_text=CONTEXT)
+        if config.get("dtype") not in (None, "auto"):
+            lm.model.to(resolve_dtype(config["dtype"]))
+        if quantization == "int8":
+            lm.model = quantize_dynamic_int8(lm.model)
+        return lm
+
+    if quantization == "int8":
+        # Model int8 selalu di CPU dan diambil dari cache disk jika sudah pernah dikuantisasi
+        return load_with_precision(spec, "int8")
+
+    from .registry import _load_pretrained
+
+    if config.get("dtype"):
+        spec = dataclasses.replace(spec, dtype=config["dtype"])
+    return _load_pretrained(spec)
+
+
+def _predict_generative(lm, item, max_new_tokens):
+    import torch
+
+    prompt = lm.spec.build_prompt(lm.tokenizer, item["question"], item["context"] or None)
+    inputs = lm.tokenizer(prompt, return_tensors="pt").to(lm.device)
+    kwargs = lm.generation_kwargs(do_sample=False, max_new_tokens=max_new_tokens)
+    for key in ("temperature", "top_p", "top_k"):
+        kwargs.pop(key, None)
+    with torch.no_grad():
+        outputs = lm.model.generate(**inputs, **kwargs)
+    # Nilai hanya teks yang dihasilkan: ekstraksi "full" (mis. Qwen) ikut mengembalikan prompt
+    answer = lm.tokenizer.decode(outputs[0][inputs["input_ids"].shape[-1]:], skip_special_tokens=True)
+    rules = lm.stop_rules({})
+    return rules.trim(answer) if rules else answer.strip()
+
+
+def evaluate_config(config, items):
+    """Jalankan satu konfigurasi terhadap semua item, mengembalikan (ringkasan, prediksi per item)"""
+    import torch
+
+    if config.get("threads"):
+        torch.set_num_threads(config["threads"])
+
+    start_time = time.time()
+    lm = _load_for_config(config)
+    load_time = time.time() - start_time
+
+    if lm.spec.task == "question-answering":
+        from .extractive import ExtractiveQA
+
+        engine = ExtractiveQA(lm.model, lm.tokenizer)
+
+        def predict(item):
+            answers, _ = engine.answer(item["question"], item["context"])
+            return answers[0]["answer"] if answers else ""
+    else:
+        def predict(item):
+            return _predict_generative(lm, item, config.get("max_new_tokens", 64))
+
+    predictions = []
+    for item in items:
+        begin = time.perf_counter()
+        prediction = predict(item)
+        latency = time.perf_counter() - begin
+        em, f1 = score(prediction, item["answers"])
+        predictions.append({"id": item["id"], "prediction": prediction, "em": em, "f1": f1, "latency": latency})
+
+    latencies = [p["latency"] for p in predictions]
+    summary = dict(
+        config,
+        model=lm.spec.model_id,
+        items=len(items),
+        exact_match=100 * sum(p["em"] for p in predictions) / len(items),
+        f1=100 * sum(p["f1"] for p in predictions) / len(items),
+        latency_p50_ms=percentile(latencies, 50) * 1000,
+        latency_p95_ms=percentile(latencies, 95) * 1000,
+        load_time_s=load_time,
+        model_mb=model_memory_bytes(lm.model) / 1024 ** 2,
+        peak_rss_mb=peak_rss_bytes() / 1024 ** 2,
+    )
+    return summary, predictions
+
+
+def pareto_front(results, keys=(("f1", max), ("latency_p50_ms", min), ("peak_rss_mb", min))):
+    """Indeks hasil yang tidak didominasi: tidak ada hasil lain yang sama baik di semua sumbu
+    dan lebih baik di salah satunya"""
+    def at_least_as_good(a, b):
+        return all((a[k] >= b[k]) if best is max else (a[k] <= b[k]) for k, best in keys)
+
+    front = []
+    for i, a in enumerate(results):
+        dominated = any(
+            j != i and at_least_as_good(b, a) and any(b[k] != a[k] for k, _ in keys)
+            for j, b in enumerate(results)
+        )
+        if not dominated:
+            front.append(i)
+    return front
+
+
+def run_evaluation(configs, items, workers=None):
+    """Evaluasi banyak konfigurasi paralel di process pool; setiap konfigurasi memakai proses baru"""
+    from concurrent.futures import ProcessPoolExecutor
+
+    from .startup import worker_context
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(configs)))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    configs = [dict(config, threads=config.get("threads") or threads) for config in configs]
+
+    results = [None] * len(configs)
+    predictions = {}
+    context = worker_context()
+    # max_tasks_per_child=1: setiap konfigurasi diukur di proses yang bersih (RSS puncak tidak tercampur)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, max_tasks_per_child=1) as executor:
+        futures = {executor.submit(evaluate_config, config, items): index for index, config in enumerate(configs)}
+        for future, index in futures.items():
+            try:
+                results[index], predictions[index] = future.result()
+            except Exception as e:
+                results[index] = dict(configs[index], error=f"{type(e).__name__}: {e}")
+            print(f"✅ {_label(configs[index])} selesai", flush=True)
+
+    valid = [r for r in results if "error" not in r]
+    for index in pareto_front(valid):
+        valid[index]["pareto"] = True
+    return results, predictions
+
+
+def _label(config):
+    return f"{config['model']} [{config.get('dtype') or 'default'}, {config.get('quantization') or 'none'}]"
+
+
+def print_report(results):
+    print(f"\n{'konfigurasi':<62} {'EM':>6} {'F1':>6} {'p50 ms':>9} {'p95 ms':>9} {'rss MB':>8}")
+    for r in sorted(results, key=lambda r: -r.get("f1", -1)):
+        if "error" in r:
+            print(f"{_label(r):<62} ⚠️ {r['error']}")
+            continue
+        marker = " ⭐" if r.get("pareto") else ""
+        print(f"{_label(r):<62} {r['exact_match']:>6.1f} {r['f1']:>6.1f} {r['latency_p50_ms']:>9.1f} "
+              f"{r['latency_p95_ms']:>9.1f} {r['peak_rss_mb']:>8.0f}{marker}")
+    print("\n⭐ = Pareto frontier (tidak ada konfigurasi lain yang lebih baik di F1, latensi, dan memori sekaligus)")
+
+
+def main(argv=None):
+    from .benchmark import CONTEXT
+
+    parser = argparse.ArgumentParser(description="Evaluasi EM/F1 vs latensi/memori untuk QA Bahasa Indonesia")
+    parser.add_argument("--data", help='JSONL {"question", "context", "answers"} (default: set contoh kecil)')
+    parser.add_argument("--models", nargs="+", default=["indobert", "qwen2.5-0.5b"])
+    parser.add_argument("--dtypes", nargs="+", default=[None], help="mis. float32 bfloat16 (default: dtype bawaan model)")
+    parser.add_argument("--quantization", nargs="+", default=["none"], choices=["none", "int8"])
+    parser.add_argument("--max-new-tokens", type=int, default=64)
+    parser.add_argument("--limit", type=int, help="hanya evaluasi N item pertama")
+    parser.add_argument("--workers", type=int, help="jumlah proses paralel (default: jumlah CPU)")
+    parser.add_argument("--tiny", action="store_true", help="pakai model mini berbobot acak (offline, CPU)")
+    parser.add_argument("--output", default="evaluation_results.json")
+    args = parser.parse_args(argv)
+
+    if args.data:
+        items = read_dataset(args.data)
+    else:
+        items = [dict(item, context=CONTEXT) for item in SAMPLE_SET]
+    items = items[:args.limit] if args.limit else items
+
+    configs = [
+        {
+            "model": get_spec(name).model_id,
+            "dtype": dtype,
+            "quantization": quantization,
+            "max_new_tokens": args.max_new_tokens,
+            "tiny": args.tiny,
+        }
+        for name in args.models
+        for dtype in args.dtypes
+        for quantization in args.quantization
+    ]
+    results, predictions = run_evaluation(configs, items, workers=args.workers)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({
+            "items": len(items),
+            "results": results,
+            "predictions": {_label(configs[i]): p for i, p in predictions.items()},
+        }, f, indent=2, ensure_ascii=False)
+    print_report(results)
+    print(f"\n💾 Hasil disimpan di {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,470 @@
+"""Executor inferensi bersama di dalam proses untuk aplikasi Streamlit dengan banyak sesi.
+
+Semua sesi mengirim pekerjaan ke satu antrian FIFO; sejumlah worker tetap (`workers`) mengambil request
+tertua beserta request lain yang kompatibel (model dan parameter sama) lalu menjalankannya sebagai satu batch:
+QA ekstraktif menggabungkan window semua pertanyaan dalam forward pass yang sama, generate memakai satu
+panggilan `generate` ber-left-padding dengan streaming per baris. Jumlah thread torch dibagi rata antar worker
+sehingga request bersamaan tidak saling berebut core. Posisi antrian setiap request bisa dibaca untuk UI.
+
+    python -m qna.executor --model gpt2-indo --users 20 --workers 2 --max-batch-size 8"""
+
+import argparse
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+
+def _freeze(value):
+    """Nilai parameter yang bisa dipakai sebagai bagian kunci batch"""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return ("id", id(value))
+
+
+class ExecutorJob:
+    """Handle satu request di executor: posisi antrian, status, dan hasil (Future)"""
+
+    def __init__(self, executor, kind, key, payload):
+        self._executor = executor
+        self.kind = kind
+        self.key = key
+        self.payload = payload
+        self.future = Future()
+        self.started = threading.Event()
+        self.cancelled = threading.Event()
+        self.enqueued_at = time.time()
+        self.started_at = None
+        self.batch_size = None
+
+    @property
+    def queue_time(self):
+        return (self.started_at or time.time()) - self.enqueued_at
+
+    def position(self):
+        """Posisi di antrian (1 = berikutnya), 0 jika sudah diproses"""
+        return self._executor.position(self)
+
+    def done(self):
+        return self.future.done()
+
+    def cancel(self):
+        """Batalkan request: yang masih di antrian dilewati, yang sedang berjalan berhenti di token berikutnya"""
+        if self.future.done():
+            return
+        self.cancelled.set()
+        self._executor._cancel(self)
+
+    def _abort(self):
+        # Tutup request yang dibatalkan sebelum dijalankan
+        self.future.cancel()
+
+    def result(self, timeout=None):
+        return self.future.result(timeout)
+
+    def _start(self, batch_size):
+        self.started_at = time.time()
+        self.batch_size = batch_size
+        self.started.set()
+
+
+class QueuedStream(ExecutorJob):
+    """Request generate yang hasilnya di-stream. Atributnya sama seperti ResponseStream (text,
+    time_to_first_token, duration, new_tokens) sehingga bisa langsung dipakai di `st.write_stream`."""
+
+    def __init__(self, executor, key, payload):
+        super().__init__(executor, "generate", key, payload)
+        self.text = ""
+        self.time_to_first_token = None
+        self.duration = None
+        self.new_tokens = 0
+        self._chunks = queue.Queue()
+
+    def __iter__(self):
+        finished = False
+        try:
+            while True:
+                chunk = self._chunks.get()
+                if chunk is None:
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+                if self.time_to_first_token is None:
+                    self.time_to_first_token = time.time() - self.enqueued_at
+                self.text += chunk
+                yield chunk
+            finished = True
+        finally:
+            # Iterator ditutup/dibuang sebelum selesai (mis. sesi ditinggalkan): batalkan request
+            if not finished:
+                self.cancel()
+        self.duration = time.time() - self.enqueued_at
+        self.future.result()
+
+    def _abort(self):
+        super()._abort()
+        self._chunks.put(None)
+
+
+def _row_criteria(prompt_length, budgets):
+    """StoppingCriteria per baris: baris berhenti setelah max_new_tokens miliknya sendiri"""
+    import torch
+    from transformers import StoppingCriteria, StoppingCriteriaList
+
+    class _RowBudget(StoppingCriteria):
+        def __init__(self):
+            self.budgets = torch.tensor(budgets)
+
+        def __call__(self, input_ids, scores, **kwargs):
+            new_tokens = input_ids.shape[-1] - prompt_length
+            return new_tokens >= self.budgets.to(input_ids.device)
+
+    return StoppingCriteriaList([_RowBudget()])
+
+
+def _row_cancel_criteria(jobs):
+    """StoppingCriteria per baris: baris berhenti begitu request pemiliknya dibatalkan"""
+    import torch
+    from transformers import StoppingCriteria, StoppingCriteriaList
+
+    class _RowCancelled(StoppingCriteria):
+        def __call__(self, input_ids, scores, **kwargs):
+            cancelled = [job.cancelled.is_set() for job in jobs]
+            return torch.tensor(cancelled, dtype=torch.bool, device=input_ids.device)
+
+    return StoppingCriteriaList([_RowCancelled()])
+
+
+def _batch_streamer(tokenizer, jobs, budgets, eos, rules):
+    """Streamer generate untuk batch: token setiap baris didekode bertahap dan dikirim ke stream pemiliknya.
+    Baris ditutup saat EOS, max_new_tokens, StopRules terpenuhi, atau request dibatalkan. Dengan StopRules
+    hanya teks sampai batas `StopRules.trim` yang dikirim (ekor yang mungkin awal stop string ditahan)."""
+    from transformers.generation.streamers import BaseStreamer
+
+    from .stopping import TextStop
+
+    class _BatchStreamer(BaseStreamer):
+        def __init__(self):
+            self.tokens = [[] for _ in jobs]
+            self.texts = [""] * len(jobs)
+            self.finished = [False] * len(jobs)
+            self.stops = [TextStop(tokenizer, rules) if rules else None for _ in jobs]
+            self.prompt_seen = False
+
+        def _emit(self, row, visible):
+            if len(visible) > len(self.texts[row]):
+                jobs[row]._chunks.put(visible[len(self.texts[row]):])
+                self.texts[row] = visible
+
+        def put(self, value):
+            if not self.prompt_seen:
+                # Panggilan pertama berisi token prompt
+                self.prompt_seen = True
+                return
+            for row, token in enumerate(value.reshape(len(jobs), -1)[:, -1].tolist()):
+                if self.finished[row]:
+                    continue
+                if jobs[row].cancelled.is_set():
+                    self.finish(row)
+                    continue
+                self.tokens[row].append(token)
+                done = token in eos or len(self.tokens[row]) >= budgets[row]
+                if self.stops[row] is not None and self.stops[row].extend([token]):
+                    done = True
+                if done:
+                    self.finish(row)
+                    continue
+                # Dekode ulang semua token baris agar karakter multi-byte tidak terpotong
+                text = tokenizer.decode(self.tokens[row], skip_special_tokens=True)
+                if not text.endswith("�"):
+                    self._emit(row, rules.safe_prefix(text) if rules else text)
+
+        def finish(self, row):
+            # Baris yang selesai langsung ditutup, tidak menunggu baris terpanjang di batch
+            if self.finished[row]:
+                return
+            self.finished[row] = True
+            job = jobs[row]
+            if not job.cancelled.is_set():
+                text = tokenizer.decode(self.tokens[row], skip_special_tokens=True)
+                self._emit(row, rules.trim(text) if rules else text)
+            job.new_tokens = len(self.tokens[row])
+            job._chunks.put(None)
+            if not job.future.done():
+                job.future.set_result({"new_tokens": job.new_tokens, "queue_time": job.queue_time, "batch_size": len(jobs)})
+
+        def end(self):
+            for row in range(len(jobs)):
+                self.finish(row)
+
+    return _BatchStreamer()
+
+
+def _run_generate(jobs):
+    """Satu panggilan generate untuk semua request di batch (prompt di-left-pad secara manual agar
+    tokenizer bersama tidak perlu diubah)"""
+    import torch
+
+    from .batching import pad_left
+    from .sampling import eos_ids
+    from .stopping import add_criteria, stopping_criteria
+
+    model, tokenizer = jobs[0].payload["model"], jobs[0].payload["tokenizer"]
+    kwargs = dict(jobs[0].payload["kwargs"])
+    rules = jobs[0].payload["stop_rules"]
+    budgets = [job.payload["max_new_tokens"] for job in jobs]
+    pad_token_id = kwargs.get("pad_token_id")
+    if pad_token_id is None:
+        pad_token_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id
+    kwargs["pad_token_id"] = pad_token_id
+
+    input_ids, attention_mask = pad_left([tokenizer(job.payload["prompt"])["input_ids"] for job in jobs], pad_token_id)
+    length = input_ids.shape[-1]
+
+    eos = eos_ids(kwargs.get("eos_token_id", tokenizer.eos_token_id))
+    streamer = _batch_streamer(tokenizer, jobs, budgets, eos, rules)
+    add_criteria(kwargs, _row_criteria(length, budgets), _row_cancel_criteria(jobs), stopping_criteria(tokenizer, rules))
+    with torch.no_grad():
+        model.generate(
+            input_ids=input_ids.to(model.device),
+            attention_mask=attention_mask.to(model.device),
+            max_new_tokens=max(budgets),
+            streamer=streamer,
+            **kwargs,
+        )
+
+
+def _run_extractive(jobs):
+    """Semua pasangan (pertanyaan, konteks) di batch dijawab dengan satu rangkaian forward pass"""
+    from .extractive import ExtractiveQA
+
+    payload = jobs[0].payload
+    engine = ExtractiveQA(payload["model"], payload["tokenizer"], stride=payload["stride"], batch_size=payload["batch_size"])
+    pairs = [(job.payload["question"], job.payload["context"]) for job in jobs]
+    results, window_counts, info = engine.answer_pairs(pairs, top_k=payload["top_k"], max_answer_len=payload["max_answer_len"])
+    for job, answers, windows in zip(jobs, results, window_counts):
+        if job.future.done():
+            continue
+        job.future.set_result((answers, {
+            "windows": windows,
+            "duration": time.time() - job.enqueued_at,
+            "queue_time": job.queue_time,
+            "batch_windows": info["windows"],
+            "batch_size": len(jobs),
+        }))
+
+
+_RUNNERS = {"generate": _run_generate, "extractive": _run_extractive}
+
+
+class InferenceExecutor:
+    """Antrian FIFO bersama + worker tetap yang menjalankan request kompatibel sebagai batch.
+
+    Dibuat sekali per proses (mis. lewat `st.cache_resource`) dan dipakai semua sesi."""
+
+    def __init__(self, workers=1, max_batch_size=8, max_wait_ms=10, threads_per_worker=None):
+        self.workers = workers
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+        self.stats = {"requests": 0, "batches": 0, "batched_requests": 0, "failed": 0, "cancelled": 0}
+        self._pending = deque()
+        self._running = set()
+        self._condition = threading.Condition()
+        self._closed = False
+
+        import torch
+
+        # Thread intra-op torch berlaku untuk seluruh proses; dibagi rata agar worker tidak oversubscribe core
+        torch.set_num_threads(self.threads_per_worker)
+        self._threads = [
+            threading.Thread(target=self._run, name=f"inference-executor-{i}", daemon=True) for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _submit(self, job):
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("InferenceExecutor sudah dihentikan")
+            self._pending.append(job)
+            self.stats["requests"] += 1
+            self._condition.notify()
+        return job
+
+    def submit_extractive(self, model, tokenizer, question, context, top_k=1, max_answer_len=None, stride=128,
+                          batch_size=16):
+        """Masukkan pertanyaan QA ekstraktif ke antrian; `job.result()` berisi (top-k jawaban, info)"""
+        payload = {
+            "model": model,
+            "tokenizer": tokenizer,
+            "question": question,
+            "context": context,
+            "top_k": top_k,
+            "max_answer_len": max_answer_len,
+            "stride": stride,
+            "batch_size": batch_size,
+        }
+        key = ("extractive", id(model), id(tokenizer), top_k, max_answer_len, stride, batch_size)
+        return self._submit(ExecutorJob(self, "extractive", key, payload))
+
+    def stream_generate(self, model, tokenizer, prompt, max_new_tokens=50, stop_rules=None, **generation_kwargs):
+        """Masukkan prompt ke antrian generate, mengembalikan QueuedStream yang menghasilkan teks bertahap.
+        Request dengan model, parameter, dan StopRules sama (selain max_new_tokens) digabung dalam satu batch."""
+        if "max_length" in generation_kwargs or "min_length" in generation_kwargs:
+            raise ValueError("Gunakan max_new_tokens/min_new_tokens; max_length tidak bermakna untuk prompt ber-padding")
+        generation_kwargs.pop("num_return_sequences", None)
+        payload = {
+            "model": model,
+            "tokenizer": tokenizer,
+            "prompt": prompt,
+            "max_new_tokens": max_new_tokens,
+            "stop_rules": stop_rules,
+            "kwargs": generation_kwargs,
+        }
+        key = ("generate", id(model), id(tokenizer), stop_rules) + tuple(
+            sorted((name, _freeze(value)) for name, value in generation_kwargs.items())
+        )
+        return self._submit(QueuedStream(self, key, payload))
+
+    def _cancel(self, job):
+        with self._condition:
+            self.stats["cancelled"] += 1
+            queued = job in self._pending
+            if queued:
+                self._pending.remove(job)
+        if queued:
+            job._abort()
+
+    def position(self, job):
+        with self._condition:
+            for index, pending in enumerate(self._pending):
+                if pending is job:
+                    return index + 1
+        return 0
+
+    def queue_length(self):
+        with self._condition:
+            return len(self._pending)
+
+    def running(self):
+        with self._condition:
+            return len(self._running)
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join()
+
+    def _take_batch(self):
+        """Ambil request tertua (FIFO) beserta request kompatibel yang sudah/baru masuk dalam max_wait_ms"""
+        with self._condition:
+            batch = []
+            while not batch:
+                while not self._pending:
+                    if self._closed:
+                        return None
+                    self._condition.wait()
+                head = self._pending[0]
+                deadline = time.time() + self.max_wait_ms / 1000
+                while True:
+                    # Request yang sudah dibatalkan dilewati (cancel() juga mengeluarkannya dari antrian)
+                    batch = [job for job in self._pending
+                             if job.key == head.key and not job.cancelled.is_set()][:self.max_batch_size]
+                    timeout = deadline - time.time()
+                    if len(batch) >= self.max_batch_size or timeout <= 0 or self._closed:
+                        break
+                    self._condition.wait(timeout)
+            for job in batch:
+                self._pending.remove(job)
+                self._running.add(job)
+            self.stats["batches"] += 1
+            self.stats["batched_requests"] += len(batch)
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            for job in batch:
+                job._start(len(batch))
+            try:
+                _RUNNERS[batch[0].kind](batch)
+            except Exception as e:
+                with self._condition:
+                    self.stats["failed"] += len(batch)
+                for job in batch:
+                    if job.future.done():
+                        continue
+                    if isinstance(job, QueuedStream):
+                        job._chunks.put(e)
+                        job._chunks.put(None)
+                    job.future.set_exception(e)
+            finally:
+                with self._condition:
+                    self._running.difference_update(batch)
+
+    def average_batch_size(self):
+        return self.stats["batched_requests"] / self.stats["batches"] if self.stats["batches"] else 0.0
+
+
+def _simulate(executor, lm, questions, users, max_new_tokens):
+    """Jalankan `users` sesi bersamaan yang masing-masing mengirim satu pertanyaan, mengembalikan waktu total"""
+    start_time = time.time()
+    streams = []
+    for i in range(users):
+        prompt = lm.spec.build_prompt(lm.tokenizer, questions[i % len(questions)])
+        streams.append(executor.stream_generate(
+            lm.model, lm.tokenizer, prompt, max_new_tokens=max_new_tokens, do_sample=False
+        ))
+    threads = [threading.Thread(target=lambda s=s: list(s)) for s in streams]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.time() - start_time, streams
+
+
+def main(argv=None):
+    from .benchmark import CONTEXT, PROMPTS
+
+    parser = argparse.ArgumentParser(description="Simulasi banyak pengguna bersamaan lewat InferenceExecutor")
+    parser.add_argument("--model", default="gpt2-indo", help="id Hugging Face atau alias model generatif")
+    parser.add_argument("--users", type=int, default=20, help="jumlah request bersamaan")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--max-batch-size", type=int, default=8)
+    parser.add_argument("--max-new-tokens", type=int, default=32)
+    parser.add_argument("--tiny", action="store_true", help="pakai model mini berbobot acak (offline, CPU)")
+    args = parser.parse_args(argv)
+
+    from .registry import get_spec, load_model
+
+    if args.tiny:
+        from .tiny_models import load_tiny
+
+        lm = load_tiny(get_spec(args.model).model_id, extra_text=" ".join(PROMPTS) + " " + CONTEXT)
+    else:
+        lm = load_model(args.model)
+
+    for max_batch_size in (1, args.max_batch_size):
+        executor = InferenceExecutor(workers=args.workers, max_batch_size=max_batch_size)
+        wall_time, streams = _simulate(executor, lm, PROMPTS, args.users, args.max_new_tokens)
+        executor.close()
+        tokens = sum(s.new_tokens for s in streams)
+        latencies = sorted(s.duration for s in streams)
+        print(f"📦 batch maks {max_batch_size}: {args.users} request dalam {wall_time:.2f} detik, "
+              f"{tokens / wall_time:.1f} token/detik, latensi p50 {latencies[len(latencies) // 2]:.2f} detik, "
+              f"rata-rata batch {executor.average_batch_size():.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+import math
+import time
+
+from .registry import load_model
+
+
+def span_scores(start_logits, end_logits, context_mask, max_answer_len):
+    """Skor log semua span dalam batas panjang jawaban secara tervektorisasi.
+
+    start_logits/end_logits/context_mask berbentuk [window, panjang]; hasilnya [window, panjang, span]
+    dengan scores[w, s, d] = log p(awal = s) + log p(akhir = s + d)."""
+    import torch
+    import torch.nn.functional as F
+
+    neg = torch.finfo(torch.float32).min
+    start = start_logits.float().masked_fill(~context_mask, neg).log_softmax(-1)
+    end = end_logits.float().masked_fill(~context_mask, neg).log_softmax(-1)
+    start = start.masked_fill(~context_mask, float("-inf"))
+    end = end.masked_fill(~context_mask, float("-inf"))
+
+    span = min(max_answer_len, start.shape[-1])
+    end_windows = F.pad(end, (0, span - 1), value=float("-inf")).unfold(-1, span, 1)
+    return start.unsqueeze(-1) + end_windows
+
+
+def best_spans(start_logits, end_logits, context_mask, max_answer_len, top_k):
+    """Top-k span untuk setiap window, mengembalikan list per window berisi (skor_log, awal, akhir)"""
+    scores = span_scores(start_logits, end_logits, context_mask, max_answer_len)
+    windows, length, span = scores.shape
+    values, index = scores.reshape(windows, -1).topk(min(top_k, length * span), dim=-1)
+
+    results = []
+    for row_values, row_index in zip(values.tolist(), index.tolist()):
+        spans = []
+        for value, flat in zip(row_values, row_index):
+            if value == float("-inf"):
+                break
+            start, offset = divmod(flat, span)
+            spans.append((value, start, start + offset))
+        results.append(spans)
+    return results
+
+
+class ExtractiveQA:
+    """QA ekstraktif untuk konteks sepanjang apa pun dan banyak pertanyaan sekaligus.
+
+    Konteks ditokenisasi sekali, dipecah menjadi window yang saling tumpang tindih (stride), lalu
+    semua pasangan pertanyaan + window dijalankan dalam forward pass batch besar. Span terbaik dicari
+    secara tervektorisasi dan dikembalikan sebagai top-k jawaban dengan posisi karakter di konteks asli."""
+
+    def __init__(self, model, tokenizer, max_length=384, stride=128, batch_size=32, max_answer_len=30):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.max_length = max_length
+        self.stride = stride
+        self.batch_size = batch_size
+        self.max_answer_len = max_answer_len
+        self._layout = None
+
+    @classmethod
+    def from_registry(cls, name, **kwargs):
+        lm = load_model(name)
+        return cls(lm.model, lm.tokenizer, **kwargs)
+
+    @property
+    def device(self):
+        return self.model.device
+
+    def _pair_layout(self):
+        """Token khusus dan token_type untuk pasangan (pertanyaan, konteks), mis. [CLS] q [SEP] c [SEP].
+        Dicari sekali dari pasangan contoh karena tidak semua tokenizer punya build_inputs_with_special_tokens."""
+        if self._layout is None:
+            first, second = "a", "b"
+            first_ids = self.tokenizer(first, add_special_tokens=False)["input_ids"]
+            second_ids = self.tokenizer(second, add_special_tokens=False)["input_ids"]
+            encoding = self.tokenizer(first, second, return_token_type_ids=True)
+            ids, types = encoding["input_ids"], encoding["token_type_ids"]
+            q_begin = next(i for i in range(len(ids)) if ids[i:i + len(first_ids)] == first_ids)
+            q_end = q_begin + len(first_ids)
+            c_begin = next(i for i in range(q_end, len(ids)) if ids[i:i + len(second_ids)] == second_ids)
+            c_end = c_begin + len(second_ids)
+            self._layout = {
+                "prefix": (ids[:q_begin], types[:q_begin]),
+                "question_type": types[q_begin],
+                "middle": (ids[q_end:c_begin], types[q_end:c_begin]),
+                "context_type": types[c_begin],
+                "suffix": (ids[c_end:], types[c_end:]),
+            }
+        return self._layout
+
+    def _template(self, question_ids):
+        """Token di sekitar konteks untuk satu pertanyaan: (prefix, suffix, tipe prefix, tipe konteks, tipe suffix)"""
+        layout = self._pair_layout()
+        head_ids, head_types = layout["prefix"]
+        middle_ids, middle_types = layout["middle"]
+        suffix_ids, suffix_types = layout["suffix"]
+        prefix = head_ids + list(question_ids) + middle_ids
+        prefix_types = head_types + [layout["question_type"]] * len(question_ids) + middle_types
+        return prefix, suffix_ids, prefix_types, layout["context_type"], suffix_types
+
+    def build_windows(self, questions, context_ids):
+        """Semua window (pertanyaan x potongan konteks) sebagai list dict fitur"""
+        windows = []
+        for question_index, question_ids in enumerate(questions):
+            prefix, suffix, prefix_types, context_type, suffix_types = self._template(question_ids)
+            available = self.max_length - len(prefix) - len(suffix)
+            if available <= 0:
+                raise ValueError(f"Pertanyaan ke-{question_index + 1} terlalu panjang untuk max_length={self.max_length}")
+            step = max(1, available - self.stride)
+
+            begin = 0
+            while True:
+                end = min(begin + available, len(context_ids))
+                piece = context_ids[begin:end]
+                windows.append({
+                    "question": question_index,
+                    "context_start": begin,
+                    "context_offset": len(prefix),
+                    "input_ids": prefix + piece + suffix,
+                    "token_type_ids": prefix_types + [context_type] * len(piece) + suffix_types,
+                    "context_length": len(piece),
+                })
+                if end >= len(context_ids):
+                    break
+                begin += step
+        return windows
+
+    def _collate(self, windows):
+        import torch
+
+        length = max(len(w["input_ids"]) for w in windows)
+        pad_id = self.tokenizer.pad_token_id or 0
+        input_ids = torch.full((len(windows), length), pad_id, dtype=torch.long)
+        token_type_ids = torch.zeros((len(windows), length), dtype=torch.long)
+        attention_mask = torch.zeros((len(windows), length), dtype=torch.long)
+        context_mask = torch.zeros((len(windows), length), dtype=torch.bool)
+        for row, w in enumerate(windows):
+            n = len(w["input_ids"])
+            input_ids[row, :n] = torch.tensor(w["input_ids"])
+            token_type_ids[row, :n] = torch.tensor(w["token_type_ids"])
+            attention_mask[row, :n] = 1
+            context_mask[row, w["context_offset"]:w["context_offset"] + w["context_length"]] = True
+
+        batch = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.tokenizer.model_input_names:
+            batch["token_type_ids"] = token_type_ids
+        return batch, context_mask
+
+    def _candidates(self, windows, count, top_k, max_answer_len):
+        """Jalankan semua window dalam batch, mengembalikan kandidat (skor, token_awal, token_akhir)
+        per pertanyaan (indeks di w["question"])"""
+        import torch
+
+        # Ambil kandidat lebih banyak karena window yang tumpang tindih bisa menghasilkan span yang sama
+        candidates = [[] for _ in range(count)]
+        with torch.inference_mode():
+            for begin in range(0, len(windows), self.batch_size):
+                chunk = windows[begin:begin + self.batch_size]
+                batch, context_mask = self._collate(chunk)
+                outputs = self.model(**{name: t.to(self.device) for name, t in batch.items()})
+                spans = best_spans(
+                    outputs.start_logits, outputs.end_logits, context_mask.to(self.device), max_answer_len, top_k * 4
+                )
+                for w, window_spans in zip(chunk, spans):
+                    for score, start, end in window_spans:
+                        # Posisi token di window -> posisi token di konteks
+                        start_token = w["context_start"] + start - w["context_offset"]
+                        end_token = w["context_start"] + end - w["context_offset"]
+                        candidates[w["question"]].append((score, start_token, end_token))
+        return candidates
+
+    def answer_many(self, questions, context, top_k=1, max_answer_len=None):
+        """Jawab N pertanyaan terhadap satu konteks, mengembalikan (list top-k jawaban per pertanyaan, info)"""
+        start_time = time.time()
+        max_answer_len = max_answer_len or self.max_answer_len
+
+        # Konteks hanya ditokenisasi sekali untuk semua pertanyaan
+        context_encoding = self.tokenizer(context, add_special_tokens=False, return_offsets_mapping=True)
+        context_ids = context_encoding["input_ids"]
+        offsets = context_encoding["offset_mapping"]
+        question_ids = self.tokenizer(list(questions), add_special_tokens=False)["input_ids"]
+        windows = self.build_windows(question_ids, context_ids)
+
+        candidates = self._candidates(windows, len(questions), top_k, max_answer_len)
+        results = [self._to_answers(c, offsets, context, top_k) for c in candidates]
+        info = {"windows": len(windows), "duration": time.time() - start_time}
+        return results, info
+
+    def answer_pairs(self, pairs, top_k=1, max_answer_len=None):
+        """Jawab pasangan (pertanyaan, konteks) yang konteksnya boleh berbeda; window semua pasangan digabung
+        dalam batch forward yang sama. Mengembalikan (list top-k jawaban per pasangan, list jumlah window, info)"""
+        start_time = time.time()
+        max_answer_len = max_answer_len or self.max_answer_len
+
+        encodings = {}
+        windows, window_counts = [], []
+        question_ids = self.tokenizer([question for question, _ in pairs], add_special_tokens=False)["input_ids"]
+        for index, ((_, context), ids) in enumerate(zip(pairs, question_ids)):
+            if context not in encodings:
+                encodings[context] = self.tokenizer(context, add_special_tokens=False, return_offsets_mapping=True)
+            pair_windows = self.build_windows([ids], encodings[context]["input_ids"])
+            for w in pair_windows:
+                w["question"] = index
+            windows += pair_windows
+            window_counts.append(len(pair_windows))
+
+        candidates = self._candidates(windows, len(pairs), top_k, max_answer_len)
+        results = [
+            self._to_answers(c, encodings[context]["offset_mapping"], context, top_k)
+            for c, (_, context) in zip(candidates, pairs)
+        ]
+        info = {"windows": len(windows), "duration": time.time() - start_time}
+        return results, window_counts, info
+
+    def answer(self, question, context, top_k=1, max_answer_len=None):
+        """Jawab satu pertanyaan dari konteks panjang, mengembalikan (list top-k jawaban, info)"""
+        results, info = self.answer_many([question], context, top_k=top_k, max_answer_len=max_answer_len)
+        return results[0], info
+
+    def _to_answers(self, candidates, offsets, context, top_k):
+        """Ubah kandidat (skor, token_awal, token_akhir) menjadi jawaban dengan offset karakter;
+        span yang sama dari window yang tumpang tindih hanya diambil sekali"""
+        answers = []
+        seen = set()
+        for score, start_token, end_token in sorted(candidates, reverse=True):
+            start_char, end_char = offsets[start_token][0], offsets[end_token][1]
+            if (start_char, end_char) in seen:
+                continue
+            seen.add((start_char, end_char))
+            answers.append({
+                "answer": context[start_char:end_char],
+                "score": math.exp(score),
+                "start": start_char,
+                "end": end_char,
+            })
+            if len(answers) == top_k:
+                break
+        return answers
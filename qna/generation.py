@@ -0,0 +1,74 @@
+import time
+
+from .registry import get_spec, load_model
+
+
+def generate_response(name, question, cache=None, context=None, **overrides):
+    """Generate jawaban untuk satu pertanyaan, mengembalikan (jawaban, durasi).
+    Jika `cache` (AnswerCache) diberikan, jawaban yang sudah pernah dihasilkan dipakai ulang."""
+    import torch
+
+    start_time = time.time()  # Mulai timer
+    spec = get_spec(name)
+    params = dict(spec.generation, **overrides)
+    if cache is not None:
+        cached = cache.get(spec.model_id, question, context, params=params)
+        if cached is not None:
+            return cached["answer"], time.time() - start_time
+
+    lm = load_model(name)
+    prompt = lm.spec.build_prompt(lm.tokenizer, question, context)
+    inputs = lm.tokenizer(prompt, return_tensors="pt").to(lm.device)
+
+    with torch.no_grad():
+        outputs = lm.model.generate(
+            **inputs,
+            **lm.prefill_kwargs(inputs["input_ids"]),
+            **lm.generation_kwargs(**overrides),
+        )
+
+    answer = lm.spec.extract_answer(lm.tokenizer, outputs[0], inputs["input_ids"].shape[-1], lm.stop_rules(overrides))
+    if cache is not None:
+        cache.put(spec.model_id, question, {"answer": answer}, context, params=params)
+
+    duration = time.time() - start_time  # Hitung durasi
+    return answer, duration
+
+
+def answer_question(name, question, context, cache=None, **kwargs):
+    """Jawab pertanyaan dari konteks dengan model QA ekstraktif, mengembalikan (hasil, durasi)"""
+    start_time = time.time()
+    spec = get_spec(name)
+    if cache is not None:
+        cached = cache.get(spec.model_id, question, context, params=kwargs)
+        if cached is not None:
+            return cached, time.time() - start_time
+
+    lm = load_model(name)
+    result = lm.qa_pipeline()(question=question, context=context, **kwargs)
+    if cache is not None:
+        value = {
+            "answer": result["answer"],
+            "score": float(result["score"]),
+            "start": int(result["start"]),
+            "end": int(result["end"]),
+        }
+        cache.put(spec.model_id, question, value, context, params=kwargs)
+    return result, time.time() - start_time
+
+
+def answer_with_retrieval(name, question, retriever, top_k=3, mode="bm25", cache=None, **overrides):
+    """Cari top-k passage relevan di korpus lalu jawab hanya dari passage tersebut.
+    Mengembalikan (jawaban, durasi, passage); untuk model ekstraktif jawaban berupa dict span."""
+    start_time = time.time()
+    passages = retriever.search(question, top_k, mode)
+    context = "\n\n".join(p["text"] for p in passages)
+
+    if get_spec(name).task == "question-answering":
+        from .extractive import ExtractiveQA
+
+        answers, _ = ExtractiveQA.from_registry(name).answer(question, context)
+        answer = answers[0] if answers else None
+    else:
+        answer, _ = generate_response(name, question, cache=cache, context=context, **overrides)
+    return answer, time.time() - start_time, passages
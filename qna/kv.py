@@ -0,0 +1,89 @@
+"""Utilitas past_key_values dalam format legacy: tuple per layer berisi (key, value)
+dengan bentuk [batch, heads, panjang, dim]"""
+
+
+def common_prefix_length(a, b):
+    """Panjang prefix token yang sama antara dua list id"""
+    length = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        length += 1
+    return length
+
+
+def to_legacy(cache):
+    """Ubah cache dari model (DynamicCache atau tuple) ke format legacy"""
+    if cache is None:
+        return None
+    if hasattr(cache, "to_legacy_cache"):
+        return cache.to_legacy_cache()
+    if hasattr(cache, "layers"):
+        return tuple((layer.keys, layer.values) for layer in cache.layers)
+    return tuple((layer[0], layer[1]) for layer in cache)
+
+
+def from_legacy(legacy):
+    """Ubah format legacy ke DynamicCache agar bisa diberikan ke forward/generate"""
+    if legacy is None:
+        return None
+    try:
+        from transformers import DynamicCache
+    except ImportError:
+        return legacy
+
+    cache = DynamicCache()
+    for layer_idx, (key, value) in enumerate(legacy):
+        cache.update(key, value, layer_idx)
+    return cache
+
+
+def cache_length(legacy):
+    return 0 if not legacy else legacy[0][0].shape[-2]
+
+
+def cache_bytes(legacy):
+    """Ukuran cache dalam byte"""
+    if not legacy:
+        return 0
+    return sum(t.numel() * t.element_size() for layer in legacy for t in layer)
+
+
+def pad_left(legacy, length):
+    """Tambahkan nol di kiri sumbu panjang hingga panjang cache = length"""
+    import torch.nn.functional as F
+
+    extra = length - cache_length(legacy)
+    if extra <= 0:
+        return legacy
+    return tuple(tuple(F.pad(t, (0, 0, extra, 0)) for t in layer) for layer in legacy)
+
+
+def concat_batch(caches):
+    """Gabungkan beberapa cache (panjang sama) di sumbu batch"""
+    import torch
+
+    return tuple(
+        tuple(torch.cat([cache[layer_idx][i] for cache in caches], dim=0) for i in range(2))
+        for layer_idx in range(len(caches[0]))
+    )
+
+
+def select_rows(legacy, rows):
+    """Ambil baris batch tertentu dari cache"""
+    import torch
+
+    index = torch.tensor(rows, device=legacy[0][0].device)
+    return tuple(tuple(t.index_select(0, index) for t in layer) for layer in legacy)
+
+
+def trim_left(legacy, count):
+    """Buang `count` posisi paling kiri (padding) dari cache"""
+    if count <= 0:
+        return legacy
+    return tuple(tuple(t[:, :, count:, :] for t in layer) for layer in legacy)
+
+
+def slice_length(legacy, length):
+    """Ambil `length` posisi pertama dari cache (mis. untuk memakai ulang prefix)"""
+    return tuple(tuple(t[:, :, :length, :] for t in layer) for layer in legacy)
@@ -0,0 +1,477 @@
+"""Backend ONNX Runtime (CPU) untuk model QA ekstraktif (IndoBERT) dan model generatif dengan KV-cache (GPT2).
+
+Model diekspor sekali ke graf ONNX (GPT2 beserta input past-key-values dan output present), lalu dijalankan
+dengan onnxruntime: optimasi graf penuh dan jumlah thread yang bisa diatur. Modelnya dibungkus agar
+berperilaku seperti model transformers (forward dengan start/end logits atau logits + past_key_values,
+dan `generate`), sehingga ExtractiveQA, generate_response, streaming, dan sesi chat tetap dipakai apa adanya.
+
+Lokasi hasil ekspor: QNA_ONNX_DIR (default ~/.cache/qna/onnx); jumlah thread: QNA_ORT_THREADS.
+
+    python -m qna.onnx_backend --model indobert --compare
+    python -m qna.onnx_backend --model gpt2-indo --output onnx/gpt2-indo"""
+
+import argparse
+import dataclasses
+import inspect
+import json
+import os
+import time
+from types import SimpleNamespace
+
+from . import kv
+from .registry import LoadedModel, get_spec
+from .sampling import eos_ids, sample_token, sampling_params
+
+MODEL_FILE = "model.onnx"
+META_FILE = "onnx_meta.json"
+OPSET = 17
+
+
+def export_dir(model_id):
+    default = os.path.join(os.path.expanduser("~"), ".cache", "qna", "onnx")
+    return os.path.join(os.environ.get("QNA_ONNX_DIR", default), model_id.replace("/", "--"))
+
+
+def session_options(threads=None):
+    """SessionOptions CPU: semua optimasi graf aktif, intra-op thread = threads (0 = bawaan onnxruntime)"""
+    import onnxruntime as ort
+
+    if threads is None:
+        threads = int(os.environ.get("QNA_ORT_THREADS", "0"))
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    options.intra_op_num_threads = threads
+    options.inter_op_num_threads = 1
+    return options
+
+
+def _session(path, threads=None):
+    import onnxruntime as ort
+
+    return ort.InferenceSession(path, sess_options=session_options(threads), providers=["CPUExecutionProvider"])
+
+
+def _export(module, args, path, input_names, output_names, dynamic_axes):
+    import torch
+
+    kwargs = {}
+    # Exporter TorchScript: mendukung dynamic_axes untuk daftar input past yang panjangnya berubah
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        kwargs["dynamo"] = False
+    with torch.no_grad():
+        torch.onnx.export(
+            module,
+            args,
+            path,
+            input_names=input_names,
+            output_names=output_names,
+            dynamic_axes=dynamic_axes,
+            opset_version=OPSET,
+            **kwargs,
+        )
+
+
+def _qa_module(model, input_names):
+    import torch
+
+    class _QAExport(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            outputs = self.model(**dict(zip(input_names, inputs)))
+            return outputs.start_logits, outputs.end_logits
+
+    return _QAExport().eval()
+
+
+def _causal_module(model):
+    import torch
+
+    class _CausalExport(torch.nn.Module):
+        """forward(input_ids, attention_mask, position_ids, past...) -> (logits, present...), past diratakan per layer"""
+
+        def __init__(self):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask, position_ids, *past):
+            past_key_values = kv.from_legacy(tuple(zip(past[0::2], past[1::2])))
+            outputs = self.model(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                position_ids=position_ids,
+                past_key_values=past_key_values,
+                use_cache=True,
+            )
+            present = kv.to_legacy(outputs.past_key_values)
+            return (outputs.logits,) + tuple(t for layer in present for t in layer)
+
+    return _CausalExport().eval()
+
+
+def _past_names(layers, prefix):
+    return [f"{prefix}.{i}.{kind}" for i in range(layers) for kind in ("key", "value")]
+
+
+def export_qa(lm, output_dir):
+    """Ekspor model QA ekstraktif: input tokenizer -> start_logits, end_logits"""
+    input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in lm.tokenizer.model_input_names]
+    sample = lm.tokenizer(
+        "Apa ibu kota Indonesia?", "Ibu kota Indonesia adalah Jakarta.", return_tensors="pt", return_token_type_ids=True
+    )
+    axes = {0: "batch", 1: "sequence"}
+    _export(
+        _qa_module(lm.model, input_names),
+        tuple(sample[n] for n in input_names),
+        os.path.join(output_dir, MODEL_FILE),
+        input_names,
+        ["start_logits", "end_logits"],
+        {name: axes for name in input_names + ["start_logits", "end_logits"]},
+    )
+    return {"inputs": input_names}
+
+
+def export_causal(lm, output_dir):
+    """Ekspor model generatif dengan KV-cache: (input_ids, attention_mask, position_ids, past.*) -> (logits, present.*)"""
+    import torch
+
+    if not lm.spec.cache_reuse:
+        raise ValueError(f"{lm.spec.model_id} memakai KV-cache non-standar, tidak bisa diekspor ke ONNX")
+
+    # Bentuk past (jumlah layer, head, dim) diambil dari satu forward contoh
+    sample = lm.tokenizer("Apa ibu kota Indonesia?", return_tensors="pt")["input_ids"]
+    with torch.no_grad():
+        past = kv.to_legacy(lm.model(input_ids=sample, use_cache=True).past_key_values)
+    layers = len(past)
+    _, heads, past_length, head_dim = past[0][0].shape
+
+    # Graf diekspor dengan past tidak kosong; panjang past dibuat dinamis (0 untuk langkah pertama)
+    input_ids = sample[:, -2:]
+    total = past_length + input_ids.shape[-1]
+    attention_mask = torch.ones((1, total), dtype=torch.long)
+    position_ids = torch.arange(past_length, total)[None]
+    past_inputs = [t.contiguous() for layer in past for t in layer]
+
+    past_names = _past_names(layers, "past")
+    present_names = _past_names(layers, "present")
+    dynamic_axes = {
+        "input_ids": {0: "batch", 1: "sequence"},
+        "attention_mask": {0: "batch", 1: "total_sequence"},
+        "position_ids": {0: "batch", 1: "sequence"},
+        "logits": {0: "batch", 1: "sequence"},
+    }
+    dynamic_axes.update({name: {0: "batch", 2: "past_sequence"} for name in past_names})
+    dynamic_axes.update({name: {0: "batch", 2: "total_sequence"} for name in present_names})
+    _export(
+        _causal_module(lm.model),
+        (input_ids, attention_mask, position_ids, *past_inputs),
+        os.path.join(output_dir, MODEL_FILE),
+        ["input_ids", "attention_mask", "position_ids"] + past_names,
+        ["logits"] + present_names,
+        dynamic_axes,
+    )
+    return {"layers": layers, "kv_heads": heads, "head_dim": head_dim}
+
+
+def export_model(lm, output_dir):
+    """Ekspor LoadedModel (fp32, CPU) ke output_dir: graf ONNX, tokenizer, dan metadata"""
+    os.makedirs(output_dir, exist_ok=True)
+    lm.model.float().eval()
+    print(f"📦 Ekspor {lm.spec.model_id} ke ONNX ({output_dir})...")
+    start_time = time.time()
+    if lm.spec.task == "question-answering":
+        meta = export_qa(lm, output_dir)
+    else:
+        meta = export_causal(lm, output_dir)
+    lm.tokenizer.save_pretrained(output_dir)
+    meta.update(model_id=lm.spec.model_id, task=lm.spec.task, opset=OPSET)
+    # Metadata ditulis terakhir: direktori tanpa meta dianggap ekspor yang belum selesai
+    with open(os.path.join(output_dir, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    print(f"✅ Ekspor selesai dalam {time.time() - start_time:.2f} detik")
+    return meta
+
+
+def read_meta(output_dir):
+    path = os.path.join(output_dir, META_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class OrtQAModel:
+    """Pengganti AutoModelForQuestionAnswering di atas onnxruntime (dipakai langsung oleh ExtractiveQA)"""
+
+    def __init__(self, path, threads=None):
+        self.session = _session(path, threads)
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.memory_bytes = os.path.getsize(path)
+
+    @property
+    def device(self):
+        import torch
+
+        return torch.device("cpu")
+
+    def eval(self):
+        return self
+
+    def __call__(self, **inputs):
+        import torch
+
+        feed = {name: inputs[name].cpu().numpy() for name in self.input_names}
+        start_logits, end_logits = self.session.run(["start_logits", "end_logits"], feed)
+        return SimpleNamespace(start_logits=torch.from_numpy(start_logits), end_logits=torch.from_numpy(end_logits))
+
+
+class OrtCausalLM:
+    """Pengganti AutoModelForCausalLM di atas onnxruntime: forward dengan past_key_values dan `generate`
+    (greedy/sampling, repetition penalty, streamer) yang menyimpan KV-cache sebagai array numpy antar langkah"""
+
+    def __init__(self, path, meta, threads=None):
+        self.session = _session(path, threads)
+        self.layers = meta["layers"]
+        self.kv_heads = meta["kv_heads"]
+        self.head_dim = meta["head_dim"]
+        self.past_names = _past_names(self.layers, "past")
+        self.memory_bytes = os.path.getsize(path)
+
+    @property
+    def device(self):
+        import torch
+
+        return torch.device("cpu")
+
+    def eval(self):
+        return self
+
+    def _empty_past(self, batch):
+        import numpy as np
+
+        return [np.zeros((batch, self.kv_heads, 0, self.head_dim), dtype=np.float32)] * (2 * self.layers)
+
+    def _step(self, input_ids, attention_mask, past):
+        """Satu forward di onnxruntime (semua argumen array numpy), mengembalikan (logits, present)"""
+        import numpy as np
+
+        positions = np.maximum(attention_mask.cumsum(-1) - 1, 0)[:, -input_ids.shape[-1]:]
+        feed = {"input_ids": input_ids, "attention_mask": attention_mask, "position_ids": positions}
+        feed.update((name, np.ascontiguousarray(t, dtype=np.float32)) for name, t in zip(self.past_names, past))
+        outputs = self.session.run(None, feed)
+        return outputs[0], outputs[1:]
+
+    def _past_arrays(self, past_key_values, batch):
+        legacy = kv.to_legacy(past_key_values)
+        if not legacy:
+            return self._empty_past(batch), 0
+        return [t.float().cpu().numpy() for layer in legacy for t in layer], kv.cache_length(legacy)
+
+    def _to_cache(self, past):
+        import torch
+
+        tensors = [torch.from_numpy(t) for t in past]
+        return kv.from_legacy(tuple(zip(tensors[0::2], tensors[1::2])))
+
+    def __call__(self, input_ids, attention_mask=None, past_key_values=None, use_cache=True, **kwargs):
+        import numpy as np
+        import torch
+
+        past, past_length = self._past_arrays(past_key_values, input_ids.shape[0])
+        if attention_mask is None:
+            attention_mask = np.ones((input_ids.shape[0], past_length + input_ids.shape[-1]), dtype=np.int64)
+        else:
+            attention_mask = attention_mask.cpu().numpy().astype(np.int64)
+        logits, present = self._step(input_ids.cpu().numpy().astype(np.int64), attention_mask, past)
+        return SimpleNamespace(
+            logits=torch.from_numpy(logits),
+            past_key_values=self._to_cache(present) if use_cache else None,
+        )
+
+    def generate(self, input_ids, attention_mask=None, past_key_values=None, streamer=None,
+                 return_dict_in_generate=False, **kwargs):
+        """Loop decode dengan parameter seperti model.generate; past_key_values (mis. dari prefix cache)
+        dipakai untuk token awal prompt sehingga hanya sisanya yang di-prefill"""
+        import numpy as np
+        import torch
+
+        batch = input_ids.shape[0]
+        params = sampling_params(kwargs)
+        eos = eos_ids(kwargs.get("eos_token_id"))
+        pad_token_id = kwargs.get("pad_token_id")
+        pad_token_id = pad_token_id if pad_token_id is not None else next(iter(eos), 0)
+        max_new_tokens = kwargs.get("max_new_tokens") or 20
+        min_new_tokens = kwargs.get("min_new_tokens") or 0
+        stopping_criteria = kwargs.get("stopping_criteria")
+
+        sequences = input_ids.cpu()
+        if attention_mask is None:
+            mask = np.ones(tuple(input_ids.shape), dtype=np.int64)
+        else:
+            mask = attention_mask.cpu().numpy().astype(np.int64)
+        past, past_length = self._past_arrays(past_key_values, batch)
+        step_ids = sequences[:, past_length:].numpy().astype(np.int64)
+        if streamer is not None:
+            streamer.put(sequences)
+
+        finished = [False] * batch
+        for step in range(max_new_tokens):
+            logits, past = self._step(step_ids, mask, past)
+            last = torch.from_numpy(logits[:, -1])
+            if step < min_new_tokens and eos:
+                last[:, list(eos)] = float("-inf")
+
+            tokens = []
+            for row in range(batch):
+                if finished[row]:
+                    tokens.append(pad_token_id)
+                    continue
+                token = sample_token(last[row], sequences[row].tolist(), **params)
+                finished[row] = token in eos
+                tokens.append(token)
+
+            new_tokens = torch.tensor(tokens, dtype=sequences.dtype)
+            sequences = torch.cat([sequences, new_tokens[:, None]], dim=-1)
+            if streamer is not None:
+                streamer.put(new_tokens)
+            if stopping_criteria:
+                # Sama seperti HF: baris yang memenuhi stopping criteria (stop string, pembatalan) selesai
+                stopped = stopping_criteria(sequences, None).tolist()
+                finished = [done or stop for done, stop in zip(finished, stopped)]
+            if all(finished):
+                break
+            step_ids = new_tokens[:, None].numpy().astype(np.int64)
+            mask = np.concatenate([mask, np.ones((batch, 1), dtype=np.int64)], axis=-1)
+
+        if streamer is not None:
+            streamer.end()
+        if return_dict_in_generate:
+            # Seperti HF: cache mencakup semua token kecuali token terakhir yang belum diproses
+            return SimpleNamespace(sequences=sequences, past_key_values=self._to_cache(past))
+        return sequences
+
+
+class OnnxLoadedModel(LoadedModel):
+    """LoadedModel dengan model onnxruntime; qa_pipeline memakai ExtractiveQA karena pipeline HF butuh model torch"""
+
+    def qa_pipeline(self):
+        if self._qa_pipeline is None:
+            from .extractive import ExtractiveQA
+
+            engine = ExtractiveQA(self.model, self.tokenizer)
+
+            def run(question, context, top_k=1, max_answer_len=None, **kwargs):
+                answers, _ = engine.answer(question, context, top_k=top_k, max_answer_len=max_answer_len)
+                if top_k > 1:
+                    return answers
+                return answers[0] if answers else {"answer": "", "score": 0.0, "start": 0, "end": 0}
+
+            self._qa_pipeline = run
+        return self._qa_pipeline
+
+
+def load_exported(spec, output_dir, threads=None):
+    """Buka hasil ekspor di output_dir sebagai OnnxLoadedModel"""
+    from transformers import AutoTokenizer
+
+    meta = read_meta(output_dir)
+    if meta is None:
+        raise FileNotFoundError(f"Hasil ekspor ONNX tidak ditemukan di {output_dir}")
+    start_time = time.time()
+    tokenizer = AutoTokenizer.from_pretrained(output_dir)
+    path = os.path.join(output_dir, MODEL_FILE)
+    if meta["task"] == "question-answering":
+        model = OrtQAModel(path, threads)
+    else:
+        model = OrtCausalLM(path, meta, threads)
+    return OnnxLoadedModel(spec, tokenizer, model, time.time() - start_time)
+
+
+def load_onnx(spec, threads=None):
+    """Muat model dengan backend onnxruntime; model diekspor lebih dulu jika belum ada di QNA_ONNX_DIR"""
+    from .registry import _load_pretrained
+
+    output_dir = export_dir(spec.model_id)
+    start_time = time.time()
+    if read_meta(output_dir) is None:
+        lm = _load_pretrained(dataclasses.replace(spec, dtype="float32", device_map=None), device="cpu")
+        export_model(lm, output_dir)
+        del lm
+    print(f"🔄 Memuat {spec.model_id} dengan onnxruntime...")
+    lm = load_exported(spec, output_dir, threads)
+    lm.load_time = time.time() - start_time
+    print(f"✅ Model ONNX dimuat dalam {lm.load_time:.2f} detik")
+    return lm
+
+
+def to_onnx(lm, output_dir, threads=None):
+    """Ekspor LoadedModel yang sudah dimuat (mis. model mini) lalu kembalikan versi onnxruntime-nya"""
+    export_model(lm, output_dir)
+    return load_exported(lm.spec, output_dir, threads)
+
+
+def compare(torch_lm, onnx_lm, repeats=3, max_new_tokens=32):
+    """Latensi p50 PyTorch vs onnxruntime pada set pertanyaan benchmark, mengembalikan dict per backend"""
+    from .benchmark import CONTEXT, PROMPTS, measure_extractive, measure_generation, percentile
+    from .extractive import ExtractiveQA
+
+    results = {}
+    for backend, lm in (("pytorch", torch_lm), ("onnxruntime", onnx_lm)):
+        if lm.spec.task == "question-answering":
+            engine = ExtractiveQA(lm.model, lm.tokenizer)
+
+            def run(question):
+                return measure_extractive(engine, question, CONTEXT)
+        else:
+            def run(question):
+                return measure_generation(lm, question, max_new_tokens)
+
+        run(PROMPTS[0])
+        latencies = [run(question)["latency"] for _ in range(repeats) for question in PROMPTS]
+        results[backend] = {"latency_p50_ms": percentile(latencies, 50) * 1000}
+    return results
+
+
+def main(argv=None):
+    import tempfile
+
+    import torch
+
+    parser = argparse.ArgumentParser(description="Ekspor model ke ONNX dan jalankan dengan onnxruntime (CPU)")
+    parser.add_argument("--model", default="indobert", help="id Hugging Face atau alias model")
+    parser.add_argument("--output", help="direktori hasil ekspor (default: QNA_ONNX_DIR/<model>)")
+    parser.add_argument("--threads", type=int, help="intra-op thread onnxruntime dan torch.set_num_threads")
+    parser.add_argument("--tiny", action="store_true", help="pakai model mini berbobot acak (offline, CPU)")
+    parser.add_argument("--compare", action="store_true", help="bandingkan latensi dengan PyTorch eager")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--max-new-tokens", type=int, default=32)
+    args = parser.parse_args(argv)
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    spec = get_spec(args.model)
+    if args.tiny:
+        from .benchmark import CONTEXT, PROMPTS
+        from .tiny_models import load_tiny
+
+        torch_lm = load_tiny(spec.model_id, extra_text=" ".join(PROMPTS) + " " + CONTEXT)
+    else:
+        from .registry import _load_pretrained
+
+        torch_lm = _load_pretrained(dataclasses.replace(spec, dtype="float32", device_map=None), device="cpu")
+
+    output_dir = args.output or (tempfile.mkdtemp(prefix="qna-onnx-") if args.tiny else export_dir(spec.model_id))
+    onnx_lm = to_onnx(torch_lm, output_dir, threads=args.threads)
+    print(f"💾 Graf ONNX: {os.path.join(output_dir, MODEL_FILE)} ({onnx_lm.model.memory_bytes / 1024 ** 2:.1f} MB)")
+
+    if args.compare:
+        results = compare(torch_lm, onnx_lm, repeats=args.repeats, max_new_tokens=args.max_new_tokens)
+        eager, ort = results["pytorch"]["latency_p50_ms"], results["onnxruntime"]["latency_p50_ms"]
+        print(f"⏱️ p50 PyTorch {eager:.1f} ms, onnxruntime {ort:.1f} ms ({eager / ort:.2f}× lebih cepat)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""Penyimpanan passage di disk: satu blob UTF-8 berurutan ditambah array offset (numpy memmap).
+
+Passage ke-i adalah blob[offsets[i]:offsets[i + 1]], jadi pencarian per id O(1) tanpa memuat korpus
+ke memori. Karena file dibuka dengan memmap, beberapa proses worker berbagi halaman korpus yang sama
+lewat page cache sistem operasi."""
+
+import argparse
+import json
+import os
+import struct
+
+TEXT_FILE = "texts.bin"
+TEXT_OFFSETS_FILE = "texts.idx"
+META_FILE = "meta.bin"
+META_OFFSETS_FILE = "meta.idx"
+
+
+def iter_passages(lines, max_words=120):
+    """Pecah baris-baris dokumen menjadi passage per paragraf secara streaming; paragraf pendek digabung
+    sampai ~max_words kata dan paragraf yang sangat panjang dipotong"""
+    current, paragraph = [], []
+
+    def close_paragraph():
+        nonlocal current
+        if current and len(current) + len(paragraph) > max_words:
+            yield " ".join(current)
+            current = []
+        current.extend(paragraph)
+        while len(current) > max_words * 2:
+            yield " ".join(current[:max_words])
+            current = current[max_words:]
+        paragraph.clear()
+
+    for line in lines:
+        words = line.split()
+        if words:
+            paragraph.extend(words)
+            if len(paragraph) > max_words * 2:
+                yield from close_paragraph()
+        elif paragraph:
+            yield from close_paragraph()
+    if paragraph:
+        yield from close_paragraph()
+    if current:
+        yield " ".join(current)
+
+
+def split_passages(text, max_words=120):
+    """Pecah dokumen (string) menjadi list passage, lihat iter_passages"""
+    return list(iter_passages(text.splitlines(), max_words))
+
+
+def read_corpus(paths, max_words=120):
+    """Baca file txt/markdown/JSONL baris demi baris dan hasilkan passage (dict id, text, source)"""
+    for path in paths:
+        if path.endswith(".jsonl"):
+            with open(path, encoding="utf-8") as f:
+                for line_number, line in enumerate(f):
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    text = record.get("text") or record.get("context") or ""
+                    if record.get("title"):
+                        text = f"{record['title']}\n{text}"
+                    yield {"id": str(record.get("id", f"{path}:{line_number}")), "text": text, "source": path}
+        else:
+            with open(path, encoding="utf-8") as f:
+                for number, passage in enumerate(iter_passages(f, max_words)):
+                    yield {"id": f"{path}:{number}", "text": passage, "source": path}
+
+
+def _open_offsets(path):
+    import numpy as np
+
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return np.zeros(1, dtype=np.int64)
+    return np.memmap(path, dtype=np.int64, mode="r")
+
+
+class PassageStore:
+    """Baca passage dari direktori store; teks diambil langsung dari memmap tanpa menyalin seluruh korpus"""
+
+    def __init__(self, path):
+        import numpy as np
+
+        self.path = path
+        self.offsets = _open_offsets(os.path.join(path, TEXT_OFFSETS_FILE))
+        self.meta_offsets = _open_offsets(os.path.join(path, META_OFFSETS_FILE))
+        size = int(self.offsets[-1])
+        self.blob = np.memmap(os.path.join(path, TEXT_FILE), dtype=np.uint8, mode="r") if size else np.zeros(0, np.uint8)
+        meta_size = int(self.meta_offsets[-1])
+        self.meta = np.memmap(os.path.join(path, META_FILE), dtype=np.uint8, mode="r") if meta_size else None
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def _check(self, index):
+        if not 0 <= index < len(self):
+            raise IndexError(f"Indeks passage {index} di luar rentang (store berisi {len(self)} passage)")
+
+    def raw(self, index):
+        """Byte UTF-8 passage sebagai view memmap (tanpa salinan)"""
+        self._check(index)
+        return self.blob[self.offsets[index]:self.offsets[index + 1]]
+
+    def text(self, index):
+        return self.raw(index).tobytes().decode("utf-8")
+
+    def get(self, index):
+        """Passage sebagai dict (id, text, source, ...)"""
+        self._check(index)
+        passage = {}
+        if self.meta is not None:
+            passage.update(json.loads(self.meta[self.meta_offsets[index]:self.meta_offsets[index + 1]].tobytes()))
+        passage["text"] = self.text(index)
+        return passage
+
+    def __getitem__(self, index):
+        return self.get(index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.get(index)
+
+    def nbytes(self):
+        return int(self.offsets[-1])
+
+
+class PassageStoreWriter:
+    """Tambah passage ke store secara streaming; data ditulis langsung ke file, bukan ditahan di memori.
+    Store yang sudah ada dilanjutkan (append), sehingga korpus bisa diingest bertahap."""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._texts = open(os.path.join(path, TEXT_FILE), "ab")
+        self._meta = open(os.path.join(path, META_FILE), "ab")
+        self._text_offsets = open(os.path.join(path, TEXT_OFFSETS_FILE), "ab")
+        self._meta_offsets = open(os.path.join(path, META_OFFSETS_FILE), "ab")
+        self.count = 0
+        # Offset disimpan sebagai int64 mentah dengan 0 di awal: passage i = [offsets[i], offsets[i + 1])
+        for handle in (self._text_offsets, self._meta_offsets):
+            if handle.tell() == 0:
+                handle.write(struct.pack("q", 0))
+        self._first_index = self._text_offsets.tell() // 8 - 1
+
+    def add(self, passage):
+        """Tambahkan satu passage (dict dengan 'text'; field lain disimpan sebagai metadata), kembalikan indeksnya"""
+        meta = {key: value for key, value in passage.items() if key != "text"}
+        self._texts.write(passage["text"].encode("utf-8"))
+        self._meta.write(json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+        self._text_offsets.write(struct.pack("q", self._texts.tell()))
+        self._meta_offsets.write(struct.pack("q", self._meta.tell()))
+        self.count += 1
+        return self._first_index + self.count - 1
+
+    def add_all(self, passages):
+        for passage in passages:
+            self.add(passage)
+        return self.count
+
+    def close(self):
+        # Blob ditutup sebelum offset agar pembaca tidak pernah melihat offset yang melewati akhir blob
+        for handle in (self._texts, self._meta, self._text_offsets, self._meta_offsets):
+            handle.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    import time
+
+    parser = argparse.ArgumentParser(description="Ingest dokumen besar ke passage store (blob UTF-8 + offset memmap)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    ingest = subparsers.add_parser("ingest", help="tambahkan dokumen (txt/md/jsonl) ke store secara streaming")
+    ingest.add_argument("--store", required=True, help="direktori passage store")
+    ingest.add_argument("--max-words", type=int, default=120, help="panjang passage untuk txt/md")
+    ingest.add_argument("files", nargs="+")
+
+    show = subparsers.add_parser("show", help="tampilkan passage berdasarkan indeks")
+    show.add_argument("--store", required=True)
+    show.add_argument("index", type=int, nargs="+")
+
+    args = parser.parse_args(argv)
+    if args.command == "ingest":
+        start_time = time.time()
+        with PassageStoreWriter(args.store) as writer:
+            count = writer.add_all(read_corpus(args.files, args.max_words))
+        store = PassageStore(args.store)
+        print(f"✅ {count} passage ditambahkan dalam {time.time() - start_time:.2f} detik "
+              f"(total {len(store)} passage, {store.nbytes() / 1024 ** 2:.1f} MB teks)")
+        return
+
+    store = PassageStore(args.store)
+    for index in args.index:
+        passage = store.get(index)
+        print(f"{index}. {passage.get('id', '-')}\n   {passage['text'][:200]}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import gc
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+def model_memory_bytes(model):
+    """Ukuran parameter + buffer model dalam byte (termasuk bobot Linear int8 yang dikuantisasi)"""
+    if not hasattr(model, "parameters"):
+        # Model non-torch (mis. sesi onnxruntime) melaporkan ukurannya sendiri
+        return getattr(model, "memory_bytes", 0)
+    total = 0
+    for tensor in list(model.parameters()) + list(model.buffers()):
+        total += tensor.numel() * tensor.element_size()
+    for module in model.modules():
+        packed = getattr(module, "_packed_params", None)
+        if packed is not None and hasattr(packed, "_weight_bias"):
+            for tensor in packed._weight_bias():
+                if tensor is not None:
+                    total += tensor.numel() * tensor.element_size()
+    return total
+
+
+def process_rss_bytes():
+    """Resident set size proses saat ini (Linux), 0 jika tidak tersedia"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _free_memory():
+    gc.collect()
+    try:
+        import torch
+    except ImportError:
+        return
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+class ModelPool:
+    """Menyimpan beberapa model di memori dan mengeluarkan yang paling lama tidak dipakai (LRU)
+    jika total memori melebihi budget"""
+
+    def __init__(self, loader, memory_budget_mb=None):
+        self.loader = loader
+        self.memory_budget_mb = memory_budget_mb
+        self._models = OrderedDict()   # model_id -> LoadedModel, urutan = LRU
+        self._sizes = {}               # model_id -> byte (diingat walau sudah dikeluarkan)
+        self._last_used = {}
+        self._lock = threading.RLock()
+
+    @property
+    def budget_bytes(self):
+        if self.memory_budget_mb is None:
+            return None
+        return int(self.memory_budget_mb * 1024 * 1024)
+
+    def used_bytes(self):
+        return sum(self._sizes[model_id] for model_id in self._models)
+
+    def get(self, spec):
+        """Ambil model dari pool, muat jika belum ada"""
+        with self._lock:
+            model_id = spec.model_id
+            if model_id in self._models:
+                self._models.move_to_end(model_id)
+                self._last_used[model_id] = time.time()
+                return self._models[model_id]
+
+            # Kosongkan tempat lebih dulu agar puncak memori (model lama + baru) tetap di bawah budget:
+            # ukuran terukur dari pemuatan sebelumnya, atau estimasi dari spec
+            incoming = self._sizes.get(model_id)
+            if incoming is None and hasattr(spec, "estimated_bytes"):
+                incoming = spec.estimated_bytes()
+            self._evict_until(incoming or 0)
+
+            lm = self.loader(spec)
+            self._sizes[model_id] = model_memory_bytes(lm.model)
+            self._models[model_id] = lm
+            self._last_used[model_id] = time.time()
+            self._evict_until(0, keep=model_id)
+            return lm
+
+    def _evict_until(self, incoming_bytes, keep=None):
+        budget = self.budget_bytes
+        if budget is None:
+            return
+        while self.used_bytes() + incoming_bytes > budget:
+            candidates = [model_id for model_id in self._models if model_id != keep]
+            if not candidates:
+                if keep is not None:
+                    print(f"⚠️ {keep} ({self._sizes[keep] / 1024**2:.0f} MB) melebihi budget memori sendirian")
+                return
+            self.evict(candidates[0])
+
+    def set_budget(self, memory_budget_mb):
+        """Ubah budget memori; model lama langsung dikeluarkan jika melebihi budget"""
+        with self._lock:
+            self.memory_budget_mb = memory_budget_mb
+            self._evict_until(0)
+
+    def evict(self, model_id):
+        """Keluarkan satu model dari pool"""
+        with self._lock:
+            if self._models.pop(model_id, None) is not None:
+                print(f"♻️ Mengeluarkan {model_id} dari memori ({self._sizes[model_id] / 1024**2:.0f} MB)")
+                _free_memory()
+
+    def clear(self):
+        with self._lock:
+            for model_id in list(self._models):
+                self.evict(model_id)
+
+    def __contains__(self, model_id):
+        return model_id in self._models
+
+    def loaded(self):
+        return list(self._models)
+
+    def stats(self):
+        """Laporan memori per model, urut dari yang paling lama tidak dipakai"""
+        with self._lock:
+            models = [
+                {
+                    "model_id": model_id,
+                    "memory_mb": self._sizes[model_id] / 1024**2,
+                    "load_time": lm.load_time,
+                    "last_used": self._last_used[model_id],
+                }
+                for model_id, lm in self._models.items()
+            ]
+            return {
+                "models": models,
+                "used_mb": self.used_bytes() / 1024**2,
+                "budget_mb": self.memory_budget_mb,
+                "process_rss_mb": process_rss_bytes() / 1024**2,
+            }
+
+    def print_stats(self):
+        stats = self.stats()
+        budget = f"{stats['budget_mb']:.0f} MB" if stats["budget_mb"] is not None else "tanpa batas"
+        print(f"📦 Model di memori: {stats['used_mb']:.0f} MB (budget: {budget}, RSS proses: {stats['process_rss_mb']:.0f} MB)")
+        for item in stats["models"]:
+            print(f"  {item['model_id']:<50} {item['memory_mb']:>8.0f} MB")
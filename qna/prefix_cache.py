@@ -0,0 +1,73 @@
+import threading
+
+from . import kv
+
+
+class PrefixCache:
+    """KV-state untuk bagian awal prompt yang selalu sama (system prompt dan awal chat template).
+    Dihitung sekali per model lalu dipakai bersama oleh semua request, sehingga setiap request
+    hanya perlu prefill sisa prompt setelah prefix tersebut."""
+
+    # Dua pertanyaan berbeda untuk mendeteksi di mana prompt mulai berbeda
+    _PROBES = ("Apa ibu kota Indonesia?", "Siapa presiden pertama?")
+
+    def __init__(self, lm):
+        self.lm = lm
+        self.ids = None
+        self.hits = 0
+        self.reused_tokens = 0
+        self._cache = None
+        self._lock = threading.Lock()
+
+    def _compute(self):
+        import torch
+
+        tokenizer = self.lm.tokenizer
+        a, b = (tokenizer(self.lm.spec.build_prompt(tokenizer, q))["input_ids"] for q in self._PROBES)
+        length = kv.common_prefix_length(a, b)
+        self.ids = a[:length]
+        if length == 0:
+            return
+
+        input_ids = torch.tensor([self.ids], device=self.lm.device)
+        with torch.no_grad():
+            outputs = self.lm.model(input_ids=input_ids, use_cache=True)
+        self._cache = kv.to_legacy(outputs.past_key_values)
+
+    def ensure(self):
+        with self._lock:
+            if self.ids is None:
+                self._compute()
+
+    @property
+    def length(self):
+        self.ensure()
+        return len(self.ids)
+
+    def lookup(self, ids):
+        """Cache untuk prefix yang cocok dengan `ids`; mengembalikan (past_key_values, jumlah_token)
+        atau (None, 0) jika tidak ada yang bisa dipakai"""
+        self.ensure()
+        # Minimal satu token prompt tetap diproses agar generate punya logits awal
+        length = min(kv.common_prefix_length(self.ids, ids), len(ids) - 1)
+        if length <= 0:
+            return None, 0
+        self.hits += 1
+        self.reused_tokens += length
+        # DynamicCache baru per request; tensor prefix asli tidak pernah diubah
+        return kv.from_legacy(kv.slice_length(self._cache, length)), length
+
+    def generation_kwargs(self, input_ids):
+        """kwargs tambahan untuk model.generate (input_ids berbentuk [1, panjang])"""
+        past_key_values, _ = self.lookup(input_ids[0].tolist())
+        if past_key_values is None:
+            return {}
+        return {"past_key_values": past_key_values}
+
+    def stats(self):
+        return {
+            "prefix_tokens": len(self.ids or []),
+            "hits": self.hits,
+            "reused_tokens": self.reused_tokens,
+            "cache_mb": kv.cache_bytes(self._cache) / 1024**2,
+        }
@@ -0,0 +1,130 @@
+"""Prompt dengan budget token: hanya kalimat konteks yang paling relevan yang masuk ke prompt.
+
+Kalimat konteks diberi skor berdasarkan kata pertanyaan yang muncul di kalimat itu (tokenisasi Bahasa
+Indonesia yang sama dengan retrieval, kata yang jarang di konteks berbobot lebih besar). Kalimat lalu dimasukkan
+sesuai peringkat sampai budget token prompt penuh, dengan urutan asli tetap dipertahankan. Panjang prompt diukur
+dengan tokenizer model, jadi waktu prefill tetap terbatas sepanjang apa pun konteks yang ditempel, dan
+max_new_tokens bisa dihitung tepat terhadap panjang posisi maksimal model."""
+
+import math
+import re
+
+from .retrieval import tokenize
+from .stopping import SENTENCE_END
+
+# Batas kalimat sama dengan aturan berhenti (angka desimal seperti "17.08" tidak memotong), ditambah baris baru
+_BOUNDARY = re.compile(SENTENCE_END.pattern + r"|\n")
+
+# Batas wajar untuk model_max_length; tokenizer tanpa batas memakai nilai sentinel yang sangat besar
+_MAX_SANE_POSITIONS = 1_000_000
+
+
+def split_sentences(text):
+    """Pecah konteks menjadi kalimat (tanpa spasi di tepi, kalimat kosong dibuang)"""
+    sentences = []
+    start = 0
+    for match in _BOUNDARY.finditer(text):
+        sentences.append(text[start:match.end()].strip())
+        start = match.end()
+    sentences.append(text[start:].strip())
+    return [sentence for sentence in sentences if sentence]
+
+
+def rank_sentences(question, sentences):
+    """Indeks kalimat diurutkan dari yang paling relevan: jumlah bobot idf kata pertanyaan yang muncul di
+    kalimat; skor sama diurutkan menurut posisi (kalimat awal lebih dulu)"""
+    question_terms = set(tokenize(question))
+    sentence_terms = [set(tokenize(sentence)) for sentence in sentences]
+    document_freq = {}
+    for terms in sentence_terms:
+        for term in terms & question_terms:
+            document_freq[term] = document_freq.get(term, 0) + 1
+
+    count = len(sentences)
+    scores = [
+        sum(math.log(1 + count / document_freq[term]) for term in terms & question_terms)
+        for terms in sentence_terms
+    ]
+    return sorted(range(count), key=lambda index: (-scores[index], index)), scores
+
+
+def max_positions(tokenizer, model=None, default=1024):
+    """Panjang konteks maksimal model (n_positions / max_position_embeddings / model_max_length)"""
+    config = getattr(model, "config", None)
+    for name in ("n_positions", "max_position_embeddings"):
+        value = getattr(config, name, None)
+        if value:
+            return value
+    value = getattr(tokenizer, "model_max_length", None)
+    if value and value < _MAX_SANE_POSITIONS:
+        return value
+    return default
+
+
+def count_tokens(tokenizer, text):
+    return len(tokenizer(text, add_special_tokens=False)["input_ids"])
+
+
+def fit_prompt(tokenizer, question, context, build_prompt, max_prompt_tokens=512, max_new_tokens=150,
+               positions=1024):
+    """Susun prompt `build_prompt(konteks_terpilih)` yang muat di budget token. Hanya kalimat yang memuat
+    kata pertanyaan yang dipakai; jika tidak ada yang cocok, kalimat diambil dari awal konteks.
+
+    Budget prompt = min(max_prompt_tokens, positions - max_new_tokens) sehingga jawaban selalu muat.
+    Mengembalikan (prompt, info) dengan info berisi prompt_tokens, max_new_tokens (tepat, tidak melewati
+    `positions`), jumlah kalimat konteks yang dipakai dan totalnya."""
+    budget = max(1, min(max_prompt_tokens, positions - max_new_tokens))
+    sentences = split_sentences(context) if context else []
+    info = {"context_sentences": 0, "total_sentences": len(sentences)}
+
+    selected = []
+    selected_text = ""
+    if sentences:
+        order, scores = rank_sentences(question, sentences)
+        # Kalimat tanpa kata pertanyaan sama sekali tidak dipakai, kecuali jika tidak ada kalimat yang cocok
+        # (maka konteks diambil dari awal)
+        if scores[order[0]] > 0:
+            order = [index for index in order if scores[index] > 0]
+        # Overhead template (pertanyaan, penanda, dll.) diukur sekali lewat kalimat teratas, karena template
+        # tanpa konteks bisa berbeda dari template dengan konteks
+        top = sentences[order[0]]
+        room = budget - (count_tokens(tokenizer, build_prompt(top)) - count_tokens(tokenizer, top))
+        available = room
+        for index in order:
+            if available <= 0:
+                break
+            # +1 untuk spasi penyambung antar kalimat
+            cost = count_tokens(tokenizer, sentences[index]) + 1
+            if cost <= available:
+                selected.append(index)
+                available -= cost
+
+        # Penggabungan token di batas kalimat bisa sedikit berbeda: buang kalimat peringkat terendah
+        # sampai prompt yang sebenarnya muat
+        while selected and count_tokens(tokenizer, build_prompt(_join(sentences, selected))) > budget:
+            selected.pop()
+        selected_text = _join(sentences, selected)
+
+        # Kalimat teratas sendiri lebih panjang dari budget: pakai potongan awalnya
+        if not selected and room > 0:
+            ids = tokenizer(top, add_special_tokens=False)["input_ids"][:room]
+            selected_text = tokenizer.decode(ids, skip_special_tokens=True).strip()
+            while ids and count_tokens(tokenizer, build_prompt(selected_text)) > budget:
+                ids = ids[:-1]
+                selected_text = tokenizer.decode(ids, skip_special_tokens=True).strip()
+            selected = [order[0]] if selected_text else []
+        info["top_score"] = max(scores)
+
+    prompt = build_prompt(selected_text)
+    prompt_tokens = count_tokens(tokenizer, prompt)
+    info.update({
+        "context_sentences": len(selected),
+        "prompt_tokens": prompt_tokens,
+        "max_new_tokens": max(0, min(max_new_tokens, positions - prompt_tokens)),
+    })
+    return prompt, info
+
+
+def _join(sentences, selected):
+    """Gabungkan kalimat terpilih sesuai urutan aslinya di konteks"""
+    return " ".join(sentences[index] for index in sorted(selected))
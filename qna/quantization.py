@@ -0,0 +1,164 @@
+"""Presisi inferensi CPU: fp32, bf16, atau int8 dinamis (torch.ao.quantization.quantize_dynamic pada Linear).
+
+Model int8 disimpan ke disk setelah dikuantisasi pertama kali, sehingga start berikutnya langsung memuat
+hasil kuantisasi tanpa memuat bobot fp32 lalu mengkuantisasi ulang. Lokasi cache: QNA_CACHE_DIR
+(default ~/.cache/qna/quantized). File cache hanya berisi state_dict (dibaca dengan weights_only=True, tanpa
+unpickle kode); modul int8 dibangun ulang dari config lalu diisi state_dict tersebut. Kuncinya mencakup versi
+torch/transformers karena format bobot int8 terpaket bergantung pada versi.
+
+    python -m qna.quantization --model qwen2.5-1.5b --precisions fp32 bf16 int8 --data dev.jsonl"""
+
+import argparse
+import dataclasses
+import os
+import time
+
+PRECISIONS = {"fp32": "float32", "bf16": "bfloat16", "int8": "float32"}
+
+
+def cache_dir():
+    default = os.path.join(os.path.expanduser("~"), ".cache", "qna", "quantized")
+    return os.environ.get("QNA_CACHE_DIR", default)
+
+
+def cache_path(model_id, precision):
+    import torch
+    import transformers
+
+    name = model_id.replace("/", "--")
+    return os.path.join(
+        cache_dir(), name, f"{precision}-torch{torch.__version__}-tf{transformers.__version__}.state_dict.pt"
+    )
+
+
+def quantize_dynamic_int8(model):
+    """Kuantisasi dinamis int8 untuk semua Linear (bobot int8, aktivasi dikuantisasi saat jalan)"""
+    import torch
+
+    return torch.ao.quantization.quantize_dynamic(model.float(), {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def apply_precision(model, precision):
+    """Ubah model yang sudah dimuat ke presisi fp32/bf16/int8"""
+    import torch
+
+    if precision not in PRECISIONS:
+        raise ValueError(f"Presisi tidak dikenal: '{precision}'. Pilihan: {', '.join(PRECISIONS)}")
+    if precision == "int8":
+        return quantize_dynamic_int8(model)
+    return model.to(getattr(torch, PRECISIONS[precision]))
+
+
+def _int8_skeleton(spec, source, source_kwargs):
+    """Modul int8 kosong (bobot nol) dengan arsitektur model, siap diisi state_dict dari cache"""
+    import torch
+    from transformers import AutoConfig, GenerationConfig
+
+    from .snapshots import _model_class
+
+    try:
+        from transformers.initialization import no_init_weights
+    except ImportError:   # transformers 4.x
+        from transformers.modeling_utils import no_init_weights
+
+    config = AutoConfig.from_pretrained(source, trust_remote_code=spec.trust_remote_code, **source_kwargs)
+    with no_init_weights():
+        model = _model_class(spec.model_id).from_config(
+            config, dtype=torch.float32, trust_remote_code=spec.trust_remote_code
+        )
+    with torch.no_grad():
+        for parameter in model.parameters():
+            parameter.zero_()
+    try:
+        model.generation_config = GenerationConfig.from_pretrained(source, **source_kwargs)
+    except OSError:
+        pass
+    return quantize_dynamic_int8(model)
+
+
+def load_with_precision(spec, precision):
+    """Muat model di CPU dengan presisi tertentu; model int8 diambil dari cache disk jika ada"""
+    import torch
+    from transformers import AutoTokenizer
+
+    from .registry import LoadedModel, _load_pretrained
+    from .snapshots import pretrained_source
+
+    if precision not in PRECISIONS:
+        raise ValueError(f"Presisi tidak dikenal: '{precision}'. Pilihan: {', '.join(PRECISIONS)}")
+    cpu_spec = dataclasses.replace(spec, dtype=PRECISIONS[precision], device_map=None)
+    if precision != "int8":
+        return _load_pretrained(cpu_spec, device="cpu")
+
+    path = cache_path(spec.model_id, precision)
+    start_time = time.time()
+    if os.path.exists(path):
+        print(f"🔄 Memuat model int8 dari cache {path}...")
+        source, source_kwargs = pretrained_source(spec.model_id)
+        tokenizer = AutoTokenizer.from_pretrained(source, trust_remote_code=spec.trust_remote_code, **source_kwargs)
+        model = _int8_skeleton(spec, source, source_kwargs)
+        model.load_state_dict(torch.load(path, weights_only=True))
+        model.eval()
+        load_time = time.time() - start_time
+        print(f"✅ Model int8 dimuat dalam {load_time:.2f} detik")
+        return LoadedModel(spec, tokenizer, model, load_time)
+
+    lm = _load_pretrained(cpu_spec, device="cpu")
+    print(f"🔧 Kuantisasi int8 {spec.model_id}...")
+    lm.model = quantize_dynamic_int8(lm.model).eval()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = path + ".tmp"
+    torch.save(lm.model.state_dict(), temporary)
+    os.replace(temporary, path)
+    lm.load_time = time.time() - start_time
+    print(f"💾 Model int8 disimpan ke {path}")
+    return lm
+
+
+def main(argv=None):
+    from .evaluation import SAMPLE_SET, print_report, read_dataset, run_evaluation
+    from .benchmark import CONTEXT
+    from .registry import get_spec
+
+    parser = argparse.ArgumentParser(description="Bandingkan presisi CPU (fp32/bf16/int8) dan siapkan cache int8")
+    parser.add_argument("--model", required=True, help="id Hugging Face atau alias model")
+    parser.add_argument("--precisions", nargs="+", default=["fp32", "int8"], choices=list(PRECISIONS))
+    parser.add_argument("--data", help="set evaluasi JSONL (default: set contoh kecil)")
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("--max-new-tokens", type=int, default=64)
+    parser.add_argument("--tiny", action="store_true", help="pakai model mini berbobot acak (offline, CPU)")
+    args = parser.parse_args(argv)
+
+    items = read_dataset(args.data) if args.data else [dict(item, context=CONTEXT) for item in SAMPLE_SET]
+    items = items[:args.limit] if args.limit else items
+
+    model_id = get_spec(args.model).model_id
+    configs = [
+        {
+            "model": model_id,
+            "precision": precision,
+            "dtype": PRECISIONS[precision],
+            "quantization": "int8" if precision == "int8" else "none",
+            "max_new_tokens": args.max_new_tokens,
+            "tiny": args.tiny,
+        }
+        for precision in args.precisions
+    ]
+    results, _ = run_evaluation(configs, items, workers=1)
+    print_report(results)
+
+    reference = next((r for r in results if r.get("precision") == args.precisions[0] and "error" not in r), None)
+    if reference is None:
+        return
+    print(f"\nPerubahan terhadap {args.precisions[0]}:")
+    for r in results:
+        if "error" in r or r is reference:
+            continue
+        print(f"  {r['precision']:<5} EM {r['exact_match'] - reference['exact_match']:+.1f}  "
+              f"F1 {r['f1'] - reference['f1']:+.1f}  "
+              f"memori model {r['model_mb'] / reference['model_mb']:.2f}×  "
+              f"latensi p50 {r['latency_p50_ms'] / reference['latency_p50_ms']:.2f}×")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,429 @@
+import os
+import time
+from dataclasses import dataclass, field
+
+from .pool import ModelPool
+from .snapshots import pretrained_source, snapshot_path
+from .startup import StartupReport
+from .stopping import StopRules, stopping_criteria
+
+
+@dataclass
+class ModelSpec:
+    """Konfigurasi satu model: format prompt, dtype, dan aturan ekstraksi jawaban"""
+
+    model_id: str
+    alias: str = None
+    task: str = "text-generation"       # "text-generation" atau "question-answering"
+    prompt_template: str = "{question}"  # Dipakai jika use_chat_template=False
+    use_chat_template: bool = False
+    system_prompt: str = None
+    dtype: str = "float16"               # "float16", "bfloat16", "float32" atau "auto"
+    extraction: str = "full"             # "full", "after_marker", "llama3" atau "new_tokens"
+    answer_marker: str = "Jawaban:"
+    device_map: str = "auto"
+    trust_remote_code: bool = False
+    low_cpu_mem_usage: bool = False
+    cache_reuse: bool = True             # Boleh memakai ulang KV-cache (prefix/sesi); False untuk cache non-standar
+    precision: str = None                # Presisi di CPU: "fp32", "bf16", "int8" (None = ikuti QNA_PRECISION)
+    backend: str = None                  # "torch" atau "onnx" (None = ikuti QNA_BACKEND, default torch)
+    draft_model: str = None              # Model kecil bertokenizer sama untuk speculative decoding
+    stop_rules: StopRules = None         # Kapan generate berhenti (stop string, jumlah kalimat, baris kosong)
+    params_b: float = None               # Jumlah parameter (miliar), untuk estimasi memori sebelum dimuat
+    embedding_params_b: float = None     # Bagiannya yang berupa embedding (tetap fp32 pada int8 dinamis)
+    generation: dict = field(default_factory=dict)
+
+    def estimated_bytes(self):
+        """Perkiraan memori bobot sebelum model dimuat (0 jika tidak diketahui): jumlah parameter x byte per
+        parameter sesuai dtype/presisi, atau ukuran file safetensors di snapshot lokal"""
+        precision = self.precision or os.environ.get("QNA_PRECISION")
+        if self.params_b and precision == "int8":
+            # quantize_dynamic hanya mengubah Linear; embedding tetap fp32 (tanpa data: anggap semuanya fp32)
+            embedding = self.params_b if self.embedding_params_b is None else self.embedding_params_b
+            return int(((self.params_b - embedding) * 1 + embedding * 4) * 1e9)
+        if self.params_b:
+            bytes_per_param = _PRECISION_BYTES.get(precision) or _DTYPE_BYTES.get(self.dtype, 2)
+            return int(self.params_b * 1e9 * bytes_per_param)
+        path = snapshot_path(self.model_id)
+        if path is None:
+            return 0
+        return sum(entry.stat().st_size for entry in os.scandir(path) if entry.name.endswith(".safetensors"))
+
+    def build_prompt(self, tokenizer, question, context=None):
+        """Susun prompt sesuai format model, dengan konteks (mis. hasil retrieval) jika ada"""
+        return self.build_chat_prompt(tokenizer, [], question, context)
+
+    def build_chat_prompt(self, tokenizer, history, question, context=None):
+        """Susun prompt multi-turn; history berisi pasangan (pertanyaan, jawaban) sebelumnya"""
+        if not self.use_chat_template:
+            turns = [self.prompt_template.format(question=q) + f" {a}\n" for q, a in history]
+            prefix = f"Konteks: {context}\n\n" if context else ""
+            return prefix + "".join(turns) + self.prompt_template.format(question=question)
+
+        if context:
+            question = f"Konteks: {context}\n\nPertanyaan: {question}"
+
+        messages = []
+        if self.system_prompt:
+            messages.append({"role": "system", "content": self.system_prompt})
+        for q, a in history:
+            messages.append({"role": "user", "content": q})
+            messages.append({"role": "assistant", "content": a})
+        messages.append({"role": "user", "content": question})
+        return tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
+
+    def extract_answer(self, tokenizer, output_ids, prompt_length, stop_rules=None):
+        """Ambil jawaban dari token hasil generate sesuai aturan ekstraksi model, dipotong dengan
+        stop_rules (default: StopRules bawaan model)"""
+        stop_rules = stop_rules or self.stop_rules
+        if stop_rules and self.extraction in ("new_tokens", "after_marker"):
+            # Prompt diakhiri penanda jawaban, jadi jawaban = token baru sampai titik berhenti
+            # (blok "Pertanyaan:" baru dan sesudahnya dibuang)
+            return stop_rules.trim(tokenizer.decode(output_ids[prompt_length:], skip_special_tokens=True))
+
+        if self.extraction == "new_tokens":
+            return tokenizer.decode(output_ids[prompt_length:], skip_special_tokens=True).strip()
+
+        if self.extraction == "llama3":
+            response = tokenizer.decode(output_ids, skip_special_tokens=False)
+            # Hilangkan bagian system prompt dan user input
+            answer = response.split("<|start_header_id|>assistant<|end_header_id|>")[-1].strip()
+            answer = answer.split("<|eot_id|>")[0].strip()
+            return stop_rules.trim(answer) if stop_rules else answer
+
+        response = tokenizer.decode(output_ids, skip_special_tokens=True)
+        if self.extraction == "after_marker":
+            return response.split(self.answer_marker)[-1].strip()
+        return response.strip()
+
+
+# Byte per parameter untuk estimasi memori ("auto" biasanya bf16/fp16)
+_DTYPE_BYTES = {"float32": 4, "float16": 2, "bfloat16": 2, "auto": 2}
+_PRECISION_BYTES = {"fp32": 4, "bf16": 2}
+
+
+class LoadedModel:
+    """Tokenizer dan model yang sudah dimuat ke memori"""
+
+    def __init__(self, spec, tokenizer, model, load_time, startup=None):
+        self.spec = spec
+        self.tokenizer = tokenizer
+        self.model = model
+        self.load_time = load_time
+        self.startup = startup or {}   # Rincian waktu start-up per tahap (detik)
+        self._qa_pipeline = None
+        self._prefix_cache = None
+
+    @property
+    def device(self):
+        return self.model.device
+
+    def stop_rules(self, overrides):
+        """StopRules untuk satu panggilan: override "stop_rules" (None = tanpa aturan) atau bawaan model"""
+        return overrides.get("stop_rules", self.spec.stop_rules)
+
+    def generation_kwargs(self, **overrides):
+        """Parameter generate bawaan model, bisa ditimpa per panggilan.
+        Aturan berhenti (override "stop_rules") dipasang sebagai stopping_criteria baru untuk setiap panggilan."""
+        pad_token_id = self.tokenizer.pad_token_id
+        if pad_token_id is None:
+            pad_token_id = self.tokenizer.eos_token_id
+
+        kwargs = {
+            "eos_token_id": self.tokenizer.eos_token_id,
+            "pad_token_id": pad_token_id,
+        }
+        kwargs.update(self.spec.generation)
+        criteria = stopping_criteria(self.tokenizer, self.stop_rules(overrides))
+        kwargs.update({key: value for key, value in overrides.items() if key != "stop_rules"})
+        if criteria is not None:
+            from .stopping import add_criteria
+
+            add_criteria(kwargs, criteria)
+        return kwargs
+
+    @property
+    def prefix_cache(self):
+        """Cache KV bersama untuk prefix prompt tetap (None jika model tidak mendukung)"""
+        if not self.spec.cache_reuse or self.spec.task != "text-generation":
+            return None
+        if self._prefix_cache is None:
+            from .prefix_cache import PrefixCache
+
+            self._prefix_cache = PrefixCache(self)
+        return self._prefix_cache
+
+    def prefill_kwargs(self, input_ids):
+        """kwargs past_key_values dari prefix cache untuk model.generate"""
+        if self.prefix_cache is None:
+            return {}
+        return self.prefix_cache.generation_kwargs(input_ids)
+
+    def qa_pipeline(self):
+        """Pipeline question-answering (hanya untuk model ekstraktif)"""
+        if self._qa_pipeline is None:
+            from transformers import pipeline
+
+            self._qa_pipeline = pipeline(
+                "question-answering",
+                model=self.model,
+                tokenizer=self.tokenizer,
+            )
+        return self._qa_pipeline
+
+
+_SAMPLING = {"do_sample": True, "temperature": 0.7, "top_p": 0.9}
+
+REGISTRY = {}
+_ALIASES = {}
+
+
+def register(spec):
+    """Daftarkan model baru ke registry"""
+    REGISTRY[spec.model_id] = spec
+    if spec.alias:
+        _ALIASES[spec.alias] = spec.model_id
+    return spec
+
+
+def get_spec(name):
+    """Cari spesifikasi model berdasarkan id Hugging Face atau alias"""
+    model_id = _ALIASES.get(name, name)
+    if model_id not in REGISTRY:
+        raise KeyError(f"Model tidak dikenal: '{name}'. Pilihan: {', '.join(list_models())}")
+    return REGISTRY[model_id]
+
+
+def list_models():
+    return sorted(REGISTRY)
+
+
+def resolve_dtype(dtype):
+    """Ubah nama dtype di registry menjadi torch.dtype"""
+    if dtype == "auto":
+        return "auto"
+
+    import torch
+
+    return getattr(torch, dtype)
+
+
+def _load_pretrained(spec, device=None, report=None):
+    """Muat tokenizer dan model (dari snapshot lokal jika ada, lihat qna.snapshots); waktu setiap tahap
+    dicatat di report dan disimpan di LoadedModel.startup"""
+    report = report or StartupReport()
+    start_time = time.time()
+    with report.stage("impor torch"):
+        import torch
+    with report.stage("impor transformers"):
+        from transformers import AutoModelForCausalLM, AutoModelForQuestionAnswering, AutoTokenizer
+
+    model_class = AutoModelForQuestionAnswering if spec.task == "question-answering" else AutoModelForCausalLM
+    source, source_kwargs = pretrained_source(spec.model_id)
+    if source_kwargs:
+        print(f"📦 Snapshot lokal: {source}")
+
+    print(f"🔄 Memuat tokenizer {spec.model_id}...")
+    with report.stage("tokenizer"):
+        tokenizer = AutoTokenizer.from_pretrained(source, trust_remote_code=spec.trust_remote_code, **source_kwargs)
+
+    print(f"🔄 Memuat model {spec.model_id}...")
+    kwargs = dict(source_kwargs, torch_dtype=resolve_dtype(spec.dtype), trust_remote_code=spec.trust_remote_code)
+    if source_kwargs:
+        # Snapshot selalu berisi safetensors: bobot dipetakan dengan mmap, tidak pernah jatuh ke pickle .bin
+        kwargs["use_safetensors"] = True
+    if spec.low_cpu_mem_usage:
+        kwargs["low_cpu_mem_usage"] = True
+    if spec.device_map:
+        kwargs["device_map"] = spec.device_map
+
+    with report.stage("bobot"):
+        model = model_class.from_pretrained(source, **kwargs)
+        if not spec.device_map:
+            # Jika ada GPU, gunakan CUDA
+            model.to(device or ("cuda" if torch.cuda.is_available() else "cpu"))
+        model.eval()
+
+    load_time = time.time() - start_time
+    print(f"✅ Model dimuat dalam {load_time:.2f} detik (device: {model.device})")
+    print(f"⏱️ Rincian start-up: {report}")
+    return LoadedModel(spec, tokenizer, model, load_time, report.stages)
+
+
+def _load(spec):
+    report = StartupReport()
+    with report.stage("impor torch"):
+        import torch
+
+    if (spec.backend or os.environ.get("QNA_BACKEND")) == "onnx":
+        from .onnx_backend import load_onnx
+
+        return load_onnx(spec)
+
+    # Presisi CPU (fp32/bf16/int8) hanya berlaku jika tidak ada GPU
+    precision = spec.precision or os.environ.get("QNA_PRECISION")
+    if precision and not torch.cuda.is_available():
+        from .quantization import load_with_precision
+
+        return load_with_precision(spec, precision)
+    return _load_pretrained(spec, report=report)
+
+
+def _budget_from_env():
+    value = os.environ.get("QNA_MEMORY_BUDGET_MB")
+    return float(value) if value else None
+
+
+# Pool bersama untuk semua model; budget memori diatur lewat QNA_MEMORY_BUDGET_MB
+pool = ModelPool(_load, memory_budget_mb=_budget_from_env())
+
+
+def load_model(name):
+    """Muat model saat pertama kali diminta, selanjutnya pakai yang sudah ada di pool"""
+    return pool.get(get_spec(name))
+
+
+def unload_model(name):
+    """Lepaskan model dari memori"""
+    pool.evict(get_spec(name).model_id)
+
+
+def loaded_models():
+    return pool.loaded()
+
+
+def set_memory_budget(memory_budget_mb):
+    """Ubah budget memori pool bersama"""
+    pool.set_budget(memory_budget_mb)
+
+
+def set_precision(precision):
+    """Presisi CPU bawaan untuk model yang dimuat berikutnya ("fp32", "bf16", "int8" atau None).
+    Disimpan di QNA_PRECISION agar ikut ke proses worker."""
+    if precision:
+        os.environ["QNA_PRECISION"] = precision
+    else:
+        os.environ.pop("QNA_PRECISION", None)
+
+
+def set_backend(backend, threads=None):
+    """Backend inferensi untuk model yang dimuat berikutnya ("torch" atau "onnx") dan jumlah thread
+    onnxruntime. Disimpan di QNA_BACKEND/QNA_ORT_THREADS agar ikut ke proses worker."""
+    if backend and backend != "torch":
+        os.environ["QNA_BACKEND"] = backend
+    else:
+        os.environ.pop("QNA_BACKEND", None)
+    if threads:
+        os.environ["QNA_ORT_THREADS"] = str(threads)
+
+
+# Qwen2.5 / Qwen3 memakai prompt mentah tanpa chat template
+# (model Qwen2.5 lebih besar memakai 0.5B sebagai draft speculative decoding)
+for _model_id, _alias, _draft, _params_b, _embedding_b in [
+    ("Qwen/Qwen2.5-0.5B-Instruct", "qwen2.5-0.5b", None, 0.49, 0.136),
+    ("Qwen/Qwen2.5-1.5B-Instruct", "qwen2.5-1.5b", "qwen2.5-0.5b", 1.54, 0.233),
+    ("Qwen/Qwen2.5-3B-Instruct", "qwen2.5-3b", "qwen2.5-0.5b", 3.09, 0.311),
+    ("Qwen/Qwen3-4B", "qwen3-4b", None, 4.02, 0.389),
+]:
+    register(ModelSpec(
+        model_id=_model_id,
+        alias=_alias,
+        draft_model=_draft,
+        params_b=_params_b,
+        embedding_params_b=_embedding_b,
+        prompt_template="<|begin_of_sentence|>{question}",
+        trust_remote_code=True,
+        generation=dict(_SAMPLING, max_new_tokens=200, repetition_penalty=1.2),
+    ))
+
+# Llama 3 memakai chat template, jawaban diambil dari header assistant
+register(ModelSpec(
+    model_id="meta-llama/Llama-3.2-1B-Instruct",
+    alias="llama3.2-1b",
+    params_b=1.24,
+    embedding_params_b=0.263,
+    use_chat_template=True,
+    system_prompt="You are a helpful assistant.",
+    extraction="llama3",
+    low_cpu_mem_usage=True,
+    generation=dict(_SAMPLING, max_new_tokens=200, repetition_penalty=1.1),
+))
+register(ModelSpec(
+    model_id="meta-llama/Llama-3.2-3B-Instruct",
+    alias="llama3.2-3b",
+    params_b=3.21,
+    embedding_params_b=0.394,
+    draft_model="llama3.2-1b",
+    use_chat_template=True,
+    system_prompt="You are a helpful assistant.",
+    extraction="llama3",
+    low_cpu_mem_usage=True,
+    trust_remote_code=True,
+    generation=dict(_SAMPLING, max_new_tokens=200, repetition_penalty=1.2),
+))
+register(ModelSpec(
+    model_id="GoToCompany/llama3-8b-cpt-sahabatai-v1-instruct",
+    alias="sahabatai-llama3-8b",
+    params_b=8.03,
+    embedding_params_b=0.525,
+    use_chat_template=True,
+    system_prompt="Anda adalah asisten AI Sahabat AI yang ramah dan membantu.",
+    extraction="llama3",
+    low_cpu_mem_usage=True,
+    trust_remote_code=True,
+    generation=dict(_SAMPLING, max_new_tokens=256, repetition_penalty=1.1),
+))
+register(ModelSpec(
+    model_id="Sahabat-AI/gemma2-9b-cpt-sahabatai-v1-instruct",
+    alias="sahabatai-gemma2-9b",
+    params_b=9.24,
+    embedding_params_b=0.918,
+    use_chat_template=True,
+    system_prompt="Anda adalah asisten AI yang membantu.",
+    dtype="auto",
+    extraction="new_tokens",
+    trust_remote_code=True,
+    cache_reuse=False,   # Gemma2 memakai HybridCache (sliding window)
+    generation=dict(_SAMPLING, max_new_tokens=512, top_p=0.95),
+))
+
+# GPT2 Indonesia: format "Pertanyaan/Jawaban", ambil teks setelah "Jawaban:".
+# Generate berhenti begitu model memulai blok tanya jawab baru atau baris kosong.
+_QA_BLOCK_STOP = StopRules(stop=("Pertanyaan:", "Jawaban:"), stop_at_blank_line=True)
+# ("522M" di nama GPT2 Indonesia adalah ukuran data latih; modelnya GPT2-large, 774M parameter)
+for _model_id, _alias, _params_b, _embedding_b in [
+    ("cahya/gpt2-large-indonesian-522M", "gpt2-indo", 0.774, 0.066),
+    ("indobenchmark/indogpt", "indogpt", 0.117, 0.032),
+]:
+    register(ModelSpec(
+        model_id=_model_id,
+        alias=_alias,
+        params_b=_params_b,
+        embedding_params_b=_embedding_b,
+        prompt_template="Pertanyaan: {question}\nJawaban:",
+        dtype="float32",
+        extraction="after_marker",
+        device_map=None,
+        stop_rules=_QA_BLOCK_STOP,
+        generation=dict(_SAMPLING, max_new_tokens=100, repetition_penalty=1.2),
+    ))
+
+# Model QA ekstraktif (jawaban berupa potongan konteks)
+register(ModelSpec(
+    model_id="indolem/indobert-base-uncased",
+    alias="indobert",
+    params_b=0.11,
+    embedding_params_b=0.025,
+    task="question-answering",
+    dtype="float32",
+    device_map=None,
+))
+register(ModelSpec(
+    model_id="cahya/bert-base-indonesian-tydiqa",
+    alias="indobert-tydiqa",
+    params_b=0.11,
+    embedding_params_b=0.025,
+    task="question-answering",
+    dtype="float32",
+    device_map=None,
+))
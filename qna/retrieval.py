@@ -0,0 +1,325 @@
+"""Retrieval passage untuk QA: index BM25 (inverted index) dengan tokenisasi Bahasa Indonesia,
+ditambah index dense (embedding) opsional.
+
+Index disimpan di direktori sebagai segmen-segmen (seg_00000, seg_00001, ...). Menambah dokumen
+hanya menulis segmen baru, dan semua array dibuka dengan numpy memmap sehingga index besar
+tidak perlu dimuat penuh ke memori."""
+
+import argparse
+import math
+import os
+import re
+import shutil
+
+from .passage_store import PassageStore, PassageStoreWriter, read_corpus
+
+STOPWORDS = set("""
+ada adalah agar akan aku amat anda antara apa apabila apakah atas atau bagai bagaimana bagi bahkan
+bahwa baik banyak beberapa begitu belum berapa berbagai bisa boleh bukan dalam dan dapat dari daripada
+demikian dengan di dia dimana ia ini itu jadi jika juga kalau kami kamu kapan karena ke kemudian kenapa
+kepada ketika kita lagi lain lalu maka mana masih mengapa menjadi menurut mereka merupakan mungkin nya
+oleh pada para pernah saat saja sama sampai sangat saya se sebagai sebelum sedang sehingga sejak
+sekali semua seperti serta siapa sudah supaya tanpa tapi telah tentang tersebut tetapi tidak untuk
+yaitu yakni yang
+""".split())
+
+_PARTICLES = ("nya", "lah", "kah", "pun")
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text):
+    """Tokenisasi Bahasa Indonesia: huruf kecil, buang stopword dan partikel (-nya, -lah, -kah, -pun)"""
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        for particle in _PARTICLES:
+            if token.endswith(particle) and len(token) - len(particle) >= 4:
+                token = token[:-len(particle)]
+                break
+        if token not in STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+class _Segment:
+    """Satu segmen index yang sudah ditulis ke disk (dibuka dengan memmap)"""
+
+    def __init__(self, path):
+        import numpy as np
+
+        self.path = path
+        # Kosakata terurut: byte UTF-8 semua term digabung + offset, dicari dengan binary search
+        terms_path = os.path.join(path, "terms.bin")
+        # memmap tidak bisa membuka file kosong (segmen tanpa term)
+        self.term_bytes = (np.memmap(terms_path, dtype=np.uint8, mode="r") if os.path.getsize(terms_path)
+                           else np.zeros(0, dtype=np.uint8))
+        self.term_offsets = np.load(os.path.join(path, "term_offsets.npy"), mmap_mode="r")
+        self.term_spans = np.load(os.path.join(path, "term_spans.npy"), mmap_mode="r")
+        self.doc_ids = np.load(os.path.join(path, "postings_docs.npy"), mmap_mode="r")
+        self.term_freqs = np.load(os.path.join(path, "postings_tf.npy"), mmap_mode="r")
+        self.doc_lengths = np.load(os.path.join(path, "doc_lengths.npy"), mmap_mode="r")
+        dense_path = os.path.join(path, "dense.npy")
+        self.dense = np.load(dense_path, mmap_mode="r") if os.path.exists(dense_path) else None
+        self.passages = PassageStore(path)
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def _find(self, term):
+        key = term.encode("utf-8")
+        low, high = 0, len(self.term_offsets) - 1
+        while low < high:
+            middle = (low + high) // 2
+            current = self.term_bytes[self.term_offsets[middle]:self.term_offsets[middle + 1]].tobytes()
+            if current == key:
+                return int(self.term_spans[middle]), int(self.term_spans[middle + 1])
+            if current < key:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def postings(self, term):
+        span = self._find(term)
+        if span is None:
+            return None, None
+        return self.doc_ids[span[0]:span[1]], self.term_freqs[span[0]:span[1]]
+
+
+def write_segment(path, passages, embed=None):
+    """Tulis satu segmen: inverted index BM25, panjang dokumen, passage, dan embedding (opsional).
+    Segmen ditulis ke direktori sementara lalu di-rename agar pembaca tidak melihat segmen setengah jadi."""
+    import numpy as np
+
+    final_path = path
+    path = os.path.join(os.path.dirname(final_path), "." + os.path.basename(final_path) + ".tmp")
+    # Sisa run yang terhenti dibuang: PassageStoreWriter melanjutkan file yang sudah ada
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    postings = {}
+    doc_lengths = []
+    for doc_id, passage in enumerate(passages):
+        tokens = tokenize(passage["text"])
+        doc_lengths.append(len(tokens))
+        counts = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for token, count in counts.items():
+            postings.setdefault(token, []).append((doc_id, count))
+
+    # Term diurutkan (urutan code point = urutan byte UTF-8); postings term ke-i ada di
+    # term_spans[i]:term_spans[i + 1], byte term-nya di terms.bin[term_offsets[i]:term_offsets[i + 1]]
+    terms = sorted(postings)
+    encoded = [term.encode("utf-8") for term in terms]
+    term_offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    term_offsets[1:] = np.cumsum([len(term) for term in encoded])
+    term_spans = np.zeros(len(terms) + 1, dtype=np.int64)
+    term_spans[1:] = np.cumsum([len(postings[term]) for term in terms])
+    doc_ids, term_freqs = [], []
+    for term in terms:
+        for doc_id, count in postings[term]:
+            doc_ids.append(doc_id)
+            term_freqs.append(count)
+
+    np.save(os.path.join(path, "postings_docs.npy"), np.asarray(doc_ids, dtype=np.int32))
+    np.save(os.path.join(path, "postings_tf.npy"), np.asarray(term_freqs, dtype=np.float32))
+    np.save(os.path.join(path, "doc_lengths.npy"), np.asarray(doc_lengths, dtype=np.float32))
+    with open(os.path.join(path, "terms.bin"), "wb") as f:
+        f.write(b"".join(encoded))
+    np.save(os.path.join(path, "term_offsets.npy"), term_offsets)
+    np.save(os.path.join(path, "term_spans.npy"), term_spans)
+    with PassageStoreWriter(path) as writer:
+        writer.add_all(passages)
+
+    if embed is not None:
+        vectors = [embed([p["text"] for p in passages[i:i + 256]]) for i in range(0, len(passages), 256)]
+        np.save(os.path.join(path, "dense.npy"), np.concatenate(vectors).astype(np.float32))
+
+    os.rename(path, final_path)
+
+
+class IndexWriter:
+    """Menambah passage ke index secara bertahap; setiap `segment_size` passage ditulis sebagai segmen baru"""
+
+    def __init__(self, path, embed=None, segment_size=50000):
+        self.path = path
+        self.embed = embed
+        self.segment_size = segment_size
+        self._buffer = []
+        os.makedirs(path, exist_ok=True)
+
+    def _next_segment(self):
+        existing = [name for name in os.listdir(self.path) if name.startswith("seg_")]
+        return os.path.join(self.path, f"seg_{len(existing):05d}")
+
+    def add(self, passage):
+        self._buffer.append(passage)
+        if len(self._buffer) >= self.segment_size:
+            self.flush()
+
+    def add_all(self, passages):
+        for passage in passages:
+            self.add(passage)
+
+    def flush(self):
+        if not self._buffer:
+            return
+        write_segment(self._next_segment(), self._buffer, self.embed)
+        self._buffer = []
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Retriever:
+    """Cari top-k passage untuk sebuah pertanyaan dengan BM25, dense, atau gabungan keduanya (hybrid)"""
+
+    def __init__(self, path, embed=None, k1=1.5, b=0.75):
+        self.path = path
+        self.embed = embed
+        self.k1 = k1
+        self.b = b
+        self.segments = [
+            _Segment(os.path.join(path, name))
+            for name in sorted(os.listdir(path))
+            if name.startswith("seg_")
+        ]
+        self.total_docs = sum(len(segment) for segment in self.segments)
+        total_length = sum(float(segment.doc_lengths.sum()) for segment in self.segments)
+        self.avg_length = total_length / self.total_docs if self.total_docs else 0.0
+
+    def __len__(self):
+        return self.total_docs
+
+    def _locate(self, doc_id):
+        for segment in self.segments:
+            if doc_id < len(segment):
+                return segment, doc_id
+            doc_id -= len(segment)
+        raise IndexError(doc_id)
+
+    def passage(self, doc_id):
+        segment, local_id = self._locate(doc_id)
+        return segment.passages.get(local_id)
+
+    def bm25_scores(self, question):
+        """Skor BM25 untuk semua passage (array numpy sepanjang jumlah passage)"""
+        import numpy as np
+
+        terms = set(tokenize(question))
+        scores = np.zeros(self.total_docs, dtype=np.float32)
+        postings = {term: [segment.postings(term) for segment in self.segments] for term in terms}
+        for term, per_segment in postings.items():
+            df = sum(len(docs) for docs, _ in per_segment if docs is not None)
+            if df == 0:
+                continue
+            idf = math.log(1 + (self.total_docs - df + 0.5) / (df + 0.5))
+            base = 0
+            for segment, (docs, tfs) in zip(self.segments, per_segment):
+                if docs is not None:
+                    norm = self.k1 * (1 - self.b + self.b * segment.doc_lengths[docs] / self.avg_length)
+                    scores[base + docs] += idf * tfs * (self.k1 + 1) / (tfs + norm)
+                base += len(segment)
+        return scores
+
+    def dense_scores(self, question):
+        """Cosine similarity pertanyaan dengan semua passage (butuh index dense dan fungsi embed)"""
+        import numpy as np
+
+        if self.embed is None or any(segment.dense is None for segment in self.segments):
+            raise ValueError("Index dense tidak tersedia (bangun index dengan --dense dan berikan embed)")
+        query = self.embed([question])[0].astype(np.float32)
+        return np.concatenate([segment.dense @ query for segment in self.segments])
+
+    @staticmethod
+    def _top(scores, top_k):
+        import numpy as np
+
+        top_k = min(top_k, len(scores))
+        if top_k == 0:
+            return []
+        index = np.argpartition(-scores, top_k - 1)[:top_k]
+        return index[np.argsort(-scores[index])].tolist()
+
+    def search(self, question, top_k=5, mode="bm25"):
+        """Top-k passage (dict id, text, source, score) untuk pertanyaan; mode: bm25, dense, atau hybrid"""
+        if mode == "bm25":
+            scores = self.bm25_scores(question)
+        elif mode == "dense":
+            scores = self.dense_scores(question)
+        elif mode == "hybrid":
+            scores = self._reciprocal_rank_fusion(
+                [self.bm25_scores(question), self.dense_scores(question)], depth=max(100, top_k * 10)
+            )
+        else:
+            raise ValueError(f"Mode retrieval tidak dikenal: '{mode}'")
+
+        results = []
+        for doc_id in self._top(scores, top_k):
+            if mode != "dense" and scores[doc_id] <= 0:
+                break
+            passage = dict(self.passage(doc_id), score=float(scores[doc_id]))
+            results.append(passage)
+        return results
+
+    def _reciprocal_rank_fusion(self, score_lists, depth, k=60):
+        import numpy as np
+
+        fused = np.zeros(self.total_docs, dtype=np.float32)
+        for scores in score_lists:
+            for rank, doc_id in enumerate(self._top(scores, depth)):
+                fused[doc_id] += 1.0 / (k + rank + 1)
+        return fused
+
+    def context_for(self, question, top_k=3, mode="bm25"):
+        """Gabungan teks top-k passage, siap dipakai sebagai konteks QA / prompt"""
+        return "\n\n".join(p["text"] for p in self.search(question, top_k, mode))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bangun dan cari index retrieval passage")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="tambahkan dokumen (txt/md/jsonl) ke index")
+    build.add_argument("--index", required=True, help="direktori index")
+    build.add_argument("--dense", action="store_true", help="buat juga index embedding")
+    build.add_argument("--segment-size", type=int, default=50000)
+    build.add_argument("--max-words", type=int, default=120, help="panjang passage untuk txt/md")
+    build.add_argument("files", nargs="+")
+
+    search = subparsers.add_parser("search", help="cari passage untuk sebuah pertanyaan")
+    search.add_argument("--index", required=True)
+    search.add_argument("--top-k", type=int, default=5)
+    search.add_argument("--mode", choices=["bm25", "dense", "hybrid"], default="bm25")
+    search.add_argument("question")
+
+    args = parser.parse_args(argv)
+    embed = None
+    if getattr(args, "dense", False) or getattr(args, "mode", "bm25") != "bm25":
+        from .semantic_cache import load_embedder
+
+        embed = load_embedder()
+
+    if args.command == "build":
+        with IndexWriter(args.index, embed=embed, segment_size=args.segment_size) as writer:
+            writer.add_all(read_corpus(args.files, args.max_words))
+        print(f"✅ Index tersimpan di {args.index} ({len(Retriever(args.index))} passage)")
+        return
+
+    import time
+
+    retriever = Retriever(args.index, embed=embed)
+    start_time = time.time()
+    results = retriever.search(args.question, args.top_k, args.mode)
+    print(f"🔎 {len(results)} passage dalam {(time.time() - start_time) * 1000:.1f} ms\n")
+    for rank, passage in enumerate(results, start=1):
+        print(f"{rank}. [{passage['score']:.3f}] {passage['id']}\n   {passage['text'][:200]}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Pemilihan token berikutnya dari logits untuk loop decode manual
+(scheduler dan speculative decoding), mengikuti parameter generate bawaan HF"""
+
+
+def apply_repetition_penalty(logits, history, penalty):
+    """Kurangi skor token yang sudah muncul (sama seperti RepetitionPenaltyLogitsProcessor)"""
+    import torch
+
+    if penalty == 1.0 or not history:
+        return logits
+    index = torch.tensor(sorted(set(history)), device=logits.device)
+    scores = logits.index_select(-1, index)
+    scores = torch.where(scores < 0, scores * penalty, scores / penalty)
+    logits = logits.clone()
+    logits.index_copy_(-1, index, scores)
+    return logits
+
+
+def next_token_probs(logits, history=None, temperature=1.0, top_p=1.0, repetition_penalty=1.0, do_sample=False):
+    """Distribusi probabilitas token berikutnya untuk satu baris logits [vocab].
+    Untuk greedy (do_sample=False) distribusinya one-hot pada argmax."""
+    import torch
+
+    logits = apply_repetition_penalty(logits.float(), history, repetition_penalty)
+    if not do_sample:
+        probs = torch.zeros_like(logits)
+        probs[logits.argmax(-1)] = 1.0
+        return probs
+
+    if temperature and temperature != 1.0:
+        logits = logits / temperature
+
+    if top_p is not None and top_p < 1.0:
+        sorted_logits, sorted_index = torch.sort(logits, descending=True)
+        cumulative = sorted_logits.softmax(-1).cumsum(-1)
+        # Buang token di luar nucleus, token teratas selalu dipertahankan
+        remove = cumulative - sorted_logits.softmax(-1) >= top_p
+        sorted_logits = sorted_logits.masked_fill(remove, float("-inf"))
+        logits = torch.full_like(logits, float("-inf")).scatter(-1, sorted_index, sorted_logits)
+
+    return logits.softmax(-1)
+
+
+def sample_token(logits, history=None, **params):
+    """Pilih satu token (int) dari logits [vocab]"""
+    import torch
+
+    probs = next_token_probs(logits, history, **params)
+    if not params.get("do_sample"):
+        return int(probs.argmax(-1))
+    return int(torch.multinomial(probs, 1))
+
+
+def sampling_params(kwargs):
+    """Ambil parameter sampling yang relevan dari kwargs generate"""
+    return {
+        "temperature": kwargs.get("temperature", 1.0),
+        "top_p": kwargs.get("top_p", 1.0),
+        "repetition_penalty": kwargs.get("repetition_penalty", 1.0),
+        "do_sample": kwargs.get("do_sample", False),
+    }
+
+
+def eos_ids(eos_token_id):
+    """Normalisasi eos_token_id (int, list, atau None) menjadi set"""
+    if eos_token_id is None:
+        return set()
+    if isinstance(eos_token_id, int):
+        return {eos_token_id}
+    return set(eos_token_id)
@@ -0,0 +1,240 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from . import kv
+from .registry import load_model
+from .sampling import eos_ids, sample_token, sampling_params
+from .stopping import TextStop
+
+
+class _Sequence:
+    def __init__(self, question, overrides):
+        self.question = question
+        self.overrides = overrides
+        self.future = Future()
+        self.enqueued_at = time.time()
+        self.started_at = None
+        self.first_token_at = None
+        self.prompt_ids = []
+        self.generated = []
+        self.next_token = None
+        self.max_new_tokens = None
+        self.params = None
+        self.eos = set()
+        self.stop = None
+
+    def append(self, token):
+        self.generated.append(token)
+        self.next_token = token
+        if self.stop is not None:
+            self.stop.extend([token])
+
+    @property
+    def finished(self):
+        if self.generated and self.generated[-1] in self.eos:
+            return True
+        if self.stop is not None and self.stop.done:
+            return True
+        return len(self.generated) >= self.max_new_tokens
+
+
+class ContinuousBatcher:
+    """Scheduler continuous batching: decoder dijalankan satu token per langkah untuk semua
+    sequence aktif. Sequence yang selesai (EOS / max_new_tokens) langsung dikeluarkan dan slot
+    kosong diisi request baru dari antrian tanpa menunggu batch selesai.
+
+    Cocok untuk model dengan KV-cache dinamis standar (Qwen, Llama, GPT2)."""
+
+    def __init__(self, name, max_active=8):
+        self.name = name
+        self.max_active = max_active
+        self.total_tokens = 0
+        self.total_time = 0.0
+        self.steps = 0
+        self._queue = queue.Queue()
+        self._active = []        # _Sequence, urutannya sama dengan baris batch
+        self._cache = None       # KV-cache legacy gabungan [batch, heads, panjang, dim]
+        self._mask = None        # attention mask [batch, panjang], 0 = padding kiri
+        self._stop = threading.Event()
+        self._closing = False
+        self._thread = threading.Thread(target=self._run, name=f"scheduler-{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, question, **overrides):
+        """Masukkan pertanyaan ke antrian, mengembalikan Future berisi dict hasil"""
+        if self._stop.is_set():
+            raise RuntimeError("ContinuousBatcher sudah dihentikan")
+        sequence = _Sequence(question, overrides)
+        self._queue.put(sequence)
+        return sequence.future
+
+    def generate_response(self, question, **overrides):
+        """Sama seperti qna.generate_response, tetapi lewat scheduler"""
+        result = self.submit(question, **overrides).result()
+        return result["answer"], result["duration"]
+
+    def tokens_per_second(self):
+        return self.total_tokens / self.total_time if self.total_time else 0.0
+
+    def close(self):
+        self._stop.set()
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        import torch
+
+        while not (self._closing and not self._active):
+            try:
+                # Jika tidak ada sequence aktif, tunggu request baru; jika ada, cek antrian tanpa menunggu
+                self._admit(block=not self._active)
+                if not self._active:
+                    continue
+                lm = load_model(self.name)
+                start_time = time.time()
+                with torch.no_grad():
+                    self._prefill_new(lm)
+                    self._step(lm)
+                self.total_time += time.time() - start_time
+            except Exception as e:
+                self._fail_all(e)
+
+    def _admit(self, block):
+        """Pindahkan request dari antrian ke daftar aktif selama masih ada slot"""
+        while not self._closing and len(self._active) < self.max_active:
+            try:
+                sequence = self._queue.get(block=block)
+            except queue.Empty:
+                break
+            if sequence is None:
+                # Berhenti menerima request baru, sequence aktif tetap diselesaikan
+                self._closing = True
+                break
+            self._active.append(sequence)
+            block = False
+
+    def _prefill_new(self, lm):
+        """Jalankan prefill untuk sequence yang baru masuk lalu gabungkan cache-nya ke batch"""
+        import torch
+
+        for sequence in self._active:
+            if sequence.started_at is not None:
+                continue
+            sequence.started_at = time.time()
+            kwargs = lm.generation_kwargs(**sequence.overrides)
+            sequence.params = sampling_params(kwargs)
+            sequence.max_new_tokens = kwargs.get("max_new_tokens", 20)
+            sequence.eos = eos_ids(kwargs.get("eos_token_id"))
+            rules = lm.stop_rules(sequence.overrides)
+            sequence.stop = TextStop(lm.tokenizer, rules) if rules else None
+
+            prompt = lm.spec.build_prompt(lm.tokenizer, sequence.question)
+            input_ids = lm.tokenizer(prompt, return_tensors="pt")["input_ids"].to(lm.device)
+            sequence.prompt_ids = input_ids[0].tolist()
+
+            # Prefill hanya bagian setelah prefix system prompt yang sudah ada di cache bersama
+            past_key_values, reused = None, 0
+            if lm.prefix_cache is not None:
+                past_key_values, reused = lm.prefix_cache.lookup(sequence.prompt_ids)
+            outputs = lm.model(input_ids=input_ids[:, reused:], past_key_values=past_key_values, use_cache=True)
+            token = sample_token(outputs.logits[0, -1], sequence.prompt_ids, **sequence.params)
+            sequence.append(token)
+            sequence.first_token_at = time.time()
+
+            cache = kv.to_legacy(outputs.past_key_values)
+            mask = torch.ones(1, input_ids.shape[-1], dtype=torch.long, device=lm.device)
+            self._append(cache, mask)
+
+        self._finish_done(lm)
+
+    def _append(self, cache, mask):
+        """Tambahkan cache satu sequence sebagai baris terakhir batch (padding kiri ke panjang yang sama)"""
+        import torch
+        import torch.nn.functional as F
+
+        if self._cache is None:
+            self._cache, self._mask = cache, mask
+            return
+
+        length = max(kv.cache_length(self._cache), kv.cache_length(cache))
+        self._cache = kv.concat_batch([kv.pad_left(self._cache, length), kv.pad_left(cache, length)])
+        self._mask = torch.cat([
+            F.pad(self._mask, (length - self._mask.shape[-1], 0)),
+            F.pad(mask, (length - mask.shape[-1], 0)),
+        ], dim=0)
+
+    def _step(self, lm):
+        """Satu langkah decode untuk seluruh sequence aktif"""
+        import torch
+
+        if not self._active:
+            return
+        input_ids = torch.tensor([[s.next_token] for s in self._active], device=lm.device)
+        # Posisi token baru = jumlah token asli (bukan padding) yang sudah ada di cache
+        position_ids = self._mask.sum(-1, keepdim=True)
+        mask = torch.cat([self._mask, torch.ones_like(self._mask[:, :1])], dim=-1)
+
+        outputs = lm.model(
+            input_ids=input_ids,
+            attention_mask=mask,
+            position_ids=position_ids,
+            past_key_values=kv.from_legacy(self._cache),
+            use_cache=True,
+        )
+        self._cache = kv.to_legacy(outputs.past_key_values)
+        self._mask = mask
+
+        logits = outputs.logits[:, -1]
+        for row, sequence in enumerate(self._active):
+            history = sequence.prompt_ids + sequence.generated
+            sequence.append(sample_token(logits[row], history, **sequence.params))
+
+        self.steps += 1
+        self._finish_done(lm)
+
+    def _finish_done(self, lm):
+        """Selesaikan sequence yang sudah EOS / mencapai max_new_tokens dan buang dari batch"""
+        import torch
+
+        done = [row for row, s in enumerate(self._active) if s.finished]
+        if not done:
+            return
+
+        end_time = time.time()
+        for row in done:
+            sequence = self._active[row]
+            output_ids = torch.tensor(sequence.prompt_ids + sequence.generated)
+            answer = lm.spec.extract_answer(
+                lm.tokenizer, output_ids, len(sequence.prompt_ids), lm.stop_rules(sequence.overrides)
+            )
+            self.total_tokens += len(sequence.generated)
+            sequence.future.set_result({
+                "answer": answer,
+                "duration": end_time - sequence.enqueued_at,
+                "queue_time": sequence.started_at - sequence.enqueued_at,
+                "time_to_first_token": sequence.first_token_at - sequence.enqueued_at,
+                "new_tokens": len(sequence.generated),
+            })
+
+        keep_rows = [row for row in range(len(self._active)) if row not in done]
+        self._active = [self._active[row] for row in keep_rows]
+
+        if not keep_rows:
+            self._cache, self._mask = None, None
+            return
+
+        self._cache = kv.select_rows(self._cache, keep_rows)
+        self._mask = self._mask[keep_rows]
+        # Buang kolom padding kiri yang tidak dipakai lagi oleh baris mana pun
+        leading = int(self._mask.argmax(-1).min())
+        self._cache = kv.trim_left(self._cache, leading)
+        self._mask = self._mask[:, leading:]
+
+    def _fail_all(self, error):
+        for sequence in self._active:
+            if not sequence.future.done():
+                sequence.future.set_exception(error)
+        self._active = []
+        self._cache, self._mask = None, None
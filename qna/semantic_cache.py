@@ -0,0 +1,227 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from .answer_cache import make_key, normalize_question
+
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
+
+def load_embedder(model_name=DEFAULT_EMBEDDING_MODEL):
+    """Fungsi embedding list teks -> matriks numpy [N, D] yang sudah dinormalisasi (norma 1).
+    Memakai sentence-transformers jika terpasang, selain itu mean pooling dengan transformers."""
+    import numpy as np
+
+    from .snapshots import pretrained_source
+
+    # Snapshot lokal (python -m qna.snapshots pull <model>) dipakai tanpa menghubungi Hub
+    source, source_kwargs = pretrained_source(model_name)
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        SentenceTransformer = None
+
+    if SentenceTransformer is not None:
+        model = SentenceTransformer(source, **source_kwargs)
+
+        def embed(texts):
+            vectors = model.encode(list(texts), batch_size=64, normalize_embeddings=True)
+            return np.asarray(vectors, dtype=np.float32)
+
+        return embed
+
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(source, **source_kwargs)
+    model = AutoModel.from_pretrained(source, **source_kwargs).eval()
+
+    def embed(texts):
+        inputs = tokenizer(list(texts), padding=True, truncation=True, max_length=128, return_tensors="pt")
+        with torch.no_grad():
+            hidden = model(**inputs).last_hidden_state
+        mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+        vectors = (hidden * mask).sum(1) / mask.sum(1).clamp(min=1e-9)
+        vectors = torch.nn.functional.normalize(vectors, dim=-1)
+        return vectors.numpy().astype(np.float32)
+
+    return embed
+
+
+class _Index:
+    """Matriks embedding satu scope (model + konteks + parameter). Buffer tumbuh (dan menyusut) sesuai
+    jumlah entri; entri dihapus dengan memindahkan baris terakhir ke tempatnya."""
+
+    def __init__(self, dim, capacity=16):
+        import numpy as np
+
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.ids = []
+        self.values = []
+        self.questions = []
+        self.rows = {}    # id entri -> baris
+
+    @property
+    def size(self):
+        return len(self.ids)
+
+    def _resize(self, capacity):
+        import numpy as np
+
+        vectors = np.zeros((capacity, self.vectors.shape[1]), dtype=np.float32)
+        vectors[:self.size] = self.vectors[:self.size]
+        self.vectors = vectors
+
+    def add(self, entry_id, vector, question, value):
+        if self.size == len(self.vectors):
+            self._resize(len(self.vectors) * 2)
+        self.rows[entry_id] = self.size
+        self.vectors[self.size] = vector
+        self.ids.append(entry_id)
+        self.values.append(value)
+        self.questions.append(question)
+
+    def remove(self, entry_id):
+        row = self.rows.pop(entry_id)
+        last = self.size - 1
+        if row != last:
+            self.vectors[row] = self.vectors[last]
+            self.ids[row] = self.ids[last]
+            self.values[row] = self.values[last]
+            self.questions[row] = self.questions[last]
+            self.rows[self.ids[row]] = row
+        del self.ids[last], self.values[last], self.questions[last]
+        if 16 < len(self.vectors) and self.size <= len(self.vectors) // 4:
+            self._resize(len(self.vectors) // 2)
+
+    def search(self, vectors):
+        """Cosine similarity terbaik untuk setiap baris `vectors` [M, D], mengembalikan (indeks, skor)"""
+        scores = vectors @ self.vectors[:self.size].T
+        best = scores.argmax(axis=1)
+        return best, scores[range(len(best)), best]
+
+
+class SemanticCache:
+    """Tingkat cache kedua berbasis kemiripan makna: pertanyaan diubah menjadi embedding lalu dicari
+    tetangga terdekatnya (cosine similarity, brute force NumPy). Jawaban tersimpan dipakai ulang jika
+    skornya di atas threshold, sehingga parafrase tidak perlu memanggil LLM lagi.
+    `max_entries` membatasi jumlah entri di semua scope sekaligus; entri yang paling lama tidak dipakai dibuang."""
+
+    def __init__(self, embed=None, threshold=0.9, max_entries=50000, path=None):
+        self.embed = embed or load_embedder()
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._indexes = {}
+        self._entries = OrderedDict()      # id entri -> scope, urutan LRU (paling lama di depan)
+        self._next_id = 0
+        self._embeddings = OrderedDict()   # memo embedding pertanyaan terakhir (get -> put)
+        self._lock = threading.Lock()
+        if path and os.path.exists(os.path.join(path, "entries.jsonl")):
+            self.load(path)
+
+    def _scope(self, model_id, context, params):
+        return make_key(model_id, "", context, params)
+
+    def _embed(self, questions):
+        import numpy as np
+
+        keys = [normalize_question(q) for q in questions]
+        missing = [k for k in dict.fromkeys(keys) if k not in self._embeddings]
+        if missing:
+            for key, vector in zip(missing, self.embed(missing)):
+                self._embeddings[key] = vector
+        for key in keys:
+            self._embeddings.move_to_end(key)
+        while len(self._embeddings) > 1024:
+            self._embeddings.popitem(last=False)
+        return np.stack([self._embeddings[k] for k in keys])
+
+    def _add(self, scope, vector, question, value):
+        # Dipanggil dengan self._lock dipegang
+        index = self._indexes.get(scope)
+        if index is None:
+            index = self._indexes[scope] = _Index(len(vector))
+        entry_id = self._next_id
+        self._next_id += 1
+        index.add(entry_id, vector, question, value)
+        self._entries[entry_id] = scope
+        while len(self._entries) > self.max_entries:
+            old_id, old_scope = self._entries.popitem(last=False)
+            self._indexes[old_scope].remove(old_id)
+            if self._indexes[old_scope].size == 0:
+                del self._indexes[old_scope]
+
+    def get_many(self, model_id, questions, context="", params=None):
+        """Cari jawaban untuk banyak pertanyaan sekaligus (satu perkalian matriks)"""
+        with self._lock:
+            index = self._indexes.get(self._scope(model_id, context, params))
+            if index is None or index.size == 0:
+                self.misses += len(questions)
+                return [None] * len(questions)
+            best, scores = index.search(self._embed(questions))
+
+            results = []
+            for row, score in zip(best, scores):
+                if score >= self.threshold:
+                    self.hits += 1
+                    self._entries.move_to_end(index.ids[row])
+                    results.append(dict(index.values[row], similarity=float(score), matched_question=index.questions[row]))
+                else:
+                    self.misses += 1
+                    results.append(None)
+            return results
+
+    def get(self, model_id, question, context="", params=None):
+        return self.get_many(model_id, [question], context, params)[0]
+
+    def put(self, model_id, question, value, context="", params=None):
+        with self._lock:
+            vector = self._embed([question])[0]
+            self._add(self._scope(model_id, context, params), vector, question, value)
+
+    def save(self, path=None):
+        """Simpan index ke direktori: embeddings.npy + entries.jsonl (urut dari entri yang paling lama tidak dipakai)"""
+        import numpy as np
+
+        path = path or self.path
+        os.makedirs(path, exist_ok=True)
+        vectors = []
+        with self._lock, open(os.path.join(path, "entries.jsonl"), "w", encoding="utf-8") as f:
+            for entry_id, scope in self._entries.items():
+                index = self._indexes[scope]
+                row = index.rows[entry_id]
+                f.write(json.dumps({
+                    "scope": scope,
+                    "question": index.questions[row],
+                    "value": index.values[row],
+                }, ensure_ascii=False) + "\n")
+                vectors.append(index.vectors[row])
+        if vectors:
+            np.save(os.path.join(path, "embeddings.npy"), np.stack(vectors))
+
+    def load(self, path):
+        import numpy as np
+
+        vectors_path = os.path.join(path, "embeddings.npy")
+        if not os.path.exists(vectors_path):
+            return
+        vectors = np.load(vectors_path, mmap_mode="r")
+        with self._lock, open(os.path.join(path, "entries.jsonl"), encoding="utf-8") as f:
+            for row, line in enumerate(f):
+                entry = json.loads(line)
+                self._add(entry["scope"], vectors[row], entry["question"], entry["value"])
+
+    def stats(self):
+        with self._lock:
+            hits, misses, entries = self.hits, self.misses, len(self._entries)
+        total = hits + misses
+        return {
+            "entries": entries,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+        }
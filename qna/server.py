@@ -0,0 +1,483 @@
+"""Server inferensi HTTP berbasis asyncio (tanpa dependensi tambahan) untuk QA ekstraktif dan generatif.
+
+Request masuk ke antrian terbatas; jika antrian penuh server langsung menjawab 429 agar klien bisa mencoba
+lagi. Pekerjaan model dijalankan di thread pool khusus sehingga event loop tidak pernah terblokir. Setiap
+request punya batas waktu; jika waktunya habis atau klien memutus koneksi, request dibatalkan (yang masih
+di antrian dilewati, generate yang sedang berjalan dihentikan lewat StoppingCriteria).
+
+Endpoint (JSON):
+    GET  /health          status antrian dan model yang dimuat
+    POST /v1/extractive   {"question", "context", "model", "top_k", "max_answer_len", "stride", "batch_size", "timeout"}
+    POST /v1/generate     {"question" atau "prompt", "context", "model", "max_new_tokens", "temperature",
+                           "top_p", "do_sample", "stop", "max_sentences", "stop_at_blank_line", "stream",
+                           "timeout"}; dengan "stream": true hasilnya NDJSON
+                           {"text": ...} per potongan lalu {"done": true, ...}
+Parameter dengan tipe atau rentang yang salah (lihat PARAM_RANGES) dijawab 400.
+
+    python -m qna.server --port 8000 --workers 2 --max-queue 32 --preload indobert gpt2-indo"""
+
+import argparse
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .registry import get_spec, load_model, loaded_models
+from .stopping import StopRules, add_criteria, cancel_criteria
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+    504: "Gateway Timeout",
+}
+
+# Parameter generate yang boleh diatur klien
+GENERATION_PARAMS = ("max_new_tokens", "min_new_tokens", "temperature", "top_p", "do_sample", "repetition_penalty")
+# Aturan berhenti per request (menimpa StopRules bawaan model)
+STOP_PARAMS = ("stop", "max_sentences", "stop_at_blank_line")
+# Parameter extractive yang boleh diatur klien
+EXTRACTIVE_PARAMS = ("top_k", "max_answer_len", "stride", "batch_size")
+# Rentang nilai parameter angka: (tipe, batas bawah, batas atas); batas bawah float bersifat eksklusif
+PARAM_RANGES = {
+    "max_new_tokens": (int, 1, 4096),
+    "min_new_tokens": (int, 0, 4096),
+    "temperature": (float, 0.0, 100.0),
+    "top_p": (float, 0.0, 1.0),
+    "repetition_penalty": (float, 0.0, 100.0),
+    "top_k": (int, 1, 100),
+    "max_answer_len": (int, 1, 1024),
+    "stride": (int, 0, 256),
+    "batch_size": (int, 1, 256),
+}
+
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+class _Job:
+    """Satu request di antrian: fungsi model, penanda batal, dan Future hasil di event loop"""
+
+    def __init__(self, fn, loop, stream=False):
+        self.fn = fn
+        self.loop = loop
+        self.cancelled = threading.Event()
+        self.future = loop.create_future()
+        self.chunks = asyncio.Queue() if stream else None
+        self.enqueued_at = time.time()
+
+    def emit(self, event):
+        """Kirim potongan hasil streaming dari thread model ke event loop"""
+        self.loop.call_soon_threadsafe(self.chunks.put_nowait, event)
+
+    def cancel(self):
+        self.cancelled.set()
+        self.future.cancel()
+
+    def finish(self, result=None, error=None):
+        if self.future.done():
+            return
+        if self.chunks is not None:
+            # Streaming: hasil akhir maupun error dikirim sebagai event terakhir
+            self.chunks.put_nowait({"error": f"{type(error).__name__}: {error}"} if error else dict(result, done=True))
+            self.future.set_result(result)
+        elif error is not None:
+            self.future.set_exception(error)
+        else:
+            self.future.set_result(result)
+
+
+def _extractive(job, model, question, context, top_k=1, max_answer_len=None, stride=128, batch_size=16):
+    from .extractive import ExtractiveQA
+
+    lm = load_model(model)
+    engine = ExtractiveQA(lm.model, lm.tokenizer, stride=stride, batch_size=batch_size)
+    answers, info = engine.answer(question, context, top_k=top_k, max_answer_len=max_answer_len)
+    return {"model": lm.spec.model_id, "answers": answers, "windows": info["windows"], "duration": info["duration"]}
+
+
+def _generate(job, model, question=None, context=None, prompt=None, **params):
+    import torch
+
+    from .streaming import ResponseStream
+
+    start_time = time.time()
+    lm = load_model(model)
+    text_prompt = prompt if prompt is not None else lm.spec.build_prompt(lm.tokenizer, question, context)
+    inputs = lm.tokenizer(text_prompt, return_tensors="pt").to(lm.device)
+    kwargs = dict(lm.prefill_kwargs(inputs["input_ids"]), **lm.generation_kwargs(**params))
+    add_criteria(kwargs, cancel_criteria(job.cancelled))
+    rules = lm.stop_rules(params)
+
+    if job.chunks is not None:
+        stream = ResponseStream(lm.model, lm.tokenizer, inputs, kwargs, start_time=start_time, stop_rules=rules)
+        for chunk in stream:
+            job.emit({"text": chunk})
+        return {
+            "model": lm.spec.model_id,
+            "answer": rules.trim(stream.text) if rules else stream.text.strip(),
+            "new_tokens": stream.new_tokens,
+            "time_to_first_token": stream.time_to_first_token,
+            "duration": stream.duration,
+        }
+
+    with torch.no_grad():
+        outputs = lm.model.generate(**inputs, **kwargs)
+    prompt_length = inputs["input_ids"].shape[-1]
+    if prompt is not None or rules:
+        answer = lm.tokenizer.decode(outputs[0][prompt_length:], skip_special_tokens=True)
+        answer = rules.trim(answer) if rules else answer.strip()
+    else:
+        answer = lm.spec.extract_answer(lm.tokenizer, outputs[0], prompt_length)
+    return {
+        "model": lm.spec.model_id,
+        "answer": answer,
+        "new_tokens": outputs.shape[-1] - prompt_length,
+        "duration": time.time() - start_time,
+    }
+
+
+class InferenceServer:
+    """Server HTTP asyncio dengan antrian request terbatas dan thread pool khusus untuk model"""
+
+    def __init__(self, host="127.0.0.1", port=8000, workers=1, max_queue=32, timeout=120.0, max_timeout=600.0,
+                 default_extractive="indobert", default_generative="gpt2-indo"):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.max_timeout = max_timeout
+        self.default_extractive = default_extractive
+        self.default_generative = default_generative
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="qna-inference")
+        self.stats = {"completed": 0, "failed": 0, "rejected": 0, "timed_out": 0, "cancelled": 0, "running": 0}
+        self._queue = None
+
+    # --- antrian dan worker ---
+
+    def submit(self, fn, stream=False):
+        """Masukkan pekerjaan ke antrian; HTTPError 429 jika antrian penuh"""
+        job = _Job(fn, asyncio.get_running_loop(), stream=stream)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.stats["rejected"] += 1
+            raise HTTPError(429, "Server sedang penuh, coba lagi nanti", {"Retry-After": "1"})
+        return job
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self._queue.get()
+            try:
+                # Request yang dibatalkan selagi menunggu tidak perlu dijalankan
+                if job.cancelled.is_set():
+                    continue
+                self.stats["running"] += 1
+                started_at = time.time()
+                try:
+                    result = await loop.run_in_executor(self.executor, job.fn, job)
+                    result["queue_time"] = started_at - job.enqueued_at
+                except Exception as e:
+                    self.stats["failed"] += 1
+                    job.finish(error=e)
+                else:
+                    self.stats["completed"] += 1
+                    job.finish(result)
+                finally:
+                    self.stats["running"] -= 1
+            finally:
+                self._queue.task_done()
+
+    async def _wait(self, job, reader, timeout):
+        """Tunggu hasil job; batalkan jika waktu habis atau klien memutus koneksi"""
+        disconnected = asyncio.ensure_future(reader.read(1))
+        try:
+            done, _ = await asyncio.wait({job.future, disconnected}, timeout=timeout,
+                                         return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            disconnected.cancel()
+        if job.future in done:
+            return job.future.result()
+        job.cancel()
+        if disconnected in done:
+            self.stats["cancelled"] += 1
+            return None
+        self.stats["timed_out"] += 1
+        raise HTTPError(504, f"Request melebihi batas waktu {timeout:g} detik")
+
+    # --- HTTP ---
+
+    async def _read_request(self, reader):
+        head = await reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "Request line tidak valid")
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                key, value = line.split(":", 1)
+                headers[key.strip().lower()] = value.strip()
+        length = int(headers.get("content-length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, f"Body lebih dari {MAX_BODY_BYTES} byte")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target.split("?", 1)[0], body
+
+    @staticmethod
+    def _head(status, headers):
+        lines = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}"]
+        lines += [f"{key}: {value}" for key, value in headers.items()]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def _send_json(self, writer, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        writer.write(self._head(status, dict({
+            "Content-Type": "application/json; charset=utf-8",
+            "Content-Length": str(len(body)),
+            "Connection": "close",
+        }, **(headers or {}))) + body)
+        await writer.drain()
+
+    async def _send_chunk(self, writer, event):
+        data = (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+        writer.write(f"{len(data):x}\r\n".encode("latin-1") + data + b"\r\n")
+        await writer.drain()
+
+    async def _stream(self, job, reader, writer, timeout):
+        """Kirim potongan jawaban sebagai NDJSON (chunked) selama generate berjalan"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        disconnected = asyncio.ensure_future(reader.read(1))
+        try:
+            writer.write(self._head(200, {
+                "Content-Type": "application/x-ndjson; charset=utf-8",
+                "Transfer-Encoding": "chunked",
+                "Connection": "close",
+            }))
+            while True:
+                next_event = asyncio.ensure_future(job.chunks.get())
+                done, _ = await asyncio.wait({next_event, disconnected}, timeout=max(0.0, deadline - loop.time()),
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if next_event not in done:
+                    next_event.cancel()
+                    job.cancel()
+                    if disconnected in done:
+                        self.stats["cancelled"] += 1
+                        return
+                    self.stats["timed_out"] += 1
+                    await self._send_chunk(writer, {"error": f"Request melebihi batas waktu {timeout:g} detik"})
+                    break
+                event = next_event.result()
+                await self._send_chunk(writer, event)
+                if "done" in event or "error" in event:
+                    break
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            # Klien memutus koneksi saat potongan dikirim: hentikan generate seperti saat timeout
+            if not job.future.done():
+                job.cancel()
+                self.stats["cancelled"] += 1
+            raise
+        finally:
+            disconnected.cancel()
+
+    def _parse(self, body):
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            raise HTTPError(400, "Body harus berupa JSON")
+        if not isinstance(payload, dict):
+            raise HTTPError(400, "Body harus berupa objek JSON")
+        return payload
+
+    def _model(self, payload, default, task):
+        try:
+            spec = get_spec(payload.get("model") or default)
+        except KeyError as e:
+            raise HTTPError(400, e.args[0])
+        if (spec.task == "question-answering") != (task == "question-answering"):
+            raise HTTPError(400, f"Model {spec.model_id} bukan model {task}")
+        return spec.model_id
+
+    @staticmethod
+    def _stop_rules(payload):
+        stop = payload.get("stop") or []
+        if isinstance(stop, str):
+            stop = [stop]
+        if not all(isinstance(item, str) and item for item in stop):
+            raise HTTPError(400, "stop harus berupa string atau list string")
+        max_sentences = payload.get("max_sentences")
+        if max_sentences is not None and (not isinstance(max_sentences, int) or max_sentences < 1):
+            raise HTTPError(400, "max_sentences harus bilangan bulat positif")
+        return StopRules(tuple(stop), max_sentences, bool(payload.get("stop_at_blank_line")))
+
+    @staticmethod
+    def _params(payload, keys):
+        """Ambil parameter yang diisi klien setelah tipe dan rentangnya diperiksa (HTTPError 400 jika salah)"""
+        params = {}
+        for key in keys:
+            value = payload.get(key)
+            if value is None:
+                continue
+            if key == "do_sample":
+                if not isinstance(value, bool):
+                    raise HTTPError(400, "do_sample harus berupa boolean")
+            else:
+                kind, low, high = PARAM_RANGES[key]
+                if kind is int:
+                    if isinstance(value, bool) or not isinstance(value, int) or not low <= value <= high:
+                        raise HTTPError(400, f"{key} harus bilangan bulat antara {low} dan {high}")
+                elif (isinstance(value, bool) or not isinstance(value, (int, float))
+                      or not low < value <= high):
+                    raise HTTPError(400, f"{key} harus angka lebih dari {low:g} dan paling besar {high:g}")
+            params[key] = value
+        return params
+
+    def _timeout(self, payload):
+        timeout = payload.get("timeout")
+        if timeout is None:
+            return self.timeout
+        if isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or not 0 < timeout < float("inf"):
+            raise HTTPError(400, "timeout harus berupa angka positif (detik)")
+        return min(max(timeout, 0.1), self.max_timeout)
+
+    async def _route(self, method, path, body, reader, writer):
+        if path == "/health":
+            if method != "GET":
+                raise HTTPError(405, "Gunakan GET")
+            return await self._send_json(writer, 200, self.health())
+
+        if path not in ("/v1/extractive", "/v1/generate"):
+            raise HTTPError(404, f"Endpoint {path} tidak ada")
+        if method != "POST":
+            raise HTTPError(405, "Gunakan POST")
+
+        payload = self._parse(body)
+        timeout = self._timeout(payload)
+        if path == "/v1/extractive":
+            if not payload.get("question") or not payload.get("context"):
+                raise HTTPError(400, "question dan context wajib diisi")
+            model = self._model(payload, self.default_extractive, "question-answering")
+            params = self._params(payload, EXTRACTIVE_PARAMS)
+            job = self.submit(lambda job: _extractive(job, model, payload["question"], payload["context"], **params))
+        else:
+            if not payload.get("question") and not payload.get("prompt"):
+                raise HTTPError(400, "question atau prompt wajib diisi")
+            model = self._model(payload, self.default_generative, "text-generation")
+            params = self._params(payload, GENERATION_PARAMS)
+            if any(key in payload for key in STOP_PARAMS):
+                params["stop_rules"] = self._stop_rules(payload)
+            stream = bool(payload.get("stream"))
+            job = self.submit(
+                lambda job: _generate(job, model, payload.get("question"), payload.get("context"),
+                                      payload.get("prompt"), **params),
+                stream=stream,
+            )
+            if stream:
+                return await self._stream(job, reader, writer, timeout)
+
+        result = await self._wait(job, reader, timeout)
+        if result is not None:
+            await self._send_json(writer, 200, result)
+
+    async def _handle(self, reader, writer):
+        try:
+            try:
+                method, path, body = await self._read_request(reader)
+                await self._route(method, path, body, reader, writer)
+            except HTTPError as e:
+                await self._send_json(writer, e.status, {"error": str(e)}, e.headers)
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                await self._send_json(writer, 400, {"error": "Request tidak lengkap"})
+            except Exception as e:
+                await self._send_json(writer, 500, {"error": f"{type(e).__name__}: {e}"})
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    def health(self):
+        return {
+            "status": "ok",
+            "queued": self._queue.qsize() if self._queue else 0,
+            "max_queue": self.max_queue,
+            "workers": self.workers,
+            "models": sorted(loaded_models()),
+            **self.stats,
+        }
+
+    async def serve(self, preload=()):
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        loop = asyncio.get_running_loop()
+        for name in preload:
+            await loop.run_in_executor(self.executor, load_model, name)
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        server = await asyncio.start_server(self._handle, self.host, self.port)
+        print(f"🚀 Server inferensi di http://{self.host}:{self.port} "
+              f"({self.workers} worker, antrian maksimal {self.max_queue})", flush=True)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, preload=()):
+        try:
+            asyncio.run(self.serve(preload))
+        except KeyboardInterrupt:
+            print("👋 Server dihentikan")
+
+
+def main(argv=None):
+    from .registry import set_backend, set_precision
+
+    parser = argparse.ArgumentParser(description="Server inferensi HTTP (asyncio) untuk QA ekstraktif dan generatif")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1, help="jumlah thread model (request yang berjalan bersamaan)")
+    parser.add_argument("--max-queue", type=int, default=32, help="request menunggu maksimal sebelum dijawab 429")
+    parser.add_argument("--timeout", type=float, default=120.0, help="batas waktu bawaan per request (detik)")
+    parser.add_argument("--extractive-model", default="indobert")
+    parser.add_argument("--generative-model", default="gpt2-indo")
+    parser.add_argument("--preload", nargs="*", default=[], help="model yang dimuat sebelum server menerima request")
+    parser.add_argument("--precision", choices=["fp32", "bf16", "int8"])
+    parser.add_argument("--backend", choices=["torch", "onnx"], default="torch")
+    args = parser.parse_args(argv)
+
+    if args.precision:
+        set_precision(args.precision)
+    if args.backend != "torch":
+        set_backend(args.backend)
+
+    server = InferenceServer(
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        max_queue=args.max_queue,
+        timeout=args.timeout,
+        default_extractive=args.extractive_model,
+        default_generative=args.generative_model,
+    )
+    server.run(args.preload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from . import kv
+from .registry import load_model
+
+
+class ChatSession:
+    """Percakapan multi-turn yang menyimpan past_key_values antar giliran,
+    sehingga giliran berikutnya hanya perlu prefill token baru"""
+
+    def __init__(self, name, session_id=None):
+        self.name = name
+        self.session_id = session_id or uuid.uuid4().hex
+        self.history = []          # list (pertanyaan, jawaban)
+        self.last_used = time.time()
+        self._cache = None         # KV-cache legacy untuk token di _cached_ids
+        self._cached_ids = []
+        self._lock = threading.Lock()
+
+    @property
+    def cache_bytes(self):
+        return kv.cache_bytes(self._cache)
+
+    def drop_cache(self):
+        """Buang KV-cache (riwayat tetap disimpan, giliran berikutnya prefill ulang)"""
+        self._cache = None
+        self._cached_ids = []
+
+    def reset(self):
+        with self._lock:
+            self.history = []
+            self.drop_cache()
+
+    def ask(self, question, **overrides):
+        """Ajukan pertanyaan lanjutan, mengembalikan (jawaban, durasi, info)"""
+        import torch
+
+        with self._lock:
+            lm = load_model(self.name)
+            start_time = time.time()
+            self.last_used = start_time
+
+            prompt = lm.spec.build_chat_prompt(lm.tokenizer, self.history, question)
+            input_ids = lm.tokenizer(prompt, return_tensors="pt")["input_ids"].to(lm.device)
+            ids = input_ids[0].tolist()
+
+            # Pakai ulang cache untuk prefix yang sama; minimal satu token tetap diproses. Model dengan
+            # cache non-standar (cache_reuse=False, mis. sliding window Gemma2) selalu prefill penuh.
+            reused = 0
+            if lm.spec.cache_reuse:
+                reused = min(kv.common_prefix_length(self._cached_ids, ids), len(ids) - 1)
+            kwargs = lm.generation_kwargs(**overrides)
+            if reused > 0:
+                kwargs["past_key_values"] = kv.from_legacy(kv.slice_length(self._cache, reused))
+            elif lm.prefix_cache is not None:
+                # Giliran pertama: mulai dari prefix system prompt yang dipakai bersama
+                past_key_values, reused = lm.prefix_cache.lookup(ids)
+                if past_key_values is not None:
+                    kwargs["past_key_values"] = past_key_values
+
+            with torch.no_grad():
+                outputs = lm.model.generate(
+                    input_ids=input_ids,
+                    attention_mask=torch.ones_like(input_ids),
+                    return_dict_in_generate=True,
+                    **kwargs,
+                )
+
+            sequence = outputs.sequences[0]
+            answer = lm.tokenizer.decode(sequence[len(ids):], skip_special_tokens=True)
+            rules = lm.stop_rules(overrides)
+            answer = rules.trim(answer) if rules else answer.strip()
+
+            if lm.spec.cache_reuse:
+                self._cache = kv.to_legacy(outputs.past_key_values)
+                self._cached_ids = sequence[:kv.cache_length(self._cache)].tolist()
+            self.history.append((question, answer))
+
+            duration = time.time() - start_time
+            info = {
+                "prompt_tokens": len(ids),
+                "reused_tokens": reused,
+                "prefill_tokens": len(ids) - reused,
+                "new_tokens": len(sequence) - len(ids),
+            }
+            self.last_used = time.time()
+            return answer, duration, info
+
+
+class SessionStore:
+    """Kumpulan sesi chat dengan batas memori KV-cache.
+
+    Jika total cache melebihi budget, cache sesi yang paling lama tidak dipakai dibuang lebih dulu;
+    sesi yang menganggur lebih dari idle_timeout detik dihapus seluruhnya."""
+
+    def __init__(self, memory_budget_mb=512, idle_timeout=1800):
+        self.memory_budget_mb = memory_budget_mb
+        self.idle_timeout = idle_timeout
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id=None, name=None):
+        """Ambil sesi yang ada atau buat sesi baru untuk model `name`"""
+        with self._lock:
+            self._expire()
+            if session_id in self._sessions:
+                self._sessions.move_to_end(session_id)
+                return self._sessions[session_id]
+            if name is None:
+                raise KeyError(f"Sesi tidak ditemukan: '{session_id}'")
+            session = ChatSession(name, session_id)
+            self._sessions[session.session_id] = session
+            return session
+
+    def ask(self, session_id, question, name=None, **overrides):
+        session = self.get(session_id, name)
+        result = session.ask(question, **overrides)
+        self.enforce_budget(keep=session.session_id)
+        return result
+
+    def remove(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def used_bytes(self):
+        return sum(session.cache_bytes for session in self._sessions.values())
+
+    def enforce_budget(self, keep=None):
+        """Buang cache sesi LRU sampai total cache di bawah budget"""
+        budget = self.memory_budget_mb * 1024 * 1024
+        with self._lock:
+            for session_id, session in list(self._sessions.items()):
+                if self.used_bytes() <= budget:
+                    break
+                if session_id != keep and session.cache_bytes:
+                    session.drop_cache()
+
+    def _expire(self):
+        now = time.time()
+        for session_id, session in list(self._sessions.items()):
+            if now - session.last_used > self.idle_timeout:
+                del self._sessions[session_id]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "cache_mb": self.used_bytes() / 1024**2,
+                "budget_mb": self.memory_budget_mb,
+            }
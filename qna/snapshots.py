@@ -0,0 +1,156 @@
+"""Snapshot model lokal yang dipin ke satu revisi, agar model dimuat tanpa menghubungi Hugging Face Hub.
+
+`pull` mengunduh sekali (token dari HF_TOKEN, tanpa `login`) ke QNA_SNAPSHOT_DIR/<model> (default
+~/.cache/qna/snapshots) dan mencatat commit revisinya di qna_snapshot.json. Bobot selalu disimpan sebagai
+safetensors (repo yang hanya punya .bin dikonversi sekali), sehingga saat dimuat transformers memetakan file
+bobot dengan mmap alih-alih membaca pickle. Selama snapshot ada, semua loader memakai direktori lokal dengan
+local_files_only=True.
+
+    python -m qna.snapshots pull gpt2-indo indobert
+    python -m qna.snapshots list"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+
+MANIFEST_FILE = "qna_snapshot.json"
+
+# File non-bobot yang dibutuhkan tokenizer/config (termasuk kode trust_remote_code)
+_SUPPORT_PATTERNS = ["*.json", "*.txt", "*.model", "*.jinja", "*.py", "*.tiktoken"]
+
+
+def snapshot_dir():
+    default = os.path.join(os.path.expanduser("~"), ".cache", "qna", "snapshots")
+    return os.environ.get("QNA_SNAPSHOT_DIR", default)
+
+
+def snapshot_path(model_id):
+    """Direktori snapshot lokal untuk model_id, atau None jika belum di-pull"""
+    path = os.path.join(snapshot_dir(), model_id.replace("/", "--"))
+    return path if os.path.exists(os.path.join(path, MANIFEST_FILE)) else None
+
+
+def pretrained_source(model_id):
+    """(sumber, kwargs) untuk from_pretrained: snapshot lokal (offline, wajib safetensors) jika ada,
+    selain itu model_id Hub apa adanya"""
+    path = snapshot_path(model_id)
+    if path is None:
+        return model_id, {}
+    return path, {"local_files_only": True}
+
+
+def _model_class(model_id):
+    from transformers import AutoModelForCausalLM, AutoModelForQuestionAnswering
+
+    from .registry import REGISTRY
+
+    spec = REGISTRY.get(model_id)
+    if spec is not None and spec.task == "question-answering":
+        return AutoModelForQuestionAnswering
+    return AutoModelForCausalLM
+
+
+def pull(model_id, revision=None):
+    """Unduh model ke snapshot lokal yang dipin ke commit `revision` (default: revisi terbaru saat ini)"""
+    from huggingface_hub import HfApi, snapshot_download
+
+    from .registry import REGISTRY
+
+    info = HfApi().model_info(model_id, revision=revision)
+    has_safetensors = any(sibling.rfilename.endswith(".safetensors") for sibling in info.siblings)
+
+    path = os.path.join(snapshot_dir(), model_id.replace("/", "--"))
+    temporary = path + ".tmp"
+    shutil.rmtree(temporary, ignore_errors=True)
+    start_time = time.time()
+    print(f"🔄 Mengunduh {model_id}@{info.sha[:10]}...")
+    snapshot_download(
+        model_id,
+        revision=info.sha,
+        local_dir=temporary,
+        allow_patterns=_SUPPORT_PATTERNS + (["*.safetensors"] if has_safetensors else []),
+        ignore_patterns=["*.bin.index.json"],
+    )
+
+    if not has_safetensors:
+        # Repo lama hanya punya pytorch_model.bin: konversi sekali ke safetensors
+        print(f"🔧 Konversi bobot {model_id} ke safetensors...")
+        spec = REGISTRY.get(model_id)
+        trust_remote_code = bool(spec and spec.trust_remote_code)
+        model = _model_class(model_id).from_pretrained(
+            model_id, revision=info.sha, dtype="auto", trust_remote_code=trust_remote_code
+        )
+        model.save_pretrained(temporary)
+
+    if not os.path.exists(os.path.join(temporary, "tokenizer.json")):
+        # Simpan juga tokenizer.json (tokenizer cepat) agar start berikutnya tidak membangun ulang dari vocab/merges
+        from transformers import AutoTokenizer
+
+        AutoTokenizer.from_pretrained(temporary).save_pretrained(temporary)
+
+    shutil.rmtree(os.path.join(temporary, ".cache"), ignore_errors=True)
+    with open(os.path.join(temporary, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump({
+            "model_id": model_id,
+            "revision": info.sha,
+            "converted": not has_safetensors,
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }, f, indent=2)
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(temporary, path)
+    print(f"✅ Snapshot {model_id} siap di {path} ({time.time() - start_time:.1f} detik)")
+    return path
+
+
+def list_snapshots():
+    """Manifest semua snapshot lokal beserta ukuran bobotnya (MB)"""
+    root = snapshot_dir()
+    if not os.path.isdir(root):
+        return []
+    snapshots = []
+    for name in sorted(os.listdir(root)):
+        manifest_path = os.path.join(root, name, MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            continue
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        size = sum(
+            entry.stat().st_size for entry in os.scandir(os.path.join(root, name))
+            if entry.name.endswith(".safetensors")
+        )
+        snapshots.append(dict(manifest, path=os.path.join(root, name), size_mb=size / 2**20))
+    return snapshots
+
+
+def main(argv=None):
+    from .registry import get_spec
+
+    parser = argparse.ArgumentParser(description="Kelola snapshot model lokal (muat tanpa menghubungi Hub)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    pull_parser = commands.add_parser("pull", help="unduh model ke snapshot lokal yang dipin")
+    pull_parser.add_argument("models", nargs="+", help="alias/id model")
+    pull_parser.add_argument("--revision", help="branch, tag, atau commit (default: revisi terbaru)")
+    commands.add_parser("list", help="tampilkan snapshot lokal")
+    args = parser.parse_args(argv)
+
+    if args.command == "pull":
+        for name in args.models:
+            try:
+                model_id = get_spec(name).model_id
+            except KeyError:
+                model_id = name
+            pull(model_id, args.revision)
+        return
+
+    snapshots = list_snapshots()
+    if not snapshots:
+        print(f"Belum ada snapshot di {snapshot_dir()}")
+    for snapshot in snapshots:
+        print(f"📦 {snapshot['model_id']}@{snapshot['revision'][:10]}  {snapshot['size_mb']:.0f} MB  {snapshot['path']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""Speculative decoding: model kecil (draft) mengusulkan beberapa token, model besar (target) memverifikasinya
+sekaligus dalam satu forward pass.
+
+Token usulan diterima dengan peluang min(1, p/q) (p = distribusi target, q = distribusi draft); token pertama
+yang ditolak diganti sampel dari max(0, p - q) yang dinormalisasi, dan jika semua diterima target menambah satu
+token bonus. Dengan begitu distribusi keluaran sama persis dengan distribusi target (untuk greedy: hasilnya
+identik dengan greedy target). Draft dan target harus memakai tokenizer yang sama, mis. Qwen2.5-0.5B untuk
+Qwen2.5-3B atau Llama-3.2-1B untuk Llama-3.2-3B.
+
+    python -m qna.speculative --model qwen2.5-3b --compare"""
+
+import argparse
+import threading
+import time
+
+from .registry import get_spec, load_model
+from .sampling import eos_ids, next_token_probs, sampling_params
+from .stopping import TextStop
+
+
+class _CacheState:
+    """KV-cache satu model beserta jumlah token yang sudah diproses"""
+
+    __slots__ = ("cache", "length")
+
+    def __init__(self):
+        self.cache = None
+        self.length = 0
+
+
+def _extend(lm, state, ids, vocab_size):
+    """Proses token ids[state.length:] dan kembalikan logits [jumlah_token, vocab] di CPU"""
+    import torch
+
+    input_ids = torch.tensor([ids[state.length:]], device=lm.device)
+    outputs = lm.model(input_ids=input_ids, past_key_values=state.cache, use_cache=True)
+    state.cache = outputs.past_key_values
+    state.length = len(ids)
+    return outputs.logits[0, :, :vocab_size].float().cpu()
+
+
+def _rollback(state, length):
+    """Buang posisi cache setelah `length` (token usulan yang ditolak)"""
+    from . import kv
+
+    if state.length <= length:
+        return
+    if hasattr(state.cache, "crop"):
+        # Nilai negatif = jumlah token yang dibuang dari akhir cache
+        state.cache.crop(length - state.length)
+    else:
+        state.cache = kv.from_legacy(kv.slice_length(kv.to_legacy(state.cache), length))
+    state.length = length
+
+
+def _pick(probs, do_sample):
+    import torch
+
+    if not do_sample:
+        return int(probs.argmax(-1))
+    return int(torch.multinomial(probs, 1))
+
+
+def check_compatible(target, draft):
+    """Pastikan draft dan target memakai vocabulary yang sama, mengembalikan ukuran vocab yang dipakai"""
+    if target.tokenizer.get_vocab() != draft.tokenizer.get_vocab():
+        raise ValueError(f"Tokenizer {draft.spec.model_id} berbeda dengan {target.spec.model_id}; "
+                         "speculative decoding butuh vocabulary yang sama")
+    for lm in (target, draft):
+        if not lm.spec.cache_reuse:
+            raise ValueError(f"{lm.spec.model_id} memakai KV-cache non-standar, tidak bisa dipakai untuk speculative decoding")
+    # Logits bisa lebih lebar dari tokenizer (embedding di-padding); posisi di luar tokenizer diabaikan
+    return len(target.tokenizer)
+
+
+def speculative_generate(target, draft, input_ids, num_draft_tokens=4, adaptive=True, stop_rules=None, **kwargs):
+    """Generate dari list token prompt dengan draft + verifikasi target; berhenti di EOS atau saat StopRules
+    terpenuhi. Mengembalikan (token prompt + token baru, statistik putaran ini)."""
+    import torch
+
+    vocab_size = check_compatible(target, draft)
+    params = sampling_params(kwargs)
+    eos = eos_ids(kwargs.get("eos_token_id"))
+    max_new_tokens = kwargs.get("max_new_tokens") or 20
+    stop = TextStop(target.tokenizer, stop_rules) if stop_rules else None
+
+    ids = list(input_ids)
+    prompt_length = len(ids)
+    target_state, draft_state = _CacheState(), _CacheState()
+    stats = {"rounds": 0, "drafted": 0, "accepted": 0, "target_forwards": 0}
+
+    with torch.no_grad():
+        # Kedua cache selalu mencakup semua token kecuali token terakhir
+        if prompt_length > 1:
+            _extend(target, target_state, ids[:-1], vocab_size)
+            _extend(draft, draft_state, ids[:-1], vocab_size)
+
+        k = num_draft_tokens
+        finished = False
+        while not finished and len(ids) - prompt_length < max_new_tokens:
+            # 1. Draft mengusulkan hingga k token (sisakan tempat untuk token koreksi/bonus dari target)
+            proposal, draft_probs = [], []
+            for _ in range(min(k, max_new_tokens - (len(ids) - prompt_length) - 1)):
+                logits = _extend(draft, draft_state, ids + proposal, vocab_size)[-1]
+                probs = next_token_probs(logits, ids + proposal, **params)
+                token = _pick(probs, params["do_sample"])
+                proposal.append(token)
+                draft_probs.append(probs)
+                if token in eos:
+                    break
+
+            # 2. Target menilai token terakhir + semua usulan dalam satu forward
+            logits = _extend(target, target_state, ids + proposal, vocab_size)[-(len(proposal) + 1):]
+            stats["target_forwards"] += 1
+
+            # 3. Terima/tolak usulan satu per satu
+            accepted, extra = 0, None
+            for i, token in enumerate(proposal):
+                p = next_token_probs(logits[i], ids + proposal[:i], **params)
+                q = draft_probs[i]
+                if torch.rand(()) < min(1.0, float(p[token] / q[token])):
+                    accepted += 1
+                    continue
+                residual = (p - q).clamp(min=0)
+                extra = _pick(residual / residual.sum(), params["do_sample"])
+                break
+            if extra is None:
+                p = next_token_probs(logits[len(proposal)], ids + proposal, **params)
+                extra = _pick(p, params["do_sample"])
+
+            new_tokens = proposal[:accepted] + [extra]
+            for position, token in enumerate(new_tokens):
+                if token in eos or (stop is not None and stop.extend([token])):
+                    new_tokens = new_tokens[:position + 1]
+                    finished = True
+                    break
+            ids += new_tokens[:max_new_tokens - (len(ids) - prompt_length)]
+
+            _rollback(target_state, len(ids) - 1)
+            _rollback(draft_state, len(ids) - 1)
+            stats["rounds"] += 1
+            stats["drafted"] += len(proposal)
+            stats["accepted"] += accepted
+            if adaptive:
+                # Sama seperti jadwal "heuristic" HF: tambah usulan jika semua diterima, kurangi jika ada yang ditolak
+                k = k + 2 if accepted == len(proposal) else max(1, k - 1)
+
+    stats["new_tokens"] = len(ids) - prompt_length
+    return ids, stats
+
+
+class SpeculativeDecoder:
+    """Jawab pertanyaan dengan model target dibantu model draft; statistik penerimaan diakumulasi antar panggilan"""
+
+    def __init__(self, target, draft=None, num_draft_tokens=4, adaptive=True):
+        self.target_spec = get_spec(target)
+        draft = draft or self.target_spec.draft_model
+        if draft is None:
+            raise ValueError(f"Model draft untuk {self.target_spec.model_id} belum ditentukan (ModelSpec.draft_model)")
+        self.draft_spec = get_spec(draft)
+        self.num_draft_tokens = num_draft_tokens
+        self.adaptive = adaptive
+        self.totals = {"requests": 0, "rounds": 0, "drafted": 0, "accepted": 0, "target_forwards": 0, "new_tokens": 0}
+        self._lock = threading.Lock()
+
+    def generate(self, question, context=None, **overrides):
+        """Generate jawaban, mengembalikan (jawaban, durasi, info penerimaan token draft)"""
+        with self._lock:
+            target = load_model(self.target_spec.model_id)
+            draft = load_model(self.draft_spec.model_id)
+            start_time = time.time()
+
+            prompt = target.spec.build_prompt(target.tokenizer, question, context)
+            input_ids = target.tokenizer(prompt)["input_ids"]
+            ids, info = speculative_generate(
+                target, draft, input_ids, self.num_draft_tokens, self.adaptive,
+                stop_rules=target.stop_rules(overrides), **target.generation_kwargs(**overrides)
+            )
+            answer = target.spec.extract_answer(target.tokenizer, ids, len(input_ids), target.stop_rules(overrides))
+
+            self.totals["requests"] += 1
+            for key, value in info.items():
+                self.totals[key] += value
+            info["acceptance_rate"] = info["accepted"] / info["drafted"] if info["drafted"] else 0.0
+            info["tokens_per_forward"] = info["new_tokens"] / max(info["target_forwards"], 1)
+            return answer, time.time() - start_time, info
+
+    def stats(self):
+        """Statistik kumulatif: tingkat penerimaan dan rata-rata token per forward model target"""
+        totals = dict(self.totals)
+        totals["acceptance_rate"] = totals["accepted"] / totals["drafted"] if totals["drafted"] else 0.0
+        totals["tokens_per_forward"] = totals["new_tokens"] / max(totals["target_forwards"], 1)
+        return totals
+
+
+_decoders = {}
+_decoders_lock = threading.Lock()
+
+
+def generate_speculative(name, question, draft=None, context=None, **overrides):
+    """Seperti generate_response tetapi dengan speculative decoding, mengembalikan (jawaban, durasi, info).
+    Decoder dipakai ulang per pasangan (target, draft) sehingga statistiknya terkumpul."""
+    key = (get_spec(name).model_id, draft)
+    with _decoders_lock:
+        if key not in _decoders:
+            _decoders[key] = SpeculativeDecoder(name, draft)
+        decoder = _decoders[key]
+    return decoder.generate(question, context=context, **overrides)
+
+
+def main(argv=None):
+    from .benchmark import PROMPTS
+
+    parser = argparse.ArgumentParser(description="Speculative decoding: model draft kecil + model target besar")
+    parser.add_argument("--model", default="qwen2.5-3b", help="model target (id Hugging Face atau alias)")
+    parser.add_argument("--draft", help="model draft (default: draft_model di registry)")
+    parser.add_argument("--draft-tokens", type=int, default=4, help="jumlah token usulan awal per putaran")
+    parser.add_argument("--max-new-tokens", type=int, default=64)
+    parser.add_argument("--sample", action="store_true", help="pakai parameter sampling model (default greedy)")
+    parser.add_argument("--compare", action="store_true", help="bandingkan latensi dengan generate biasa model target")
+    args = parser.parse_args(argv)
+
+    overrides = {"max_new_tokens": args.max_new_tokens}
+    if not args.sample:
+        overrides["do_sample"] = False
+    decoder = SpeculativeDecoder(args.model, args.draft, num_draft_tokens=args.draft_tokens)
+    speculative_time = 0.0
+    for question in PROMPTS:
+        answer, duration, info = decoder.generate(question, **overrides)
+        speculative_time += duration
+        print(f"❓ {question}\n🧠 {answer}\n🎯 diterima {info['accepted']}/{info['drafted']} token usulan, "
+              f"{info['tokens_per_forward']:.2f} token per forward target, {duration:.2f} detik\n")
+
+    stats = decoder.stats()
+    print(f"📊 Tingkat penerimaan {stats['acceptance_rate']:.1%}, {stats['tokens_per_forward']:.2f} token per forward target")
+    if args.compare:
+        from .generation import generate_response
+
+        plain_time = sum(generate_response(args.model, question, **overrides)[1] for question in PROMPTS)
+        print(f"⏱️ Target saja {plain_time:.2f} detik, speculative {speculative_time:.2f} detik "
+              f"({plain_time / speculative_time:.2f}×)")
+
+
+if __name__ == "__main__":
+    main()
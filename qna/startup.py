@@ -0,0 +1,117 @@
+"""Waktu start-up: rincian per tahap dan worker yang di-fork dari proses yang sudah mengimpor torch/transformers.
+
+Impor torch dan transformers memakan beberapa detik, lebih lama dari memetakan bobot safetensors dari
+snapshot lokal. Loader registry mencatat setiap tahap (impor, tokenizer, bobot) ke StartupReport. Proses
+worker dibuat lewat `worker_context()`: server forkserver mengimpor modul berat sekali, lalu setiap worker baru
+(termasuk restart) di-fork dari sana, sehingga hanya tersisa waktu memuat tokenizer dan memetakan bobot.
+
+    python -m qna.startup --model gpt2-indo --restarts 3"""
+
+import argparse
+import multiprocessing
+import time
+from contextlib import contextmanager
+
+# Diimpor sekali oleh server forkserver; worker hasil fork mewarisinya
+PRELOAD_MODULES = ["torch", "transformers", "transformers.models.auto.modeling_auto", "qna.registry"]
+
+
+class StartupReport:
+    """Durasi setiap tahap start-up (detik), sesuai urutan pencatatan"""
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start_time
+
+    @property
+    def total(self):
+        return sum(self.stages.values())
+
+    def __str__(self):
+        parts = [f"{name} {seconds:.2f}s" for name, seconds in self.stages.items()]
+        return " | ".join(parts + [f"total {self.total:.2f}s"])
+
+
+def worker_context():
+    """Context multiprocessing untuk proses worker: forkserver dengan modul berat yang sudah diimpor
+    (spawn jika forkserver tidak tersedia, mis. di Windows)"""
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload(PRELOAD_MODULES)
+    return context
+
+
+def _worker_load(name, tiny):
+    """Dijalankan di worker: waktu sejak proses mulai sampai model siap, plus forward pertama (page-in)"""
+    start_time = time.perf_counter()
+    if tiny:
+        from .tiny_models import load_tiny
+
+        lm = load_tiny(name)
+    else:
+        from .registry import load_model
+
+        lm = load_model(name)
+    ready = time.perf_counter() - start_time
+    first_forward = warm_up(lm)
+    return {"ready": ready, "first_forward": first_forward, "stages": getattr(lm, "startup", {})}
+
+
+def warm_up(lm):
+    """Satu forward pass kecil; pada bobot mmap ini juga memuat halaman bobot dari disk (page-in)"""
+    import torch
+
+    start_time = time.perf_counter()
+    inputs = lm.tokenizer("Apa ibu kota Indonesia?", return_tensors="pt").to(lm.device)
+    with torch.no_grad():
+        lm.model(**inputs)
+    return time.perf_counter() - start_time
+
+
+def measure_restarts(name, restarts=3, tiny=False, context=None):
+    """Waktu wall-clock setiap start worker baru (proses baru sampai model siap dan sudah forward sekali)"""
+    from concurrent.futures import ProcessPoolExecutor
+
+    context = context or worker_context()
+    results = []
+    for _ in range(restarts):
+        start_time = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            result = executor.submit(_worker_load, name, tiny).result()
+        result["wall"] = time.perf_counter() - start_time
+        results.append(result)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ukur rincian waktu start-up dan restart worker")
+    parser.add_argument("--model", default="gpt2-indo", help="alias/id model")
+    parser.add_argument("--restarts", type=int, default=3, help="jumlah restart worker yang diukur")
+    parser.add_argument("--tiny", action="store_true", help="pakai model mini berbobot acak (offline, CPU)")
+    args = parser.parse_args(argv)
+
+    # Start dingin: proses baru tanpa modul berat (seperti menjalankan skrip biasa)
+    cold = measure_restarts(args.model, 1, args.tiny, multiprocessing.get_context("spawn"))[0]
+    print(f"🧊 Start dingin (spawn): {cold['wall']:.2f} detik sampai siap + forward pertama")
+    if cold["stages"]:
+        print("   " + " | ".join(f"{name} {seconds:.2f}s" for name, seconds in cold["stages"].items()))
+
+    context = worker_context()
+    print(f"♻️ Restart worker ({context.get_start_method()}, modul berat sudah diimpor):")
+    # Restart pertama ikut menanggung start server forkserver (impor sekali)
+    for index, result in enumerate(measure_restarts(args.model, args.restarts + 1, args.tiny, context)):
+        label = "start server forkserver" if index == 0 else f"restart {index}"
+        print(f"   {label}: {result['wall']:.2f} detik (model siap {result['ready']:.2f}s, "
+              f"forward pertama/page-in {result['first_forward']:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
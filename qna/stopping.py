@@ -0,0 +1,165 @@
+"""Aturan berhenti generate berbasis teks: stop string, batas jumlah kalimat, dan baris kosong.
+
+Aturan diperiksa secara inkremental pada token yang baru dihasilkan: setiap langkah hanya token baru yang
+didekode (dengan offset seperti detokenizer streaming), sehingga generate berhenti begitu jawaban lengkap
+tanpa mendekode ulang seluruh teks. Aturan yang sama dipakai untuk memotong teks akhir (`StopRules.trim`)."""
+
+import re
+from dataclasses import dataclass
+
+# Akhir kalimat: tanda baca (boleh diikuti tanda kutip/kurung tutup) lalu spasi. Angka desimal seperti
+# "17.08" tidak dihitung karena tidak diikuti spasi.
+SENTENCE_END = re.compile(r"[.!?]+[\"')\]]*(?=\s)")
+_SENTENCE_END_FINAL = re.compile(r"[.!?]+[\"')\]]*(?=\s|$)")
+_BLANK_LINE = re.compile(r"\n[ \t]*\n")
+
+
+@dataclass(frozen=True)
+class StopRules:
+    """Kapan jawaban dianggap selesai. Semua aturan hanya melihat teks hasil generate, bukan prompt."""
+
+    stop: tuple = ()                 # Berhenti jika salah satu string ini muncul, mis. ("Pertanyaan:",)
+    max_sentences: int = None        # Berhenti setelah sekian kalimat
+    stop_at_blank_line: bool = False  # Berhenti di baris kosong pertama setelah jawaban dimulai
+
+    def __post_init__(self):
+        # Simpan sebagai tuple agar StopRules tetap hashable (bisa jadi bagian kunci batch/cache)
+        object.__setattr__(self, "stop", tuple(self.stop))
+
+    def __bool__(self):
+        return bool(self.stop or self.max_sentences or self.stop_at_blank_line)
+
+    def _cut(self, text, sentence_end):
+        cut = len(text)
+        for stop in self.stop:
+            index = text.find(stop)
+            if index != -1:
+                cut = min(cut, index)
+        if self.stop_at_blank_line:
+            start = len(text) - len(text.lstrip())
+            match = _BLANK_LINE.search(text, start)
+            if match:
+                cut = min(cut, match.start())
+        if self.max_sentences:
+            for count, match in enumerate(sentence_end.finditer(text), start=1):
+                if count == self.max_sentences:
+                    cut = min(cut, match.end())
+                    break
+        return cut
+
+    def trim(self, text):
+        """Potong teks di titik berhenti paling awal (stop string dan sesudahnya ikut dibuang)"""
+        return text[:self._cut(text, _SENTENCE_END_FINAL)].strip()
+
+    def safe_prefix(self, text):
+        """Bagian teks parsial (saat streaming) yang pasti tetap ada di hasil `trim` akhir: ekor sepanjang
+        stop string terpanjang ditahan karena bisa jadi awal stop string, begitu juga spasi di ujung"""
+        hold = max((len(stop) for stop in self.stop), default=1) - 1
+        cut = min(self._cut(text, SENTENCE_END), len(text) - hold)
+        return text[:max(cut, 0)].strip()
+
+
+class TextStop:
+    """Status berhenti satu sequence: token baru didekode inkremental lalu diperiksa terhadap StopRules"""
+
+    def __init__(self, tokenizer, rules):
+        self.tokenizer = tokenizer
+        self.rules = rules
+        self.tokens = []
+        self.text = ""
+        self.done = False
+        self._prefix_offset = 0
+        self._read_offset = 0
+        self._sentences = 0
+        self._sentence_scan = 0
+
+    def _decode_delta(self):
+        # Dekode beberapa token terakhir saja; teks ditambahkan setelah karakter multi-byte lengkap
+        prefix = self.tokenizer.decode(self.tokens[self._prefix_offset:self._read_offset], skip_special_tokens=True)
+        text = self.tokenizer.decode(self.tokens[self._prefix_offset:], skip_special_tokens=True)
+        if len(text) <= len(prefix) or text.endswith("�"):
+            return ""
+        self._prefix_offset = self._read_offset
+        self._read_offset = len(self.tokens)
+        return text[len(prefix):]
+
+    def extend(self, tokens):
+        """Tambahkan token baru, mengembalikan True jika jawaban sudah selesai"""
+        if self.done or not tokens:
+            return self.done
+        self.tokens.extend(tokens)
+        delta = self._decode_delta()
+        if not delta:
+            return False
+
+        previous = len(self.text)
+        self.text += delta
+        rules = self.rules
+        for stop in rules.stop:
+            if stop in self.text[max(0, previous - len(stop) + 1):]:
+                self.done = True
+        if rules.stop_at_blank_line and self.text.strip():
+            start = max(len(self.text) - len(self.text.lstrip()), previous - 2)
+            if _BLANK_LINE.search(self.text, max(start, 0)):
+                self.done = True
+        if rules.max_sentences:
+            for match in SENTENCE_END.finditer(self.text, self._sentence_scan):
+                self._sentences += 1
+                self._sentence_scan = match.end()
+            if self._sentences >= rules.max_sentences:
+                self.done = True
+        return self.done
+
+
+def stopping_criteria(tokenizer, rules):
+    """StoppingCriteriaList untuk model.generate yang menerapkan StopRules per baris batch
+    (None jika tidak ada aturan). Panjang prompt diambil dari panggilan pertama (setelah token baru pertama)."""
+    if not rules:
+        return None
+
+    import torch
+    from transformers import StoppingCriteria, StoppingCriteriaList
+
+    class _StopRulesCriteria(StoppingCriteria):
+        def __init__(self):
+            self.prompt_length = None
+            self.rows = None
+
+        def __call__(self, input_ids, scores, **kwargs):
+            if self.rows is None:
+                self.prompt_length = input_ids.shape[-1] - 1
+                self.rows = [TextStop(tokenizer, rules) for _ in range(input_ids.shape[0])]
+            done = []
+            for row, state in enumerate(self.rows):
+                if not state.done:
+                    state.extend(input_ids[row, self.prompt_length + len(state.tokens):].tolist())
+                done.append(state.done)
+            return torch.tensor(done, dtype=torch.bool, device=input_ids.device)
+
+    return StoppingCriteriaList([_StopRulesCriteria()])
+
+
+def cancel_criteria(event):
+    """StoppingCriteria yang menghentikan generate begitu `event` (threading.Event) di-set"""
+    import torch
+    from transformers import StoppingCriteria, StoppingCriteriaList
+
+    class _Cancelled(StoppingCriteria):
+        def __call__(self, input_ids, scores, **kwargs):
+            return torch.full((input_ids.shape[0],), event.is_set(), dtype=torch.bool, device=input_ids.device)
+
+    return StoppingCriteriaList([_Cancelled()])
+
+
+def add_criteria(kwargs, *criteria):
+    """Gabungkan StoppingCriteria tambahan ke kwargs generate tanpa menimpa yang sudah ada"""
+    from transformers import StoppingCriteriaList
+
+    combined = StoppingCriteriaList(kwargs.get("stopping_criteria") or [])
+    for item in criteria:
+        if isinstance(item, list):
+            combined.extend(item)
+        elif item is not None:
+            combined.append(item)
+    kwargs["stopping_criteria"] = combined
+    return kwargs
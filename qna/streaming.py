@@ -0,0 +1,131 @@
+import threading
+import time
+
+from .registry import load_model
+from .stopping import add_criteria, cancel_criteria, stopping_criteria
+
+
+def _make_streamer(tokenizer):
+    from transformers import TextIteratorStreamer
+
+    class _CountingStreamer(TextIteratorStreamer):
+        """TextIteratorStreamer yang juga menghitung jumlah token baru"""
+
+        token_count = 0
+
+        def put(self, value):
+            if not (self.skip_prompt and self.next_tokens_are_prompt):
+                self.token_count += value.numel()
+            super().put(value)
+
+    return _CountingStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+
+
+class ResponseStream:
+    """Iterator teks jawaban yang dihasilkan bertahap per token.
+
+    Bisa dipakai langsung di loop terminal maupun `st.write_stream`. Setelah iterasi selesai,
+    `text`, `time_to_first_token`, `duration` dan `new_tokens` berisi hasil akhirnya.
+    Dengan `stop_rules` teks yang di-yield sudah dipotong seperti `StopRules.trim`; ekor yang mungkin
+    awal stop string ditahan dulu. Generate dibatalkan jika iterator ditutup atau dibuang sebelum selesai."""
+
+    def __init__(self, model, tokenizer, inputs, generation_kwargs, start_time=None, stop_rules=None):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.inputs = inputs
+        self.generation_kwargs = generation_kwargs
+        self.stop_rules = stop_rules
+        self.start_time = start_time or time.time()
+        self.text = ""
+        self.time_to_first_token = None
+        self.duration = None
+        self.new_tokens = 0
+        self._started = False
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """Hentikan generate yang sedang berjalan"""
+        self._cancelled.set()
+
+    def _advance(self, visible):
+        # Kembalikan bagian `visible` yang belum pernah di-yield
+        if len(visible) <= len(self.text) or not visible.startswith(self.text):
+            return ""
+        delta = visible[len(self.text):]
+        self.text = visible
+        return delta
+
+    def __iter__(self):
+        if self._started:
+            raise RuntimeError("ResponseStream hanya bisa diiterasi sekali")
+        self._started = True
+
+        import torch
+
+        streamer = _make_streamer(self.tokenizer)
+        generation_kwargs = add_criteria(dict(self.generation_kwargs), cancel_criteria(self._cancelled))
+        rules = self.stop_rules
+        errors = []
+
+        def _generate():
+            try:
+                with torch.no_grad():
+                    self.model.generate(**self.inputs, **generation_kwargs, streamer=streamer)
+            except Exception as e:
+                errors.append(e)
+                streamer.end()
+
+        thread = threading.Thread(target=_generate, daemon=True)
+        thread.start()
+
+        raw = ""
+        finished = False
+        try:
+            for chunk in streamer:
+                if not chunk:
+                    continue
+                raw += chunk
+                delta = self._advance(rules.safe_prefix(raw)) if rules else self._advance(self.text + chunk)
+                if not delta:
+                    continue
+                if self.time_to_first_token is None:
+                    self.time_to_first_token = time.time() - self.start_time
+                yield delta
+
+            thread.join()
+            finished = True
+            if rules:
+                delta = self._advance(rules.trim(raw))
+                if delta:
+                    if self.time_to_first_token is None:
+                        self.time_to_first_token = time.time() - self.start_time
+                    yield delta
+        finally:
+            # Iterator ditutup/dibuang di tengah jalan (mis. klien berhenti membaca): batalkan generate
+            if not finished:
+                self.cancel()
+
+        self.duration = time.time() - self.start_time
+        self.new_tokens = streamer.token_count
+        if errors:
+            raise errors[0]
+
+
+def stream_generate(model, tokenizer, prompt, stop_rules=None, **generation_kwargs):
+    """Streaming generate untuk model/tokenizer apa pun (mis. dari pipeline Streamlit)"""
+    start_time = time.time()
+    inputs = tokenizer(prompt, return_tensors="pt").to(model.device)
+    add_criteria(generation_kwargs, stopping_criteria(tokenizer, stop_rules))
+    return ResponseStream(model, tokenizer, inputs, generation_kwargs, start_time=start_time, stop_rules=stop_rules)
+
+
+def stream_response(name, question, **overrides):
+    """Versi streaming dari generate_response: teks yang di-yield hanya bagian jawaban (token baru)"""
+    lm = load_model(name)
+    start_time = time.time()
+    prompt = lm.spec.build_prompt(lm.tokenizer, question)
+    inputs = lm.tokenizer(prompt, return_tensors="pt").to(lm.device)
+    generation_kwargs = dict(lm.prefill_kwargs(inputs["input_ids"]), **lm.generation_kwargs(**overrides))
+    return ResponseStream(
+        lm.model, lm.tokenizer, inputs, generation_kwargs, start_time=start_time, stop_rules=lm.stop_rules(overrides)
+    )
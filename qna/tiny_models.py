@@ -0,0 +1,111 @@
+"""Versi mini (bobot acak) dari model di registry untuk benchmark dan uji cepat tanpa internet.
+
+Arsitektur ditebak dari model_id, konfigurasinya diperkecil (2 layer, hidden 64), dan tokenizer
+word-level dilatih di tempat dari teks contoh. Hasilnya LoadedModel biasa, jadi semua jalur kode
+(prompt, generate, ekstraksi jawaban, QA ekstraktif) bisa diukur dengan cepat di CPU."""
+
+import time
+
+from .registry import LoadedModel, get_spec
+
+# Kata kunci di model_id -> model_type transformers (urutan penting: "qwen3" sebelum "qwen2")
+_FAMILIES = [
+    ("qwen3", "qwen3"),
+    ("qwen2", "qwen2"),
+    ("gemma", "gemma2"),
+    ("llama", "llama"),
+    ("gpt", "gpt2"),
+    ("bert", "bert"),
+]
+
+_SAMPLE_TEXT = """
+Indonesia adalah negara kepulauan terbesar di dunia. Ibu kota Indonesia adalah Jakarta.
+Soekarno adalah presiden pertama Indonesia. Proklamasi kemerdekaan dibacakan pada 17 Agustus 1945.
+Pertanyaan: Apa ibu kota Indonesia? Jawaban: Jakarta. Konteks: Siapa, kapan, dimana, mengapa, bagaimana.
+system user assistant. You are a helpful assistant. Anda adalah asisten AI yang ramah dan membantu.
+"""
+
+_CHAT_TEMPLATE = (
+    "{% for m in messages %}<|im_start|>{{ m['role'] }}\n{{ m['content'] }}<|im_end|>\n{% endfor %}"
+    "{% if add_generation_prompt %}<|im_start|>assistant\n{% endif %}"
+)
+
+
+def model_type_for(spec):
+    """model_type transformers untuk spec berdasarkan model_id"""
+    model_id = spec.model_id.lower()
+    for keyword, model_type in _FAMILIES:
+        if keyword in model_id:
+            return model_type
+    raise ValueError(f"Arsitektur mini untuk '{spec.model_id}' tidak diketahui")
+
+
+def tiny_tokenizer(extra_text=""):
+    """Tokenizer word-level kecil yang dilatih dari teks contoh (tanpa unduhan)"""
+    from tokenizers import Tokenizer, models, pre_tokenizers, processors, trainers
+    from transformers import PreTrainedTokenizerFast
+
+    special = ["[UNK]", "[PAD]", "[CLS]", "[SEP]", "[MASK]", "<s>", "</s>", "<|im_start|>", "<|im_end|>"]
+    tokenizer = Tokenizer(models.WordLevel(unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Sequence([pre_tokenizers.WhitespaceSplit(), pre_tokenizers.Punctuation()])
+    tokenizer.train_from_iterator([_SAMPLE_TEXT, extra_text], trainers.WordLevelTrainer(special_tokens=special))
+    cls_id, sep_id = tokenizer.token_to_id("[CLS]"), tokenizer.token_to_id("[SEP]")
+    # Pasangan (pertanyaan, konteks) diformat seperti BERT; teks tunggal dibiarkan apa adanya
+    tokenizer.post_processor = processors.TemplateProcessing(
+        single="$A",
+        pair="[CLS] $A [SEP] $B:1 [SEP]:1",
+        special_tokens=[("[CLS]", cls_id), ("[SEP]", sep_id)],
+    )
+
+    fast = PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer,
+        unk_token="[UNK]",
+        pad_token="[PAD]",
+        cls_token="[CLS]",
+        sep_token="[SEP]",
+        mask_token="[MASK]",
+        bos_token="<s>",
+        eos_token="</s>",
+    )
+    fast.chat_template = _CHAT_TEMPLATE
+    return fast
+
+
+def tiny_config(model_type, tokenizer, hidden_size=64, layers=2, heads=4):
+    from transformers import AutoConfig
+
+    ids = {
+        "vocab_size": len(tokenizer),
+        "pad_token_id": tokenizer.pad_token_id,
+        "bos_token_id": tokenizer.bos_token_id,
+        "eos_token_id": tokenizer.eos_token_id,
+    }
+    if model_type == "gpt2":
+        return AutoConfig.for_model("gpt2", n_embd=hidden_size, n_layer=layers, n_head=heads, n_positions=1024, **ids)
+    return AutoConfig.for_model(
+        model_type,
+        hidden_size=hidden_size,
+        intermediate_size=hidden_size * 2,
+        num_hidden_layers=layers,
+        num_attention_heads=heads,
+        num_key_value_heads=max(1, heads // 2),
+        head_dim=hidden_size // heads,
+        max_position_embeddings=1024,
+        **ids,
+    )
+
+
+def load_tiny(name, seed=0, extra_text=""):
+    """LoadedModel dengan arsitektur yang sama seperti model `name`, tetapi mini dan berbobot acak"""
+    import torch
+    from transformers import AutoModelForCausalLM, AutoModelForQuestionAnswering
+
+    spec = get_spec(name)
+    start_time = time.time()
+    tokenizer = tiny_tokenizer(extra_text)
+    config = tiny_config(model_type_for(spec), tokenizer)
+    model_class = AutoModelForQuestionAnswering if spec.task == "question-answering" else AutoModelForCausalLM
+
+    torch.manual_seed(seed)
+    model = model_class.from_config(config).eval()
+    return LoadedModel(spec, tokenizer, model, time.time() - start_time)